@@ -0,0 +1,48 @@
+"""
+Synthetic connection inventories for the benchmarks
+
+The generated inventory looks like a render farm: a few sites and
+clusters (which are also the connections' groups), node names with
+shared prefixes, a handful of usernames and
+some connections with their own performance settings. Generation is
+deterministic, so runs stay comparable.
+"""
+
+import random
+from typing import List
+from turbovncui.models.connection import Connection
+from turbovncui.models.profile import PerformanceSettings
+
+
+SITES = ["fra", "iad", "sin", "syd", "gru"]
+ROLES = ["render", "viz", "gpu", "login", "build"]
+USERNAMES = ["ops", "render", "admin", "artist", None]
+
+
+def generate_inventory(count: int, seed: int = 0) -> List[Connection]:
+    """Generate `count` connections with unique names."""
+    rng = random.Random(seed)
+    connections = []
+    for i in range(count):
+        site = SITES[i % len(SITES)]
+        role = ROLES[(i // len(SITES)) % len(ROLES)]
+        cluster = i % 50
+        performance = None
+        if i % 20 == 0:
+            performance = PerformanceSettings(
+                preset="custom",
+                encoding="Tight",
+                jpeg_quality=rng.choice([30, 60, 80, 95]),
+                jpeg_subsampling=rng.choice(["1X", "2X", "4X"]),
+                compress_level=rng.randint(0, 2),
+            )
+        connections.append(Connection(
+            name=f"{site}-{role}-{i:06d}",
+            host=f"{role}{i:06d}.c{cluster:02d}.{site}.example.com",
+            port=5900 + rng.randint(0, 9),
+            username=rng.choice(USERNAMES),
+            display=f":{rng.randint(1, 4)}" if i % 3 == 0 else None,
+            performance=performance,
+            group=f"{site}/c{cluster:02d}",
+        ))
+    return connections
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+TurboVNC UI - benchmark harness
+
+Times storage, model, launcher and UI refresh code against synthetic
+inventories of increasing size, records peak Python memory per case, and
+compares the results with a stored baseline:
+
+    python benchmarks/run_benchmarks.py                  # 10 .. 100k
+    python benchmarks/run_benchmarks.py --sizes 10,1000  # quick run
+    python benchmarks/run_benchmarks.py --update-baseline
+
+Everything runs against temporary config/cache directories with a stub
+viewer binary, and the UI cases use Qt's offscreen platform, so nothing
+touches the user's settings or opens a window. Exits with status 1 if a
+case regressed past the threshold.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(SRC_DIR))
+sys.path.insert(0, str(BENCH_DIR))
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+# Time differences below this are noise, whatever the ratio
+NOISE_FLOOR_SECONDS = 0.01
+# Peak memory differences below this are noise (allocator and cache
+# state), whatever the ratio
+NOISE_FLOOR_BYTES = 64 * 1024
+
+
+def setup_environment(work_dir: Path) -> None:
+    """Point HOME, caches and PATH at a scratch area with the stub viewer."""
+    home = work_dir / "home"
+    bin_dir = work_dir / "bin"
+    home.mkdir()
+    bin_dir.mkdir()
+    os.symlink(BENCH_DIR / "fake_vncviewer", bin_dir / "vncviewer")
+
+    os.environ["HOME"] = str(home)
+    os.environ["XDG_CACHE_HOME"] = str(home / ".cache")
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    os.environ.pop("TURBOVNCUI_STORAGE", None)
+
+
+def measure(run, setup=None, repeat: int = 5, number: int = 1) -> dict:
+    """Time run(state) and record its peak traced memory.
+
+    setup() (if given) builds fresh state for each run and isn't timed.
+    The reported time is the median of `repeat` runs divided by `number`
+    (the operations one run performs). Peak memory comes from one extra
+    run under tracemalloc, which would distort the timings.
+    """
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        gc.collect()
+        start = time.perf_counter()
+        run(state)
+        times.append((time.perf_counter() - start) / number)
+
+    state = setup() if setup else None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "peak_bytes": peak,
+    }
+
+
+def repeats_for(size: int) -> int:
+    """Fewer repeats for the big inventories."""
+    return 3 if size >= 100000 else 5
+
+
+def bench_model(size: int, inventory: list, results: dict) -> None:
+    """Connection.to_dict / from_dict over the whole inventory."""
+    from turbovncui.models.connection import Connection
+
+    repeat = repeats_for(size)
+    dicts = [conn.to_dict() for conn in inventory]
+    results["model.to_dict"] = measure(
+        lambda _: [conn.to_dict() for conn in inventory], repeat=repeat
+    )
+    results["model.from_dict"] = measure(
+        lambda _: [Connection.from_dict(d) for d in dicts], repeat=repeat
+    )
+
+
+def bench_database(size: int, inventory: list, results: dict,
+                   work_dir: Path) -> None:
+    """ConnectionDatabase operations against a store of `size` entries."""
+    from turbovncui.models.connection import Connection
+    from turbovncui.utils.database import open_database
+
+    repeat = repeats_for(size)
+    store = work_dir / f"db-{size}"
+
+    def fresh_store():
+        shutil.rmtree(store, ignore_errors=True)
+        return open_database(str(store))
+
+    results["db.save"] = measure(
+        lambda db: db.save_connections(inventory), fresh_store, repeat
+    )
+
+    db = fresh_store()
+    db.save_connections(inventory)
+    results["db.load"] = measure(
+        lambda _: open_database(str(store)).load_connections(),
+        repeat=repeat
+    )
+
+    def without_snapshot():
+        snapshot = store / "connections.snapshot"
+        if snapshot.exists():
+            snapshot.unlink()
+
+    results["db.load_no_snapshot"] = measure(
+        lambda _: open_database(str(store)).load_connections(),
+        without_snapshot, repeat
+    )
+
+    db = open_database(str(store))
+    db.load_connections()
+    counter = iter(range(10 ** 9))
+
+    def add(_):
+        db.add_connection(
+            Connection(f"bench-added-{next(counter)}", "added.example.com")
+        )
+
+    results["db.add_connection"] = measure(add, repeat=repeat)
+
+    target = inventory[len(inventory) // 2]
+    hosts = iter(range(10 ** 9))
+
+    def update(_):
+        changed = Connection.from_dict(target.to_dict())
+        changed.host = f"updated{next(hosts)}.example.com"
+        db.update_connection(target.name, changed)
+
+    results["db.update_connection"] = measure(update, repeat=repeat)
+
+    def delete(name):
+        db.delete_connection(name)
+
+    def added_name():
+        name = f"bench-deleted-{next(counter)}"
+        db.add_connection(Connection(name, "deleted.example.com"))
+        return name
+
+    results["db.delete_connection"] = measure(delete, added_name, repeat)
+
+    names = [conn.name for conn in inventory]
+    lookups = [names[i * 7919 % len(names)] for i in range(1000)]
+    results["db.get_connection_by_name"] = measure(
+        lambda _: [db.get_connection_by_name(name) for name in lookups],
+        repeat=repeat, number=len(lookups)
+    )
+
+    def open_group(_):
+        # What the tree needs to show one folder of a fresh store
+        fresh = open_database(str(store))
+        group = max(fresh.group_counts().items(), key=lambda item: item[1])
+        fresh.query_group(group[0], 0, 200)
+
+    results["db.open_group"] = measure(open_group, repeat=repeat)
+
+
+def bench_launcher(size: int, inventory: list, results: dict,
+                   work_dir: Path) -> None:
+    """VNCLaucher.build_command for every connection, with the stub viewer."""
+    from turbovncui.utils.profiles import ProfileStore
+    from turbovncui.utils.vnc_launcher import VNCLaucher
+
+    launcher = VNCLaucher(
+        str(BENCH_DIR / "fake_vncviewer"),
+        cache_dir=str(work_dir / f"cache-{size}"),
+        profile_store=ProfileStore(str(work_dir / f"profiles-{size}")),
+    )
+    launcher.probe()
+    results["launcher.build_command"] = measure(
+        lambda _: [launcher.build_command(conn) for conn in inventory],
+        repeat=repeats_for(size)
+    )
+
+
+def bench_ui(size: int, inventory: list, results: dict, app) -> None:
+    """MainWindow startup, list refresh and search at this size."""
+    from turbovncui.gui.main_window import MainWindow
+    from turbovncui.models.connection import Connection
+    from turbovncui.utils.database import open_database
+    from turbovncui.utils.search_index import SearchIndex
+
+    repeat = repeats_for(size)
+    open_database().save_connections(inventory)
+
+    windows = []
+
+    def start(_):
+        # Until the list is shown; the search index keeps building
+        window = MainWindow()
+        window.show()
+        app.processEvents()
+        windows.append(window)
+
+    results["ui.startup"] = measure(start, repeat=repeat)
+    for window in windows:
+        window.search_index_worker.wait()
+    app.processEvents()
+    for window in windows[1:]:
+        window.close()
+        window.deleteLater()
+    app.processEvents()
+    window = windows[0]
+
+    def refresh(_):
+        window.update_connection_list()
+        app.processEvents()
+
+    results["ui.update_connection_list"] = measure(refresh, repeat=repeat)
+
+    counter = iter(range(10 ** 9))
+
+    def refresh_after_add(_):
+        window.connections.append(
+            Connection(f"ui-added-{next(counter)}", "added.example.com")
+        )
+        window.update_connection_list()
+        app.processEvents()
+
+    results["ui.update_connection_list_one_added"] = measure(
+        refresh_after_add, repeat=repeat
+    )
+
+    def search(_):
+        for text in ("fra-render", "c07.sin", "artist", ""):
+            window.search_edit.setText(text)
+            app.processEvents()
+
+    results["ui.search"] = measure(search, repeat=repeat, number=4)
+
+    model = window.connection_tree_model
+    view = window.connection_list
+    group_path = inventory[0].group
+
+    def collapsed_group():
+        # Everything closed and unfetched, except the group's site
+        model.reload()
+        app.processEvents()
+        view.expand(model.index_for_group(group_path.split("/")[0]))
+        return model.index_for_group(group_path)
+
+    def expand_group(group):
+        view.expand(group)
+        app.processEvents()
+
+    results["ui.expand_group"] = measure(
+        expand_group, collapsed_group, repeat
+    )
+    results["ui.search_index_build"] = measure(
+        lambda _: SearchIndex().sync(inventory), repeat=repeat
+    )
+    window.close()
+    window.deleteLater()
+    app.processEvents()
+
+
+def bench_cli(size: int, results: dict, work_dir: Path) -> None:
+    """`turbovncui-cli list --names` in a fresh process."""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    command = [
+        sys.executable, "-m", "turbovncui.cli",
+        "--config-dir", str(work_dir / f"db-{size}"), "list", "--names"
+    ]
+    results["cli.list_names"] = measure(
+        lambda _: subprocess.run(command, env=env, check=True,
+                                 stdout=subprocess.DEVNULL),
+        repeat=repeats_for(size)
+    )
+
+
+def check_cli_imports() -> bool:
+    """Check the CLI and storage modules load without PyQt5."""
+    env = dict(os.environ, PYTHONPATH=str(SRC_DIR))
+    result = subprocess.run(
+        [sys.executable, "-c",
+         "import sys, turbovncui.cli, turbovncui.utils.database, "
+         "turbovncui.utils.vnc_launcher; print('PyQt5' in sys.modules)"],
+        env=env, capture_output=True, text=True, check=True
+    )
+    return result.stdout.strip() == "False"
+
+
+def run_benchmarks(sizes: list, include_ui: bool) -> dict:
+    """Run every case at every size; returns the results document."""
+    from inventory import generate_inventory
+
+    work_dir = Path(tempfile.mkdtemp(prefix="turbovncui-bench-"))
+    try:
+        setup_environment(work_dir)
+        app = None
+        if include_ui:
+            from PyQt5.QtWidgets import QApplication
+            from turbovncui.gui.main_window import MainWindow
+            app = QApplication([])
+            # Health checks would go out to the (made up) hosts
+            MainWindow.check_health = lambda self: None
+
+        results = {}
+        for size in sizes:
+            print(f"Benchmarking {size} connections...", file=sys.stderr)
+            inventory = generate_inventory(size)
+            cases = {}
+            bench_model(size, inventory, cases)
+            bench_database(size, inventory, cases, work_dir)
+            bench_launcher(size, inventory, cases, work_dir)
+            bench_cli(size, cases, work_dir)
+            if include_ui:
+                bench_ui(size, inventory, cases, app)
+            for name, result in cases.items():
+                results[f"{name}@{size}"] = result
+
+        return {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "sizes": sizes,
+                "cli_imports_qt": not check_cli_imports(),
+            },
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare(current: dict, baseline: dict, time_threshold: float,
+            memory_threshold: float) -> list:
+    """List cases that got slower or bigger than the thresholds allow."""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        result = current["results"].get(name)
+        if result is None:
+            continue
+        if (result["seconds"] > base["seconds"] * time_threshold and
+                result["seconds"] - base["seconds"] > NOISE_FLOOR_SECONDS):
+            regressions.append(
+                f"{name}: {base['seconds'] * 1000:.2f} ms -> "
+                f"{result['seconds'] * 1000:.2f} ms"
+            )
+        if (result["peak_bytes"] > base["peak_bytes"] * memory_threshold and
+                result["peak_bytes"] - base["peak_bytes"] > NOISE_FLOOR_BYTES):
+            regressions.append(
+                f"{name}: peak {base['peak_bytes'] / 1024:.0f} KiB -> "
+                f"{result['peak_bytes'] / 1024:.0f} KiB"
+            )
+    return regressions
+
+
+def print_table(current: dict, baseline: dict) -> None:
+    """Print results next to the baseline."""
+    base_results = baseline.get("results", {})
+    print(f"{'case':<48} {'time':>12} {'baseline':>12} {'peak KiB':>10}")
+    for name, result in current["results"].items():
+        base = base_results.get(name)
+        base_text = f"{base['seconds'] * 1000:.3f} ms" if base else "-"
+        print(f"{name:<48} {result['seconds'] * 1000:>9.3f} ms "
+              f"{base_text:>12} {result['peak_bytes'] / 1024:>10.0f}")
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark TurboVNC UI at increasing inventory sizes"
+    )
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="comma-separated inventory sizes (default: %(default)s)"
+    )
+    parser.add_argument("--no-ui", action="store_true",
+                        help="skip the Qt benchmarks")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="baseline JSON to compare against")
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="store these results as the new baseline")
+    parser.add_argument("--time-threshold", type=float, default=1.25,
+                        help="allowed slowdown ratio (default: 1.25)")
+    parser.add_argument("--memory-threshold", type=float, default=1.15,
+                        help="allowed peak memory ratio (default: 1.15)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    current = run_benchmarks(sizes, include_ui=not args.no_ui)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        baseline = {}
+
+    print_table(current, baseline)
+    failed = False
+    if current["meta"]["cli_imports_qt"]:
+        print("FAIL: the command-line interface imports PyQt5")
+        failed = True
+    regressions = compare(current, baseline, args.time_threshold,
+                          args.memory_threshold)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,9 +15,13 @@ setup(
     install_requires=[
         "PyQt5>=5.15.0",
     ],
+    extras_require={
+        "yaml": ["PyYAML"],
+    },
     entry_points={
         "console_scripts": [
             "turbovncui=turbovncui.main:main",
+            "turbovncui-cli=turbovncui.cli:main",
         ],
     },
     python_requires=">=3.8",
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+TurboVNC UI - command-line interface
+
+Manages and launches connections without the GUI. Each subcommand imports
+only what it needs, and nothing here imports PyQt5, so it starts fast
+enough to drive rofi/dmenu launchers and shell scripts.
+"""
+
+import argparse
+import json
+import sys
+
+
+def open_db(args):
+    """Open the connection database for the configured backend."""
+    from turbovncui.utils.database import open_database
+    return open_database(args.config_dir)
+
+
+def make_launcher(args):
+    """Create a launcher using the same config dir as the database."""
+    from turbovncui.utils.profiles import ProfileStore
+    from turbovncui.utils.vnc_launcher import VNCLaucher
+    return VNCLaucher(
+        args.viewer, profile_store=ProfileStore(args.config_dir)
+    )
+
+
+def most_used_first(db, connections):
+    """Reorder connections so the most used ones come first."""
+    by_name = {c.name: c for c in connections}
+    top = [by_name[name] for name in db.history.most_used() if name in by_name]
+    if not top:
+        return connections
+    top_names = {c.name for c in top}
+    return top + [c for c in connections if c.name not in top_names]
+
+
+def group_connections(db, group):
+    """Get the connections in a group and its subgroups."""
+    from turbovncui.models.connection import GROUP_SEPARATOR, normalize_group
+
+    group = normalize_group(group) or ""
+    prefix = group + GROUP_SEPARATOR
+    connections = []
+    for path in sorted(db.group_counts()):
+        if path == group or (group and path.startswith(prefix)):
+            connections.extend(db.query_group(path))
+    return connections
+
+
+def cmd_list(args):
+    """List saved connections."""
+    db = open_db(args)
+    if args.group is not None:
+        connections = group_connections(db, args.group)
+    else:
+        connections = db.load_connections()
+    if args.recent:
+        connections = most_used_first(db, connections)
+    if args.json:
+        json.dump([c.to_dict() for c in connections], sys.stdout, indent=2)
+        print()
+    elif args.names:
+        for connection in connections:
+            print(connection.name)
+    else:
+        for connection in connections:
+            print(connection)
+    return 0
+
+
+def cmd_connect(args):
+    """Launch the viewer for a saved connection."""
+    from turbovncui.utils.history import resolve_connection
+
+    db = open_db(args)
+    connection = resolve_connection(db, args.name)
+    if connection is None:
+        if args.name is None:
+            print("Error: no connection has been used yet", file=sys.stderr)
+        else:
+            print(f"Error: no connection matches '{args.name}'",
+                  file=sys.stderr)
+        return 1
+    if connection.name != args.name:
+        print(f"Connecting to {connection.name}", file=sys.stderr)
+
+    db.save_last_connection(connection)
+    if make_launcher(args).launch_detached(connection) is None:
+        return 1
+    return 0
+
+
+def cmd_add(args):
+    """Add a new connection."""
+    from turbovncui.models.connection import Connection
+
+    db = open_db(args)
+    if db.has_connection(args.name):
+        print(f"Error: a connection named '{args.name}' already exists",
+              file=sys.stderr)
+        return 1
+
+    try:
+        connection = Connection(
+            name=args.name,
+            host=args.host,
+            port=args.port,
+            username=args.username,
+            display=args.display,
+            gateway=args.gateway,
+            group=args.group
+        )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if not db.add_connection(connection):
+        # Another instance added it since the check above
+        print(f"Error: a connection named '{args.name}' already exists",
+              file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_remove(args):
+    """Delete a connection."""
+    db = open_db(args)
+    if not db.delete_connection(args.name):
+        print(f"Error: no connection named '{args.name}'", file=sys.stderr)
+        return 1
+    db.history.forget(args.name)
+    return 0
+
+
+def cmd_import(args):
+    """Import connections from ssh_config, CSV/TSV or an inventory."""
+    from turbovncui.utils.importer import import_file
+
+    try:
+        report = import_file(open_db(args), args.path, args.format,
+                             args.dry_run)
+    except (OSError, ValueError, ImportError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(report.summary())
+    for name in report.conflicts:
+        print(f"  name conflict: {name}")
+    return 0
+
+
+def cmd_discover(args):
+    """Scan address ranges for VNC servers, optionally adding them."""
+    from turbovncui.utils.discovery import (
+        SubnetScanner, parse_networks, parse_ports
+    )
+
+    try:
+        networks = parse_networks(" ".join(args.ranges))
+        ports = parse_ports(args.ports)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    scanner = SubnetScanner(args.concurrency, args.rate, args.timeout,
+                            skip_dead_hosts=not args.all_hosts)
+    servers = []
+
+    def on_found(server):
+        servers.append(server)
+        if not args.json:
+            print(f"{server.host}:{server.port}\t{server.server_version}"
+                  f"\t{server.connect_ms:.1f} ms", flush=True)
+
+    try:
+        stats = scanner.scan(networks, ports, on_found)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("Scan interrupted", file=sys.stderr)
+        return 130
+
+    if args.json:
+        json.dump([vars(server) for server in servers], sys.stdout, indent=2)
+        print()
+    print(stats.summary(), file=sys.stderr)
+
+    if args.add and servers:
+        from turbovncui.utils.importer import import_records
+        report = import_records(
+            open_db(args), (server.to_record(args.group) for server in servers)
+        )
+        print(report.summary(), file=sys.stderr)
+    return 0
+
+
+def cmd_probe(args):
+    """Report whether the TurboVNC viewer is available."""
+    launcher = make_launcher(args)
+    result = launcher.probe(refresh=args.refresh)
+    if args.json:
+        json.dump({
+            'path': launcher.get_detected_path(),
+            'available': result.available,
+            'version': result.version,
+            'options': result.options,
+        }, sys.stdout, indent=2)
+        print()
+    else:
+        status = "available" if result.available else "not found"
+        print(f"TurboVNC: {launcher.get_detected_path()} ({status})")
+        if result.version:
+            print(f"Version: {result.version}")
+        if result.options:
+            print(f"Options: {' '.join(result.options)}")
+    return 0 if result.available else 1
+
+
+def build_parser():
+    """Build the argument parser."""
+    parser = argparse.ArgumentParser(
+        prog="turbovncui-cli",
+        description="Manage and launch TurboVNC connections"
+    )
+    parser.add_argument(
+        "--config-dir",
+        help="configuration directory (default: ~/.config/turbovncui)"
+    )
+    parser.add_argument("--viewer", help="path to the vncviewer binary")
+    parser.add_argument(
+        "--trace", metavar="FILE",
+        help="write timing spans to FILE as a Chrome trace"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list connections")
+    list_parser.add_argument("--json", action="store_true",
+                             help="print connections as JSON")
+    list_parser.add_argument("--names", action="store_true",
+                             help="print only connection names")
+    list_parser.add_argument("--recent", action="store_true",
+                             help="list the most used connections first")
+    list_parser.add_argument(
+        "--group", metavar="PATH",
+        help="list only this group and its subgroups (\"\" for ungrouped)"
+    )
+    list_parser.set_defaults(func=cmd_list)
+
+    connect_parser = subparsers.add_parser(
+        "connect", help="launch the viewer for a connection"
+    )
+    connect_parser.add_argument(
+        "name", nargs="?",
+        help="connection name, or text to match (default: most used)"
+    )
+    connect_parser.set_defaults(func=cmd_connect)
+
+    add_parser = subparsers.add_parser("add", help="add a connection")
+    add_parser.add_argument("name")
+    add_parser.add_argument("host")
+    add_parser.add_argument("--port", type=int, default=5900)
+    add_parser.add_argument("--username")
+    add_parser.add_argument("--display")
+    add_parser.add_argument("--gateway", metavar="[USER@]HOST[:PORT]",
+                            help="reach the server through this SSH host")
+    add_parser.add_argument("--group", metavar="PATH",
+                            help="folder to list it in, e.g. site/rack1")
+    add_parser.set_defaults(func=cmd_add)
+
+    remove_parser = subparsers.add_parser("remove",
+                                          help="delete a connection")
+    remove_parser.add_argument("name")
+    remove_parser.set_defaults(func=cmd_remove)
+
+    import_parser = subparsers.add_parser(
+        "import", help="import connections from ssh_config, CSV/TSV or "
+                       "an Ansible INI/YAML inventory"
+    )
+    import_parser.add_argument("path")
+    import_parser.add_argument(
+        "--format", choices=["ssh", "csv", "tsv", "ini", "yaml"],
+        help="file format (default: guess from the file name)"
+    )
+    import_parser.add_argument("--dry-run", action="store_true",
+                               help="report what would be imported")
+    import_parser.set_defaults(func=cmd_import)
+
+    discover_parser = subparsers.add_parser(
+        "discover", help="scan address ranges for VNC servers"
+    )
+    discover_parser.add_argument(
+        "ranges", nargs="+", metavar="RANGE",
+        help="CIDR range or address, e.g. 10.1.0.0/16"
+    )
+    discover_parser.add_argument(
+        "--ports", default="5900-5999",
+        help="ports and port ranges to try (default: 5900-5999)"
+    )
+    discover_parser.add_argument(
+        "--concurrency", type=int, default=512,
+        help="most probes in flight at once (default: 512)"
+    )
+    discover_parser.add_argument(
+        "--rate", type=float, default=2000.0,
+        help="most connects started per second, 0 for no limit "
+             "(default: 2000)"
+    )
+    discover_parser.add_argument(
+        "--timeout", type=float, default=1.0,
+        help="seconds to wait for each server's banner (default: 1)"
+    )
+    discover_parser.add_argument(
+        "--all-hosts", action="store_true",
+        help="try every port on every host, not only on hosts that "
+             "answer the first port"
+    )
+    discover_parser.add_argument("--add", action="store_true",
+                                 help="add the servers found as connections")
+    discover_parser.add_argument(
+        "--group", metavar="PATH", default="Discovered",
+        help="group for added servers (default: Discovered)"
+    )
+    discover_parser.add_argument("--json", action="store_true",
+                                 help="print the servers found as JSON")
+    discover_parser.set_defaults(func=cmd_discover)
+
+    probe_parser = subparsers.add_parser(
+        "probe", help="check the TurboVNC viewer installation"
+    )
+    probe_parser.add_argument("--refresh", action="store_true",
+                              help="ignore the cached probe result")
+    probe_parser.add_argument("--json", action="store_true",
+                              help="print the result as JSON")
+    probe_parser.set_defaults(func=cmd_probe)
+
+    return parser
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    args = build_parser().parse_args(argv)
+    if not args.trace:
+        sys.exit(args.func(args))
+
+    from turbovncui.utils import tracing
+    tracing.enable()
+    try:
+        status = args.func(args)
+    finally:
+        tracing.export_chrome_trace(args.trace)
+    sys.exit(status)
+
+
+if __name__ == "__main__":
+    main()
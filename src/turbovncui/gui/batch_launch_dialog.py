@@ -0,0 +1,134 @@
+from PyQt5.QtWidgets import (
+    QApplication, QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
+    QSpinBox, QDoubleSpinBox, QCheckBox, QPushButton, QProgressBar,
+    QListWidget, QLabel
+)
+from turbovncui.utils.batch_launcher import BatchLauncher, tile_geometries
+from turbovncui.gui.workers import BatchLaunchWorker
+
+
+class BatchLaunchDialog(QDialog):
+    """Launches several connections at once and summarizes the outcome."""
+
+    def __init__(self, parent, vnc_launcher, connections):
+        """Initialize with the launcher and the connections to launch."""
+        super().__init__(parent)
+        self.vnc_launcher = vnc_launcher
+        self.connections = connections
+        self.batch_launcher = None
+        self.worker = None
+        self.failures = 0
+
+        self.setWindowTitle(f"Connect to {len(connections)} Servers")
+        self.setModal(True)
+        self.setMinimumWidth(450)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the user interface."""
+        layout = QVBoxLayout()
+
+        form_layout = QFormLayout()
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 32)
+        self.workers_spin.setValue(4)
+        form_layout.addRow("Parallel launches:", self.workers_spin)
+
+        self.stagger_spin = QDoubleSpinBox()
+        self.stagger_spin.setRange(0.0, 10.0)
+        self.stagger_spin.setSingleStep(0.25)
+        self.stagger_spin.setValue(0.5)
+        self.stagger_spin.setSuffix(" s")
+        form_layout.addRow("Delay between viewers:", self.stagger_spin)
+
+        self.tile_check = QCheckBox("Tile viewer windows across the screen")
+        self.tile_check.setChecked(True)
+        form_layout.addRow(self.tile_check)
+
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, len(self.connections))
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.summary_label = QLabel(
+            f"Ready to launch {len(self.connections)} viewers."
+        )
+        layout.addWidget(self.summary_label)
+
+        self.results_list = QListWidget()
+        layout.addWidget(self.results_list)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+
+        self.start_button = QPushButton("Connect")
+        self.start_button.clicked.connect(self.start)
+        self.start_button.setDefault(True)
+
+        self.close_button = QPushButton("Cancel")
+        self.close_button.clicked.connect(self.reject)
+
+        button_layout.addWidget(self.start_button)
+        button_layout.addWidget(self.close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def start(self):
+        """Start launching in the background."""
+        self.start_button.setEnabled(False)
+        self.workers_spin.setEnabled(False)
+        self.stagger_spin.setEnabled(False)
+        self.tile_check.setEnabled(False)
+
+        geometries = None
+        if self.tile_check.isChecked():
+            area = QApplication.primaryScreen().availableGeometry()
+            geometries = tile_geometries(
+                len(self.connections), area.width(), area.height(),
+                area.x(), area.y()
+            )
+
+        self.batch_launcher = BatchLauncher(
+            self.vnc_launcher,
+            max_workers=self.workers_spin.value(),
+            stagger=self.stagger_spin.value()
+        )
+        self.worker = BatchLaunchWorker(
+            self.batch_launcher, self.connections, geometries, self
+        )
+        self.worker.launch_progress.connect(self.on_launch_progress)
+        self.worker.batch_finished.connect(self.on_batch_finished)
+        self.summary_label.setText("Launching...")
+        self.worker.start()
+
+    def on_launch_progress(self, outcome):
+        """Record one finished launch."""
+        if outcome.ok:
+            self.results_list.addItem(f"{outcome.connection_name}: started")
+        else:
+            self.failures += 1
+            self.results_list.addItem(
+                f"{outcome.connection_name}: FAILED - {outcome.error}"
+            )
+        self.results_list.scrollToBottom()
+        self.progress_bar.setValue(self.progress_bar.value() + 1)
+
+    def on_batch_finished(self, outcomes):
+        """Summarize the batch and let the user close the dialog."""
+        started = sum(1 for outcome in outcomes if outcome.ok)
+        text = f"Started {started} of {len(outcomes)} viewers."
+        if self.failures:
+            text += f" {self.failures} failed."
+        self.summary_label.setText(text)
+        self.close_button.setText("Close")
+
+    def reject(self):
+        """Cancel pending launches before closing."""
+        if self.worker is not None and self.worker.isRunning():
+            self.batch_launcher.cancel()
+            self.worker.wait()
+        super().reject()
@@ -1,18 +1,23 @@
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout,
-    QLineEdit, QSpinBox, QPushButton, QMessageBox
+    QLineEdit, QSpinBox, QPushButton, QMessageBox,
+    QComboBox, QGroupBox, QInputDialog
 )
 from turbovncui.models.connection import Connection
+from turbovncui.models.profile import (
+    ENCODINGS, SUBSAMPLING, PerformanceProfile, PerformanceSettings
+)
 
 
 class ConnectionDialog(QDialog):
     """Dialog for adding or editing VNC connections."""
     
-    def __init__(self, parent=None, connection=None):
+    def __init__(self, parent=None, connection=None, profile_store=None):
         """Initialize dialog with optional existing connection."""
         super().__init__(parent)
         self.connection = connection
         self.is_editing = connection is not None
+        self.profile_store = profile_store
         
         title = "Edit Connection" if self.is_editing else "Add Connection"
         self.setWindowTitle(title)
@@ -55,8 +60,24 @@ class ConnectionDialog(QDialog):
         self.display_edit.setPlaceholderText("Enter display (optional)")
         form_layout.addRow("Display:", self.display_edit)
         
+        # SSH gateway
+        self.gateway_edit = QLineEdit()
+        self.gateway_edit.setPlaceholderText(
+            "user@bastion:22 (optional, tunnels over SSH)"
+        )
+        form_layout.addRow("Gateway:", self.gateway_edit)
+        
+        # Group
+        self.group_edit = QLineEdit()
+        self.group_edit.setPlaceholderText(
+            "site/cluster/rack (optional, folder in the list)"
+        )
+        form_layout.addRow("Group:", self.group_edit)
+        
         layout.addLayout(form_layout)
         
+        layout.addWidget(self.setup_performance_ui())
+        
         # Buttons
         button_layout = QHBoxLayout()
         
@@ -74,7 +95,120 @@ class ConnectionDialog(QDialog):
         self.setLayout(layout)
         
         # Set reasonable size
-        self.resize(400, 200)
+        self.resize(400, 420)
+    
+    def setup_performance_ui(self) -> QGroupBox:
+        """Setup the viewer performance settings group."""
+        group = QGroupBox("Performance")
+        form_layout = QFormLayout(group)
+        
+        # Shared profile
+        self.profile_combo = QComboBox()
+        form_layout.addRow("Profile:", self.profile_combo)
+        self.load_profiles()
+        
+        # Preset
+        self.preset_combo = QComboBox()
+        self.preset_combo.addItem("Viewer defaults", None)
+        self.preset_combo.addItem("LAN", "lan")
+        self.preset_combo.addItem("WAN", "wan")
+        self.preset_combo.addItem("Auto (measure link)", "auto")
+        self.preset_combo.addItem("Custom", "custom")
+        form_layout.addRow("Preset:", self.preset_combo)
+        
+        # Custom settings
+        self.encoding_combo = QComboBox()
+        self.encoding_combo.addItem("Default", None)
+        for encoding in ENCODINGS:
+            self.encoding_combo.addItem(encoding, encoding)
+        form_layout.addRow("Encoding:", self.encoding_combo)
+        
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(0, 100)
+        self.quality_spin.setSpecialValueText("Default")
+        form_layout.addRow("JPEG quality:", self.quality_spin)
+        
+        self.subsampling_combo = QComboBox()
+        self.subsampling_combo.addItem("Default", None)
+        for subsampling in SUBSAMPLING:
+            self.subsampling_combo.addItem(subsampling, subsampling)
+        form_layout.addRow("JPEG subsampling:", self.subsampling_combo)
+        
+        self.compress_spin = QSpinBox()
+        self.compress_spin.setRange(-1, 9)
+        self.compress_spin.setValue(-1)
+        self.compress_spin.setSpecialValueText("Default")
+        form_layout.addRow("Compression level:", self.compress_spin)
+        
+        self.save_profile_button = QPushButton("Save as Profile...")
+        self.save_profile_button.clicked.connect(self.save_as_profile)
+        self.save_profile_button.setEnabled(self.profile_store is not None)
+        form_layout.addRow("", self.save_profile_button)
+        
+        self.profile_combo.currentIndexChanged.connect(
+            self.update_performance_widgets
+        )
+        self.preset_combo.currentIndexChanged.connect(
+            self.update_performance_widgets
+        )
+        self.update_performance_widgets()
+        return group
+    
+    def load_profiles(self, selected=None):
+        """Fill the profile combo box from the profile store."""
+        self.profile_combo.clear()
+        self.profile_combo.addItem("(none)", None)
+        if self.profile_store is not None:
+            for profile in self.profile_store.load_profiles():
+                self.profile_combo.addItem(profile.name, profile.name)
+        if selected is not None:
+            self.select_data(self.profile_combo, selected)
+    
+    def select_data(self, combo, data):
+        """Select the combo box entry with the given data, adding it if new."""
+        index = combo.findData(data)
+        if index < 0:
+            combo.addItem(str(data), data)
+            index = combo.count() - 1
+        combo.setCurrentIndex(index)
+    
+    def update_performance_widgets(self):
+        """Enable only the settings that apply to the current choice."""
+        uses_profile = self.profile_combo.currentData() is not None
+        custom = self.preset_combo.currentData() == "custom"
+        self.preset_combo.setEnabled(not uses_profile)
+        for widget in (self.encoding_combo, self.quality_spin,
+                       self.subsampling_combo, self.compress_spin):
+            widget.setEnabled(custom and not uses_profile)
+    
+    def get_performance_settings(self):
+        """Get the performance settings from the form, or None."""
+        preset = self.preset_combo.currentData()
+        if preset is None:
+            return None
+        if preset != "custom":
+            return PerformanceSettings(preset=preset)
+        
+        quality = self.quality_spin.value()
+        compress_level = self.compress_spin.value()
+        return PerformanceSettings(
+            preset="custom",
+            encoding=self.encoding_combo.currentData(),
+            jpeg_quality=quality or None,
+            jpeg_subsampling=self.subsampling_combo.currentData(),
+            compress_level=None if compress_level < 0 else compress_level
+        )
+    
+    def save_as_profile(self):
+        """Save the current performance settings as a shared profile."""
+        name, ok = QInputDialog.getText(self, "Save Profile", "Profile name:")
+        name = name.strip()
+        if not ok or not name:
+            return
+        
+        settings = self.get_performance_settings() or PerformanceSettings()
+        self.profile_store.save_profile(PerformanceProfile(name, settings))
+        self.load_profiles(selected=name)
     
     def load_connection(self):
         """Load existing connection data into the form."""
@@ -90,6 +224,25 @@ class ConnectionDialog(QDialog):
         
         if self.connection.display:
             self.display_edit.setText(self.connection.display)
+        
+        if self.connection.gateway:
+            self.gateway_edit.setText(self.connection.gateway)
+        
+        if self.connection.group:
+            self.group_edit.setText(self.connection.group)
+        
+        if self.connection.profile:
+            self.select_data(self.profile_combo, self.connection.profile)
+        
+        performance = self.connection.performance
+        if performance:
+            self.select_data(self.preset_combo, performance.preset)
+            self.select_data(self.encoding_combo, performance.encoding)
+            self.quality_spin.setValue(performance.jpeg_quality or 0)
+            self.select_data(self.subsampling_combo,
+                             performance.jpeg_subsampling)
+            if performance.compress_level is not None:
+                self.compress_spin.setValue(performance.compress_level)
     
     def get_connection(self) -> Connection:
         """Get the connection from the form data."""
@@ -98,13 +251,19 @@ class ConnectionDialog(QDialog):
         port = self.port_spin.value()
         username = self.username_edit.text().strip() or None
         display = self.display_edit.text().strip() or None
+        gateway = self.gateway_edit.text().strip() or None
+        group = self.group_edit.text().strip() or None
         
         return Connection(
             name=name,
             host=host,
             port=port,
             username=username,
-            display=display
+            display=display,
+            profile=self.profile_combo.currentData(),
+            performance=self.get_performance_settings(),
+            gateway=gateway,
+            group=group
         )
     
     def accept(self):
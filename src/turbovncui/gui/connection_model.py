@@ -0,0 +1,635 @@
+import bisect
+from typing import Dict, List, Optional
+from PyQt5.QtCore import (
+    QAbstractItemModel, QAbstractListModel, QModelIndex, Qt
+)
+from turbovncui.models.connection import GROUP_SEPARATOR, Connection
+
+
+# Above this many separate row ranges, or this many inserted rows, a diff
+# is applied as a model reset
+MAX_DIFF_RANGES = 64
+MAX_DIFF_ROWS = 10000
+# Connections read from the store per fetchMore() of a tree group
+FETCH_BATCH = 200
+
+
+def _display_text(connection: Connection,
+                  notes: Optional[Dict[str, str]]) -> str:
+    """Text of a connection row, with its annotations after it."""
+    if notes:
+        return f"{connection}   [{', '.join(notes.values())}]"
+    return str(connection)
+
+
+class ConnectionListModel(QAbstractListModel):
+    """List model over the stored connections.
+
+    set_connections() diffs the new list against the current one and emits
+    only the row insert/remove/change signals needed, so the view keeps its
+    selection and scroll position. Display strings are built on demand in
+    data(), so only the rows Qt actually paints cost anything.
+
+    Other parts of the UI can attach short annotations to a row (session
+    state, health, ...) with set_annotation(); they are shown after the
+    connection text.
+    """
+
+    NameRole = Qt.UserRole
+    ConnectionRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        """Initialize an empty model."""
+        super().__init__(parent)
+        self._connections: List[Connection] = []
+        # name -> row, rebuilt lazily after the rows change
+        self._rows: Optional[Dict[str, int]] = {}
+        # name -> {kind: text}
+        self._annotations: Dict[str, Dict[str, str]] = {}
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Number of connections (the model is flat)."""
+        if parent.isValid():
+            return 0
+        return len(self._connections)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return display text, the connection name or the connection."""
+        if not index.isValid() or index.row() >= len(self._connections):
+            return None
+
+        connection = self._connections[index.row()]
+        if role == Qt.DisplayRole:
+            return _display_text(
+                connection, self._annotations.get(connection.name)
+            )
+        if role == self.NameRole:
+            return connection.name
+        if role == self.ConnectionRole:
+            return connection
+        return None
+
+    def connection_at(self, row: int) -> Optional[Connection]:
+        """Get the connection shown in a row."""
+        if 0 <= row < len(self._connections):
+            return self._connections[row]
+        return None
+
+    def row_for_name(self, name: str) -> int:
+        """Get the row of a connection by name, or -1."""
+        if self._rows is None:
+            self._rows = {
+                conn.name: row for row, conn in enumerate(self._connections)
+            }
+        return self._rows.get(name, -1)
+
+    def index_for_name(self, name: str) -> QModelIndex:
+        """Get the model index of a connection by name."""
+        row = self.row_for_name(name)
+        if row < 0:
+            return QModelIndex()
+        return self.index(row)
+
+    def set_annotation(self, name: str, kind: str,
+                       text: Optional[str]) -> None:
+        """Set (or with text=None, clear) one kind of annotation on a row."""
+        notes = self._annotations.setdefault(name, {})
+        if notes.get(kind) == text:
+            return
+        if text:
+            notes[kind] = text
+        else:
+            notes.pop(kind, None)
+
+        row = self.row_for_name(name)
+        if row >= 0:
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+    def set_connections(self, connections: List[Connection]) -> None:
+        """Replace the model contents, emitting fine-grained row signals."""
+        new_names = [conn.name for conn in connections]
+        new_set = set(new_names)
+        old_set = {conn.name for conn in self._connections}
+
+        # Remove rows that are gone, bottom-up so row numbers stay valid
+        removed = _ranges([
+            row for row, conn in enumerate(self._connections)
+            if conn.name not in new_set
+        ])
+        survivors = len(self._connections) - sum(
+            last - first + 1 for first, last in removed
+        )
+        if (len(removed) > MAX_DIFF_RANGES or
+                len(connections) - survivors > MAX_DIFF_ROWS):
+            # Scattered changes (e.g. applying a search filter) are cheaper
+            # for the view as one reset than as thousands of signals
+            self._reset(connections)
+            return
+        self._reindex()
+        for first, last in reversed(removed):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._connections[first:last + 1]
+            self.endRemoveRows()
+
+        # The survivors must already be in the new order, otherwise reset
+        kept = [name for name in new_names if name in old_set]
+        inserted = _ranges([
+            row for row, name in enumerate(new_names) if name not in old_set
+        ])
+        if ([conn.name for conn in self._connections] != kept or
+                len(inserted) > MAX_DIFF_RANGES):
+            self._reset(connections)
+            return
+
+        # Insert new rows top-down at their final positions
+        for first, last in inserted:
+            self.beginInsertRows(QModelIndex(), first, last)
+            self._connections[first:first] = connections[first:last + 1]
+            self.endInsertRows()
+
+        # Everything lines up now; report rows whose contents changed
+        changed = []
+        for row, conn in enumerate(connections):
+            if self._connections[row] is not conn:
+                if self._connections[row] != conn:
+                    changed.append(row)
+                self._connections[row] = conn
+        for first, last in _ranges(changed):
+            self.dataChanged.emit(self.index(first), self.index(last))
+
+        self._reindex()
+
+    def _reset(self, connections: List[Connection]) -> None:
+        """Replace the model contents with a full reset."""
+        self.beginResetModel()
+        self._connections = list(connections)
+        self._reindex()
+        self.endResetModel()
+
+    def _reindex(self) -> None:
+        """Forget the name -> row map; row_for_name() rebuilds it."""
+        self._rows = None
+
+
+class _GroupNode:
+    """One folder of the connection tree."""
+
+    __slots__ = ('path', 'label', 'parent', 'row', 'groups', 'direct',
+                 'total', 'fetched', 'connections', 'positions')
+
+    def __init__(self, path: str, parent: Optional['_GroupNode']):
+        """Initialize an empty group; counts are filled in by the model."""
+        self.path = path
+        self.label = path.rsplit(GROUP_SEPARATOR, 1)[-1]
+        self.parent = parent
+        # Row of this group under its parent
+        self.row = 0
+        self.groups: List['_GroupNode'] = []
+        # Connections directly in the group, and in it and its subgroups
+        self.direct = 0
+        self.total = 0
+        # How many of the direct connections were read from the store
+        self.fetched = 0
+        self.connections: List[Connection] = []
+        # name -> position in connections
+        self.positions: Dict[str, int] = {}
+
+
+class ConnectionTreeModel(QAbstractItemModel):
+    """Tree model of the stored connections, one folder per group path.
+
+    reload() builds the folders from the store's per-group counts, so the
+    number shown on every folder is known without reading a connection.
+    The connections of a folder are only read, FETCH_BATCH at a time
+    through canFetchMore()/fetchMore(), once the view expands it and
+    scrolls them into sight; a collapsed group costs one node however
+    many hosts it holds.
+
+    Under each folder its subgroups come first, then its connections.
+    The root can also start with a few pinned connections (the most
+    used), which then aren't repeated among the ungrouped ones.
+    Annotations work as in ConnectionListModel.
+    """
+
+    NameRole = ConnectionListModel.NameRole
+    GroupRole = Qt.UserRole + 1
+    ConnectionRole = ConnectionListModel.ConnectionRole
+
+    def __init__(self, db, parent=None):
+        """Initialize an empty model over a connection database."""
+        super().__init__(parent)
+        self.db = db
+        self._root = _GroupNode("", None)
+        # path -> group node, "" being the root
+        self._nodes: Dict[str, _GroupNode] = {"": self._root}
+        self._pinned: List[Connection] = []
+        self._pinned_names: Dict[str, int] = {}
+        # name -> group whose fetched rows include it
+        self._fetched: Dict[str, _GroupNode] = {}
+        # name -> {kind: text}
+        self._annotations: Dict[str, Dict[str, str]] = {}
+
+    def reload(self, pinned: Optional[List[Connection]] = None) -> None:
+        """Bring the folders and fetched rows up to date with the store.
+
+        Like ConnectionListModel.set_connections(), only the row insert,
+        remove and change signals needed are emitted, group by group, so
+        views keep their selection, scroll position and open groups. The
+        rows already fetched in a group are read again. A first load, or
+        many groups coming and going at once, is done as a model reset.
+        """
+        counts = self.db.group_counts()
+        pinned = list(pinned or [])
+        paths = set()
+        for path in counts:
+            while path and path not in paths:
+                paths.add(path)
+                path = path.rpartition(GROUP_SEPARATOR)[0]
+        old_paths = set(self._nodes) - {""}
+        if (self._row_count(self._root) == 0 or
+                len(paths ^ old_paths) > MAX_DIFF_RANGES):
+            self._rebuild(counts, pinned)
+            return
+
+        self._set_pinned(pinned)
+        # Parents before their subgroups, which go along with them
+        for path in sorted(old_paths - paths, key=len):
+            if path in self._nodes:
+                self._remove_group(self._nodes[path])
+        for path in sorted(paths - old_paths, key=len):
+            self._insert_group(path)
+
+        totals = dict.fromkeys(self._nodes, 0)
+        for path, count in counts.items():
+            node = self._nodes[path]
+            while node is not None:
+                totals[node.path] += count
+                node = node.parent
+        for node in list(self._nodes.values()):
+            node.direct = counts.get(node.path, 0)
+            if node.total != totals[node.path]:
+                node.total = totals[node.path]
+                if node is not self._root:
+                    index = self.index_for_group(node.path)
+                    self.dataChanged.emit(index, index, [Qt.DisplayRole])
+            if node.fetched:
+                self._refetch(node)
+
+        self._fetched = {
+            name: node for node in self._nodes.values()
+            for name in node.positions
+        }
+
+    def _rebuild(self, counts: Dict[str, int],
+                 pinned: List[Connection]) -> None:
+        """Rebuild the folders from group counts, forgetting fetched rows."""
+        root = _GroupNode("", None)
+        nodes = {"": root}
+        for path, count in counts.items():
+            node = self._make_node(nodes, path)
+            node.direct = count
+            while node is not None:
+                node.total += count
+                node = node.parent
+
+        for node in nodes.values():
+            node.groups.sort(key=lambda group: group.label.lower())
+            offset = len(pinned) if node is root else 0
+            for row, group in enumerate(node.groups):
+                group.row = offset + row
+
+        self.beginResetModel()
+        self._root = root
+        self._nodes = nodes
+        self._pinned = pinned
+        self._pinned_names = {
+            connection.name: row for row, connection in enumerate(pinned)
+        }
+        self._fetched = {}
+        self.endResetModel()
+
+    def _set_pinned(self, pinned: List[Connection]) -> None:
+        """Replace the pinned rows at the top of the root."""
+        if [c.name for c in pinned] == [c.name for c in self._pinned]:
+            for row, connection in enumerate(pinned):
+                if self._pinned[row] != connection:
+                    index = self.createIndex(row, 0, self._root)
+                    self.dataChanged.emit(index, index)
+            self._pinned = pinned
+            return
+
+        if self._pinned:
+            self.beginRemoveRows(QModelIndex(), 0, len(self._pinned) - 1)
+            self._pinned = []
+            self._pinned_names = {}
+            self._renumber(self._root)
+            self.endRemoveRows()
+        if pinned:
+            self.beginInsertRows(QModelIndex(), 0, len(pinned) - 1)
+            self._pinned = pinned
+            self._pinned_names = {
+                connection.name: row for row, connection in enumerate(pinned)
+            }
+            self._renumber(self._root)
+            self.endInsertRows()
+
+    def _renumber(self, node: _GroupNode) -> None:
+        """Recompute the rows of a group's subgroups."""
+        offset = self._offset(node)
+        for row, group in enumerate(node.groups):
+            group.row = offset + row
+
+    def _remove_group(self, node: _GroupNode) -> None:
+        """Remove a group and everything under it."""
+        parent = node.parent
+        self.beginRemoveRows(
+            self.index_for_group(parent.path), node.row, node.row
+        )
+        del parent.groups[node.row - self._offset(parent)]
+        self._renumber(parent)
+        stack = [node]
+        while stack:
+            gone = stack.pop()
+            del self._nodes[gone.path]
+            stack.extend(gone.groups)
+        self.endRemoveRows()
+
+    def _insert_group(self, path: str) -> None:
+        """Add an empty group in label order; its parent must exist."""
+        parent = self._nodes[path.rpartition(GROUP_SEPARATOR)[0]]
+        node = _GroupNode(path, parent)
+        position = bisect.bisect(
+            [group.label.lower() for group in parent.groups],
+            node.label.lower()
+        )
+        row = self._offset(parent) + position
+        self.beginInsertRows(self.index_for_group(parent.path), row, row)
+        parent.groups.insert(position, node)
+        self._nodes[path] = node
+        self._renumber(parent)
+        self.endInsertRows()
+
+    def _refetch(self, node: _GroupNode) -> None:
+        """Read a group's fetched rows again and apply the differences."""
+        connections = self.db.query_group(node.path, 0, node.fetched)
+        node.fetched = len(connections)
+        if node is self._root:
+            connections = [
+                c for c in connections if c.name not in self._pinned_names
+            ]
+
+        parent = self.index_for_group(node.path)
+        base = self._first_connection_row(node)
+        new_names = {conn.name for conn in connections}
+        removed = _ranges([
+            row for row, conn in enumerate(node.connections)
+            if conn.name not in new_names
+        ])
+        for first, last in reversed(removed):
+            self.beginRemoveRows(parent, base + first, base + last)
+            del node.connections[first:last + 1]
+            self.endRemoveRows()
+
+        old_names = {conn.name for conn in node.connections}
+        kept = [conn.name for conn in connections if conn.name in old_names]
+        if [conn.name for conn in node.connections] != kept:
+            # Reordered; replace the group's rows rather than move them
+            self.beginRemoveRows(
+                parent, base, base + len(node.connections) - 1
+            )
+            node.connections = []
+            self.endRemoveRows()
+            old_names = set()
+
+        for first, last in _ranges([
+            row for row, conn in enumerate(connections)
+            if conn.name not in old_names
+        ]):
+            self.beginInsertRows(parent, base + first, base + last)
+            node.connections[first:first] = connections[first:last + 1]
+            self.endInsertRows()
+
+        changed = []
+        for row, conn in enumerate(connections):
+            if node.connections[row] is not conn:
+                if node.connections[row] != conn:
+                    changed.append(row)
+                node.connections[row] = conn
+        for first, last in _ranges(changed):
+            self.dataChanged.emit(
+                self.createIndex(base + first, 0, node),
+                self.createIndex(base + last, 0, node)
+            )
+        node.positions = {
+            conn.name: row for row, conn in enumerate(node.connections)
+        }
+
+    def _make_node(self, nodes: Dict[str, _GroupNode],
+                   path: str) -> _GroupNode:
+        """Get the node for a group path, creating it and its parents."""
+        node = nodes.get(path)
+        if node is None:
+            parent_path = path.rpartition(GROUP_SEPARATOR)[0]
+            parent = self._make_node(nodes, parent_path)
+            node = nodes[path] = _GroupNode(path, parent)
+            parent.groups.append(node)
+        return node
+
+    def _offset(self, node: _GroupNode) -> int:
+        """Number of pinned rows before a group's subgroups."""
+        return len(self._pinned) if node is self._root else 0
+
+    def _first_connection_row(self, node: _GroupNode) -> int:
+        """Row of a group's first (non-pinned) connection."""
+        return self._offset(node) + len(node.groups)
+
+    def _group_at(self, index: QModelIndex) -> Optional[_GroupNode]:
+        """The group an index points at (the root if invalid), or None."""
+        if not index.isValid():
+            return self._root
+        node = index.internalPointer()
+        row = index.row() - self._offset(node)
+        if 0 <= row < len(node.groups):
+            return node.groups[row]
+        return None
+
+    def _connection_at(self, index: QModelIndex) -> Optional[Connection]:
+        """The connection an index points at, or None for a group."""
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        row = index.row()
+        if row < self._offset(node):
+            return self._pinned[row]
+        row -= self._first_connection_row(node)
+        if 0 <= row < len(node.connections):
+            return node.connections[row]
+        return None
+
+    def index(self, row: int, column: int = 0,
+              parent=QModelIndex()) -> QModelIndex:
+        """Index of a row under a parent; it points at the parent's node."""
+        node = self._group_at(parent)
+        if (node is None or column != 0 or
+                not 0 <= row < self._row_count(node)):
+            return QModelIndex()
+        return self.createIndex(row, 0, node)
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        """Index of the group a row is in."""
+        if not index.isValid():
+            return QModelIndex()
+        node = index.internalPointer()
+        if node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+
+    def _row_count(self, node: _GroupNode) -> int:
+        """Rows under a group, counting only fetched connections."""
+        return self._first_connection_row(node) + len(node.connections)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        """Number of rows fetched so far under a group."""
+        if parent.column() > 0:
+            return 0
+        node = self._group_at(parent)
+        return self._row_count(node) if node is not None else 0
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        """The tree has a single column."""
+        return 1
+
+    def hasChildren(self, parent=QModelIndex()) -> bool:
+        """Groups have rows even before any were fetched."""
+        node = self._group_at(parent)
+        return node is not None and (node is self._root or node.total > 0)
+
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        """Whether a group has connections left to read from the store."""
+        node = self._group_at(parent)
+        return node is not None and node.fetched < node.direct
+
+    def fetchMore(self, parent: QModelIndex) -> None:
+        """Read the next batch of a group's connections from the store."""
+        node = self._group_at(parent)
+        if node is None or node.fetched >= node.direct:
+            return
+        batch = self.db.query_group(node.path, node.fetched, FETCH_BATCH)
+        if not batch:
+            # The store shrank since reload(); a reload is on its way
+            node.fetched = node.direct
+            return
+        node.fetched += len(batch)
+        if node is self._root:
+            batch = [c for c in batch if c.name not in self._pinned_names]
+            if not batch:
+                return
+
+        first = self._row_count(node)
+        self.beginInsertRows(parent, first, first + len(batch) - 1)
+        for connection in batch:
+            node.positions[connection.name] = len(node.connections)
+            node.connections.append(connection)
+            self._fetched[connection.name] = node
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        """Return display text, a connection (or its name) or a group path."""
+        if not index.isValid():
+            return None
+
+        connection = self._connection_at(index)
+        if connection is not None:
+            if role == Qt.DisplayRole:
+                return _display_text(
+                    connection, self._annotations.get(connection.name)
+                )
+            if role == self.NameRole:
+                return connection.name
+            if role == self.ConnectionRole:
+                return connection
+            return None
+
+        group = self._group_at(index)
+        if group is None:
+            return None
+        if role == Qt.DisplayRole:
+            return f"{group.label} ({group.total})"
+        if role == self.GroupRole:
+            return group.path
+        return None
+
+    def group_paths(self) -> List[str]:
+        """Paths of all groups in the tree."""
+        return [path for path in self._nodes if path]
+
+    def index_for_group(self, path: str) -> QModelIndex:
+        """Get the model index of a group by path."""
+        node = self._nodes.get(path)
+        if node is None or node is self._root:
+            return QModelIndex()
+        return self.createIndex(node.row, 0, node.parent)
+
+    def index_for_name(self, name: str) -> QModelIndex:
+        """Get the model index of a connection by name.
+
+        A pinned row is preferred. Otherwise the connection's group is
+        fetched up to its row, so a view can scroll to it.
+        """
+        row = self._pinned_names.get(name)
+        if row is not None:
+            return self.createIndex(row, 0, self._root)
+
+        node = self._fetched.get(name)
+        if node is None:
+            connection = self.db.get_connection_by_name(name)
+            if connection is None:
+                return QModelIndex()
+            node = self._nodes.get(connection.group or "")
+            if node is None:
+                return QModelIndex()
+            parent = self.index_for_group(node.path)
+            while name not in node.positions and self.canFetchMore(parent):
+                self.fetchMore(parent)
+        position = node.positions.get(name)
+        if position is None:
+            return QModelIndex()
+        return self.createIndex(
+            self._first_connection_row(node) + position, 0, node
+        )
+
+    def set_annotation(self, name: str, kind: str,
+                       text: Optional[str]) -> None:
+        """Set (or with text=None, clear) one kind of annotation on a row."""
+        notes = self._annotations.setdefault(name, {})
+        if notes.get(kind) == text:
+            return
+        if text:
+            notes[kind] = text
+        else:
+            notes.pop(kind, None)
+
+        indexes = []
+        row = self._pinned_names.get(name)
+        if row is not None:
+            indexes.append(self.createIndex(row, 0, self._root))
+        node = self._fetched.get(name)
+        if node is not None:
+            indexes.append(self.createIndex(
+                self._first_connection_row(node) + node.positions[name],
+                0, node
+            ))
+        for index in indexes:
+            self.dataChanged.emit(index, index, [Qt.DisplayRole])
+
+
+def _ranges(rows: List[int]) -> List[tuple]:
+    """Collapse sorted row numbers into (first, last) runs."""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1] = (ranges[-1][0], row)
+        else:
+            ranges.append((row, row))
+    return ranges
@@ -0,0 +1,230 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, QSpinBox,
+    QDoubleSpinBox, QCheckBox, QPushButton, QProgressBar, QLabel,
+    QTableWidget, QTableWidgetItem, QHeaderView, QMessageBox
+)
+from PyQt5.QtCore import Qt
+from turbovncui.utils.discovery import (
+    DEFAULT_PORTS, SubnetScanner, parse_networks, parse_ports
+)
+from turbovncui.utils.importer import import_records
+from turbovncui.gui.workers import DiscoveryWorker
+
+
+class DiscoveryDialog(QDialog):
+    """Scans address ranges for VNC servers and adds the chosen ones.
+
+    Servers show up in the table as they answer. New ones are checked;
+    ones already saved (same host and port) are listed unchecked. "Add
+    Checked" stores all checked servers with a single write.
+    """
+
+    def __init__(self, parent, db):
+        """Initialize with the database to add servers to."""
+        super().__init__(parent)
+        self.db = db
+        self.scanner = None
+        self.worker = None
+        self.servers = []
+        # Connections added while the dialog was open
+        self.added = 0
+        self.saved = {
+            (connection.host.lower(), connection.port)
+            for connection in db.load_connections()
+        }
+
+        self.setWindowTitle("Discover VNC Servers")
+        self.setModal(True)
+        self.resize(600, 500)
+        self.setup_ui()
+
+    def setup_ui(self):
+        """Setup the user interface."""
+        layout = QVBoxLayout()
+
+        form_layout = QFormLayout()
+
+        self.networks_edit = QLineEdit()
+        self.networks_edit.setPlaceholderText("e.g. 10.1.0.0/16, 192.168.1.20")
+        form_layout.addRow("Addresses:", self.networks_edit)
+
+        self.ports_edit = QLineEdit(DEFAULT_PORTS)
+        form_layout.addRow("Ports:", self.ports_edit)
+
+        self.concurrency_spin = QSpinBox()
+        self.concurrency_spin.setRange(1, 4096)
+        self.concurrency_spin.setValue(512)
+        form_layout.addRow("Parallel probes:", self.concurrency_spin)
+
+        self.rate_spin = QSpinBox()
+        self.rate_spin.setRange(0, 100000)
+        self.rate_spin.setSingleStep(500)
+        self.rate_spin.setValue(2000)
+        self.rate_spin.setSpecialValueText("Unlimited")
+        self.rate_spin.setSuffix(" /s")
+        form_layout.addRow("Connects per second:", self.rate_spin)
+
+        self.timeout_spin = QDoubleSpinBox()
+        self.timeout_spin.setRange(0.1, 30.0)
+        self.timeout_spin.setSingleStep(0.5)
+        self.timeout_spin.setValue(1.0)
+        self.timeout_spin.setSuffix(" s")
+        form_layout.addRow("Probe timeout:", self.timeout_spin)
+
+        self.skip_dead_check = QCheckBox(
+            "Only try more ports on hosts that answer the first one"
+        )
+        self.skip_dead_check.setChecked(True)
+        form_layout.addRow(self.skip_dead_check)
+
+        self.group_edit = QLineEdit("Discovered")
+        self.group_edit.setPlaceholderText(
+            "Group for added servers (optional)"
+        )
+        form_layout.addRow("Add to group:", self.group_edit)
+
+        layout.addLayout(form_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setValue(0)
+        layout.addWidget(self.progress_bar)
+
+        self.summary_label = QLabel("Enter address ranges to scan.")
+        layout.addWidget(self.summary_label)
+
+        self.results_table = QTableWidget(0, 4)
+        self.results_table.setHorizontalHeaderLabels(
+            ["Server", "Version", "Connect (ms)", "Status"]
+        )
+        self.results_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.results_table)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+
+        self.scan_button = QPushButton("Scan")
+        self.scan_button.clicked.connect(self.toggle_scan)
+        self.scan_button.setDefault(True)
+
+        self.add_button = QPushButton("Add Checked")
+        self.add_button.clicked.connect(self.add_checked)
+        self.add_button.setEnabled(False)
+
+        self.close_button = QPushButton("Close")
+        self.close_button.clicked.connect(self.reject)
+
+        button_layout.addWidget(self.scan_button)
+        button_layout.addWidget(self.add_button)
+        button_layout.addWidget(self.close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def toggle_scan(self):
+        """Start a scan, or stop the running one."""
+        if self.worker is not None and self.worker.isRunning():
+            self.scanner.cancel()
+            self.scan_button.setEnabled(False)
+            return
+
+        try:
+            networks = parse_networks(self.networks_edit.text())
+            ports = parse_ports(self.ports_edit.text())
+        except ValueError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+
+        self.scanner = SubnetScanner(
+            concurrency=self.concurrency_spin.value(),
+            rate=self.rate_spin.value(),
+            timeout=self.timeout_spin.value(),
+            skip_dead_hosts=self.skip_dead_check.isChecked()
+        )
+        self.worker = DiscoveryWorker(self.scanner, networks, ports, self)
+        self.worker.server_found.connect(self.on_server_found)
+        self.worker.scan_progress.connect(self.on_scan_progress)
+        self.worker.scan_finished.connect(self.on_scan_finished)
+        self.worker.scan_failed.connect(self.on_scan_failed)
+
+        self.servers = []
+        self.results_table.setRowCount(0)
+        self.progress_bar.setValue(0)
+        self.summary_label.setText("Scanning...")
+        self.scan_button.setText("Stop")
+        self.add_button.setEnabled(False)
+        self.worker.start()
+
+    def on_server_found(self, server):
+        """Add a server to the table as soon as it answers."""
+        known = (server.host.lower(), server.port) in self.saved
+        row = self.results_table.rowCount()
+        self.results_table.insertRow(row)
+
+        item = QTableWidgetItem(f"{server.host}:{server.port}")
+        item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+        item.setCheckState(Qt.Unchecked if known else Qt.Checked)
+        self.results_table.setItem(row, 0, item)
+        self.results_table.setItem(
+            row, 1, QTableWidgetItem(server.server_version)
+        )
+        self.results_table.setItem(
+            row, 2, QTableWidgetItem(f"{server.connect_ms:.1f}")
+        )
+        self.results_table.setItem(
+            row, 3, QTableWidgetItem("saved" if known else "new")
+        )
+        self.servers.append(server)
+        self.add_button.setEnabled(True)
+
+    def on_scan_progress(self, done, total):
+        """Show how far the scan has got."""
+        self.progress_bar.setMaximum(max(total, 1))
+        self.progress_bar.setValue(done)
+        self.summary_label.setText(
+            f"Scanning... {done} of {total} probes, "
+            f"{len(self.servers)} servers found"
+        )
+
+    def on_scan_finished(self, stats):
+        """Summarize the scan."""
+        self.summary_label.setText(stats.summary() + ".")
+        self.scan_finished()
+
+    def on_scan_failed(self, message):
+        """Report a scan that couldn't run."""
+        self.summary_label.setText(f"Scan failed: {message}")
+        self.scan_finished()
+
+    def scan_finished(self):
+        """Let the user start another scan."""
+        self.scan_button.setText("Scan")
+        self.scan_button.setEnabled(True)
+
+    def add_checked(self):
+        """Add every checked server with one write to the database."""
+        group = self.group_edit.text().strip() or None
+        rows = [
+            row for row in range(self.results_table.rowCount())
+            if self.results_table.item(row, 0).checkState() == Qt.Checked
+        ]
+        report = import_records(
+            self.db, (self.servers[row].to_record(group) for row in rows)
+        )
+        self.added += report.added
+
+        for row in rows:
+            server = self.servers[row]
+            self.saved.add((server.host.lower(), server.port))
+            self.results_table.item(row, 0).setCheckState(Qt.Unchecked)
+            self.results_table.item(row, 3).setText("saved")
+        self.summary_label.setText(report.summary() + ".")
+
+    def reject(self):
+        """Stop a running scan before closing."""
+        if self.worker is not None and self.worker.isRunning():
+            self.scanner.cancel()
+            self.worker.wait()
+        super().reject()
@@ -0,0 +1,66 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtNetwork import QAbstractSocket, QLocalServer
+from turbovncui.utils.instance import (
+    forward_request, parse_request, socket_path
+)
+
+
+class InstanceServer(QObject):
+    """Accepts requests from later invocations of the app.
+
+    Listens on the per-user socket from utils.instance; each client sends
+    one JSON request line, gets "ok" back and is disconnected. Requests
+    arrive on the GUI thread through request_received.
+    """
+
+    request_received = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        """Initialize the server; call listen() to start accepting."""
+        super().__init__(parent)
+        # No socket options: with them Qt binds elsewhere and renames the
+        # socket into place, silently replacing a running instance's
+        self.server = QLocalServer(self)
+        self.server.newConnection.connect(self.accept_connections)
+
+    def listen(self, request: dict) -> bool:
+        """Start listening, unless another instance already is.
+
+        Two apps started at the same moment can both miss each other
+        before either listens; the loser forwards `request` to the winner
+        and returns False.
+        """
+        path = socket_path()
+        if self.server.listen(path):
+            return True
+        if self.server.serverError() == QAbstractSocket.AddressInUseError:
+            if forward_request(request):
+                return False
+            # Left behind by an instance that crashed
+            QLocalServer.removeServer(path)
+            if self.server.listen(path):
+                return True
+        print(f"Warning: single-instance socket unavailable: "
+              f"{self.server.errorString()}")
+        return True
+
+    def accept_connections(self):
+        """Read requests from newly connected clients."""
+        while self.server.hasPendingConnections():
+            client = self.server.nextPendingConnection()
+            client.readyRead.connect(
+                lambda client=client: self.read_request(client)
+            )
+            client.disconnected.connect(client.deleteLater)
+            self.read_request(client)
+
+    def read_request(self, client):
+        """Handle a client's request line once it has fully arrived."""
+        if not client.canReadLine():
+            return
+        request = parse_request(bytes(client.readLine()))
+        client.write(b"ok\n" if request is not None else b"error\n")
+        client.flush()
+        client.disconnectFromServer()
+        if request is not None:
+            self.request_received.emit(request)
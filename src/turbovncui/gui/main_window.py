@@ -1,26 +1,63 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QVBoxLayout, QHBoxLayout, QWidget,
-    QPushButton, QListWidget, QListWidgetItem, QMessageBox,
-    QLabel
+    QPushButton, QTreeView, QMessageBox, QLabel, QLineEdit,
+    QAbstractItemView, QFileDialog, QShortcut
 )
-from PyQt5.QtCore import Qt
-from turbovncui.utils.database import ConnectionDatabase
-from turbovncui.utils.vnc_launcher import VNCLaucher
+from PyQt5.QtCore import QFileSystemWatcher, QPoint, QTimer, Qt
+from PyQt5.QtGui import QKeySequence
+from turbovncui.utils.database import open_database
+from turbovncui.utils.history import resolve_connection
+from turbovncui.utils.vnc_launcher import VNCLaucher, default_cache_dir
+from turbovncui.utils.health import HealthMonitor
+from turbovncui.utils.thumbnails import ThumbnailCache, ThumbnailRefresher
+from turbovncui.utils.importer import detect_format
+from turbovncui.utils import tracing
 from turbovncui.gui.connection_dialog import ConnectionDialog
+from turbovncui.gui.connection_model import (
+    ConnectionListModel, ConnectionTreeModel
+)
 from turbovncui.gui.about_dialog import AboutDialog
+from turbovncui.gui.batch_launch_dialog import BatchLaunchDialog
+from turbovncui.gui.discovery_dialog import DiscoveryDialog
+from turbovncui.gui.performance_dialog import PerformanceDialog
+from turbovncui.gui.thumbnail_delegate import ThumbnailDelegate
+from turbovncui.gui.workers import (
+    HealthWorker, ImportWorker, LaunchWorker, ProbeWorker,
+    SearchIndexWorker, ThumbnailWorker
+)
 import turbovncui
 
 
+# Most used connections pinned to the top of the unfiltered list
+MOST_USED_ROWS = 5
+# Seconds between rounds of thumbnail grabs; see ThumbnailRefresher
+THUMBNAIL_ROUND_INTERVAL = 60
+
+
 class MainWindow(QMainWindow):
     """Main application window."""
     
     def __init__(self):
         """Initialize the main window."""
         super().__init__()
-        self.db = ConnectionDatabase()
+        self.db = open_database()
         self.vnc_launcher = VNCLaucher()
+        self.health_monitor = HealthMonitor()
+        self.health_worker = None
+        self.thumbnail_cache = ThumbnailCache(default_cache_dir())
+        self.thumbnail_refresher = ThumbnailRefresher(
+            self.thumbnail_cache, self.health_monitor
+        )
+        self.thumbnail_worker = None
+        # Launches whose tunnel or link probe is still being set up
+        self.launch_workers = []
+        self.search_index = None
+        self.search_index_worker = None
+        self.import_worker = None
         self.connections = []
         self.last_connection = None
+        # Paths of the groups open in the tree, kept across reloads
+        self.expanded_groups = set()
         
         self.setup_ui()
         self.load_connections()
@@ -45,9 +82,36 @@ class MainWindow(QMainWindow):
         )
         layout.addWidget(title_label)
         
-        # Connection list
-        self.connection_list = QListWidget()
-        self.connection_list.itemDoubleClicked.connect(self.connect_to_double_clicked)
+        # Search box
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText(
+            "Search by name, host or username"
+        )
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self.apply_filter)
+        layout.addWidget(self.search_edit)
+        
+        # Connection list: grouped in a tree, or flat search results
+        self.connection_model = ConnectionListModel(self)
+        self.connection_tree_model = ConnectionTreeModel(self.db, self)
+        self.connection_list = QTreeView()
+        self.connection_list.setModel(self.connection_tree_model)
+        self.connection_list.setHeaderHidden(True)
+        self.connection_list.setUniformRowHeights(True)
+        self.connection_list.setItemDelegate(
+            ThumbnailDelegate(self.thumbnail_cache, self.connection_list)
+        )
+        self.connection_list.setSelectionMode(
+            QAbstractItemView.ExtendedSelection
+        )
+        self.connection_list.doubleClicked.connect(
+            self.connect_to_double_clicked
+        )
+        self.connection_list.expanded.connect(self.on_group_expanded)
+        self.connection_list.collapsed.connect(self.on_group_collapsed)
+        self.connection_list.verticalScrollBar().valueChanged.connect(
+            self.fetch_visible_rows
+        )
         layout.addWidget(self.connection_list)
         
         # Button layout
@@ -58,6 +122,16 @@ class MainWindow(QMainWindow):
         self.add_button.clicked.connect(self.add_connection)
         button_layout.addWidget(self.add_button)
         
+        # Import button
+        self.import_button = QPushButton("Import...")
+        self.import_button.clicked.connect(self.import_connections)
+        button_layout.addWidget(self.import_button)
+        
+        # Discover button
+        self.discover_button = QPushButton("Discover...")
+        self.discover_button.clicked.connect(self.discover_servers)
+        button_layout.addWidget(self.discover_button)
+        
         # Edit button
         self.edit_button = QPushButton("Edit Connection")
         self.edit_button.clicked.connect(self.edit_selected_connection)
@@ -83,128 +157,615 @@ class MainWindow(QMainWindow):
         
         layout.addLayout(button_layout)
         
+        # Hidden performance panel for diagnosing slow operations
+        self.performance_shortcut = QShortcut(
+            QKeySequence("Ctrl+Shift+P"), self
+        )
+        self.performance_shortcut.activated.connect(self.show_performance)
+        
         # Status bar
         self.update_turbovnc_status()
+        
+        self.sessions_label = QLabel()
+        self.statusBar().addPermanentWidget(self.sessions_label)
+        
+        # Refresh viewer session state from the supervisor
+        self.announced_sessions = set()
+        self.memory_warnings = set()
+        self.launch_stats_version = None
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self.update_session_status)
+        self.session_timer.start(1000)
+        
+        # Periodically check which servers are up
+        self.health_timer = QTimer(self)
+        self.health_timer.timeout.connect(self.check_health)
+        self.health_timer.start(int(
+            (self.health_monitor.ttl + self.health_monitor.timeout) * 1000
+        ))
+        QTimer.singleShot(0, self.check_health)
+        
+        # Take server thumbnails a few at a time, rows in view first; the
+        # first round waits for the health check so down servers are
+        # skipped, but the cache is indexed right away
+        self.refresh_thumbnails(grab=False)
+        self.thumbnail_timer = QTimer(self)
+        self.thumbnail_timer.timeout.connect(self.refresh_thumbnails)
+        self.thumbnail_timer.start(THUMBNAIL_ROUND_INTERVAL * 1000)
+        QTimer.singleShot(
+            int((self.health_monitor.timeout + 1) * 1000),
+            self.refresh_thumbnails
+        )
+        
+        # Follow changes other running instances make to the store
+        self.store_watcher = QFileSystemWatcher(self)
+        self.store_watcher.fileChanged.connect(self.on_store_changed)
+        self.store_watcher.directoryChanged.connect(self.on_store_changed)
+        self.watch_store()
+        # A save touches several files; handle the burst once
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(100)
+        self.reload_timer.timeout.connect(self.reload_if_changed)
     
     def update_turbovnc_status(self):
-        """Update the status bar with TurboVNC detection info."""
+        """Probe TurboVNC in the background and report it in the status bar."""
         turbovnc_path = self.vnc_launcher.get_detected_path()
+        self.statusBar().showMessage(f"Checking TurboVNC: {turbovnc_path}")
+        
+        # Add version label to the right side of status bar
+        version_label = QLabel(f"v{turbovncui.__version__}")
+        self.statusBar().addPermanentWidget(version_label)
         
-        # Test if TurboVNC is available
-        if self.vnc_launcher.is_turbovnc_available():
+        self.probe_worker = ProbeWorker(self.vnc_launcher, self)
+        self.probe_worker.probe_finished.connect(self.on_probe_finished)
+        self.probe_worker.start()
+    
+    def on_probe_finished(self, result):
+        """Show the TurboVNC probe result in the status bar."""
+        turbovnc_path = self.vnc_launcher.get_detected_path()
+        if result.available:
             status_message = f"Ready - TurboVNC: {turbovnc_path}"
         else:
             status_message = f"Warning - TurboVNC not found: {turbovnc_path}"
-        
-        # Show status on left, version on right
         self.statusBar().showMessage(status_message)
+    
+    def update_session_status(self):
+        """Show running viewers in the list and the status bar."""
+        monitor = self.vnc_launcher.resource_monitor
+        usage = monitor.all_usage()
+        latest = {}
+        running = []
+        finished = []
+        for session in self.vnc_launcher.supervisor.sessions():
+            latest[session.connection_name] = session
+            if session.running:
+                running.append(session)
+            else:
+                finished.append(session.session_id)
+            self.announce_launch(session)
+            self.announce_memory_limit(usage.get(session.session_id))
         
-        # Add version label to the right side of status bar
-        version_label = QLabel(f"v{turbovncui.__version__}")
-        self.statusBar().addPermanentWidget(version_label)
+        for name, session in latest.items():
+            session_usage = usage.get(session.session_id)
+            if session_usage is not None and session_usage.killed:
+                text = ("stopping: over memory limit" if session.running
+                        else "stopped: over memory limit")
+            elif session.failure is not None:
+                text = f"failed: {session.failure}"
+            elif not session.running:
+                text = (f"viewer exited with code {session.exit_code}"
+                        if session.exit_code != 0 else None)
+            elif session.launch_latency is None:
+                text = f"connecting {format_duration(session.uptime)}"
+            else:
+                text = f"running {format_duration(session.uptime)}"
+            self.set_annotation(name, "session", text)
+            self.set_annotation(
+                name, "resources",
+                session_usage.summary()
+                if session.running and session_usage is not None and
+                session_usage.samples > 1 else None
+            )
+        
+        # Their exit is shown now and the annotation stays, so stop
+        # walking them every tick
+        self.vnc_launcher.supervisor.forget_finished(finished)
+        self.announced_sessions.difference_update(finished)
+        self.memory_warnings.difference_update(finished)
+        
+        text = ""
+        if running:
+            text = f"Sessions: {len(running)}"
+            if monitor.policy.max_sessions is not None:
+                text += f"/{monitor.policy.max_sessions}"
+            memory = sum(usage[session.session_id].rss_mb
+                         for session in running
+                         if session.session_id in usage)
+            if memory:
+                text += f", {memory:.0f} MB"
+        self.sessions_label.setText(text)
+        self.update_launch_stats()
+    
+    def announce_launch(self, session):
+        """Report a launch's outcome in the status bar, once."""
+        if session.session_id in self.announced_sessions:
+            return
+        if session.failure is not None:
+            self.statusBar().showMessage(
+                f"Failed to connect to {session.connection_name}: "
+                f"{session.failure} (see {session.log_path})"
+            )
+        elif session.launch_latency is not None:
+            self.statusBar().showMessage(
+                f"Connected to {session.connection_name} in "
+                f"{session.launch_latency:.1f}s"
+            )
+        else:
+            return
+        self.announced_sessions.add(session.session_id)
+    
+    def announce_memory_limit(self, usage):
+        """Report a viewer going over the memory limit, once."""
+        if (usage is None or not usage.over_memory_limit or
+                usage.session_id in self.memory_warnings):
+            return
+        limit = self.vnc_launcher.resource_monitor.policy.memory_limit_mb
+        if usage.killed:
+            message = (f"Stopping the viewer for {usage.connection_name}: "
+                       f"{usage.rss_mb:.0f} MB is over the {limit} MB limit")
+        else:
+            message = (f"Warning: the viewer for {usage.connection_name} "
+                       f"uses {usage.rss_mb:.0f} MB, over the {limit} MB "
+                       f"limit")
+        self.statusBar().showMessage(message)
+        self.memory_warnings.add(usage.session_id)
+    
+    def session_limit_reached(self):
+        """Tell the user if no more viewers may be started."""
+        limit = self.vnc_launcher.resource_monitor.policy.max_sessions
+        running = len(self.vnc_launcher.supervisor.running_sessions())
+        if limit is None or running < limit:
+            return False
+        QMessageBox.information(
+            self, "Session Limit",
+            f"{running} viewers are running, the most allowed. Close one "
+            f"first, or raise max_sessions in resource_limits.json."
+        )
+        return True
+    
+    def update_launch_stats(self):
+        """Show launch latency percentiles in the list when they change."""
+        launch_stats = self.vnc_launcher.launch_stats
+        if launch_stats.version == self.launch_stats_version:
+            return
+        self.launch_stats_version = launch_stats.version
+        for name, stats in launch_stats.all_stats().items():
+            self.set_annotation(name, "latency", stats.summary())
+    
+    def check_health(self):
+        """Start a background health check of all connections."""
+        if self.health_worker is not None and self.health_worker.isRunning():
+            return
+        self.health_worker = HealthWorker(
+            self.health_monitor, list(self.connections), self
+        )
+        self.health_worker.health_checked.connect(self.on_health_checked)
+        self.health_worker.start()
+    
+    def on_health_checked(self, results):
+        """Show health check results in the connection list."""
+        for name, result in results.items():
+            self.set_annotation(name, "health", result.summary())
+    
+    def refresh_thumbnails(self, grab=True):
+        """Start a background round of thumbnail grabs."""
+        if (self.thumbnail_worker is not None and
+                self.thumbnail_worker.isRunning()):
+            return
+        connections = (self.visible_connections() + self.connections
+                       if grab else [])
+        self.thumbnail_worker = ThumbnailWorker(
+            self.thumbnail_refresher, connections, self
+        )
+        # Emitted from the worker's event loop; only ever handled here
+        self.thumbnail_worker.cache_loaded.connect(
+            self.connection_list.viewport().update, Qt.QueuedConnection
+        )
+        self.thumbnail_worker.thumbnail_grabbed.connect(
+            self.on_thumbnail_grabbed, Qt.QueuedConnection
+        )
+        self.thumbnail_worker.start()
+    
+    def on_thumbnail_grabbed(self, host, port):
+        """Repaint the rows in view to show a new thumbnail."""
+        self.connection_list.viewport().update()
+    
+    def set_annotation(self, name, kind, text):
+        """Annotate a connection in both the tree and the search results."""
+        self.connection_model.set_annotation(name, kind, text)
+        self.connection_tree_model.set_annotation(name, kind, text)
+    
+    def watch_store(self):
+        """Watch the store's files, including ones created since last time."""
+        watched = set(self.store_watcher.files())
+        watched.update(self.store_watcher.directories())
+        for path in self.db.watched_paths():
+            if str(path) not in watched and path.exists():
+                self.store_watcher.addPath(str(path))
+    
+    def on_store_changed(self, path):
+        """Schedule a reload check after a change notification."""
+        # Atomic replaces drop the old file from the watch list
+        self.watch_store()
+        self.reload_timer.start()
+    
+    def reload_if_changed(self):
+        """Apply changes made by another instance to the list."""
+        if self.db.has_changed():
+            self.load_connections()
+    
+    def closeEvent(self, event):
+        """Stop background work before the window goes away."""
+        if self.health_worker is not None and self.health_worker.isRunning():
+            self.health_monitor.cancel()
+            self.health_worker.wait()
+        if (self.thumbnail_worker is not None and
+                self.thumbnail_worker.isRunning()):
+            self.thumbnail_refresher.cancel()
+            self.thumbnail_worker.wait()
+        if self.probe_worker.isRunning():
+            self.probe_worker.wait()
+        if self.search_index_worker is not None:
+            self.search_index_worker.wait()
+        if self.import_worker is not None:
+            # Let the write finish so the store isn't left half-imported
+            self.import_worker.wait()
+        for worker in self.launch_workers:
+            # Too late to start the viewer; just give back its tunnel
+            worker.launch_prepared.disconnect()
+            worker.launch_failed.disconnect()
+            worker.wait()
+            if worker.prepared is not None:
+                self.vnc_launcher.discard(worker.prepared)
+        super().closeEvent(event)
     
     def show_about(self):
         """Show the about dialog."""
-        dialog = AboutDialog(self)
+        with tracing.span("ui.open_dialog", dialog="AboutDialog"):
+            dialog = AboutDialog(self)
+        dialog.exec()
+    
+    def show_performance(self):
+        """Show the recorded tracing spans."""
+        dialog = PerformanceDialog(self)
         dialog.exec()
     
     def load_connections(self):
         """Load connections from database."""
-        self.connections = self.db.load_connections()
+        with tracing.span("ui.load_connections") as span:
+            self.connections = self.db.load_connections()
+            span.set("count", len(self.connections))
         self.update_connection_list()
     
     def load_last_connection(self):
         """Load and highlight the last used connection."""
         self.last_connection = self.db.load_last_connection()
         if self.last_connection:
-            # Find and select the last connection in the list
-            for i in range(self.connection_list.count()):
-                item = self.connection_list.item(i)
-                if (item.data(Qt.UserRole) == 
-                    self.last_connection.name):
-                    self.connection_list.setCurrentItem(item)
-                    break
+            self.select_connection(self.last_connection.name)
     
+    @tracing.traced("ui.update_connection_list")
     def update_connection_list(self):
         """Update the connection list display."""
-        self.connection_list.clear()
+        if self.search_index is not None:
+            self.search_index.sync(self.connections)
+        elif self.search_index_worker is None:
+            self.search_index_worker = SearchIndexWorker(
+                list(self.connections), self
+            )
+            self.search_index_worker.index_built.connect(
+                self.on_search_index_built
+            )
+            self.search_index_worker.start()
+        self.apply_filter()
+    
+    def on_search_index_built(self, index):
+        """Start using the search index built in the background."""
+        self.search_index = index
+        self.search_index.sync(self.connections)
+        self.apply_filter()
+    
+    def apply_filter(self):
+        """Show the connections matching the search box, best first."""
+        text = self.search_edit.text().strip()
+        with tracing.span("ui.apply_filter", query_length=len(text)) as span:
+            if not text:
+                self.reload_tree()
+                span.set("rows", self.connection_tree_model.rowCount())
+                return
+            if self.search_index is not None:
+                connections = self.search_index.search(text)
+            else:
+                # The index is still being built
+                connections = self.db.query_connections(text, limit=1000)
+            self.connection_model.set_connections(connections)
+            self.show_model(self.connection_model)
+            span.set("rows", len(connections))
+    
+    def reload_tree(self):
+        """Update the group tree, keeping open groups and the selection."""
+        model = self.connection_tree_model
+        if self.connection_list.model() is model:
+            # The model updates its rows in place, so the view keeps its
+            # open groups, selection and scroll position by itself
+            current = self.selected_connection_name()
+            model.reload(self.most_used_connections())
+            self.expanded_groups &= set(model.group_paths())
+            if (current is not None and
+                    self.selected_connection_name() != current):
+                self.select_connection(current)
+            return
         
-        for connection in self.connections:
-            item = QListWidgetItem(str(connection))
-            item.setData(Qt.UserRole, connection.name)
-            self.connection_list.addItem(item)
+        model.reload(self.most_used_connections())
+        self.show_model(model)
+        # Expanding fetches the first rows of each open group again
+        for path in list(self.expanded_groups):
+            index = model.index_for_group(path)
+            if index.isValid():
+                self.connection_list.expand(index)
+            else:
+                self.expanded_groups.discard(path)
+    
+    def show_model(self, model):
+        """Show the tree or the flat search results in the list."""
+        if self.connection_list.model() is model:
+            return
+        self.connection_list.setModel(model)
+        self.connection_list.setRootIsDecorated(
+            model is self.connection_tree_model
+        )
+    
+    def on_group_expanded(self, index):
+        """Remember that a group was opened."""
+        path = index.data(ConnectionTreeModel.GroupRole)
+        if path is not None:
+            self.expanded_groups.add(path)
+    
+    def on_group_collapsed(self, index):
+        """Remember that a group was closed."""
+        self.expanded_groups.discard(
+            index.data(ConnectionTreeModel.GroupRole)
+        )
+    
+    def fetch_visible_rows(self):
+        """Read more rows of open groups whose last row is in view.
+        
+        QTreeView only fetches more for the group at the very bottom of
+        the tree, so a big group with others below it would stop at its
+        first batches.
+        """
+        model = self.connection_tree_model
+        if self.connection_list.model() is not model:
+            return
+        height = self.connection_list.viewport().height()
+        for path in self.expanded_groups:
+            parent = model.index_for_group(path)
+            if not model.canFetchMore(parent):
+                continue
+            last = model.index(model.rowCount(parent) - 1, 0, parent)
+            rect = self.connection_list.visualRect(last)
+            if rect.isValid() and rect.bottom() >= 0 and rect.top() <= height:
+                model.fetchMore(parent)
+    
+    def visible_connections(self):
+        """Get the connections in the rows currently in view."""
+        connections = []
+        height = self.connection_list.viewport().height()
+        index = self.connection_list.indexAt(QPoint(0, 0))
+        while (index.isValid() and
+               self.connection_list.visualRect(index).top() < height):
+            connection = index.data(ConnectionListModel.ConnectionRole)
+            if connection is not None:
+                connections.append(connection)
+            index = self.connection_list.indexBelow(index)
+        return connections
+    
+    def most_used_connections(self):
+        """Get the most used connections, pinned to the top of the tree."""
+        by_name = self.db.get_connection_by_name
+        return [
+            connection for connection in
+            (by_name(name) for name in self.db.history.most_used(
+                MOST_USED_ROWS))
+            if connection is not None
+        ]
+    
+    def select_connection(self, name):
+        """Make a connection the current row, clearing a search hiding it."""
+        model = self.connection_list.model()
+        index = model.index_for_name(name)
+        if not index.isValid() and self.search_edit.text():
+            self.search_edit.clear()
+            model = self.connection_list.model()
+            index = model.index_for_name(name)
+        if not index.isValid():
+            return False
+        # Also opens the groups it is in
+        self.connection_list.scrollTo(index)
+        self.connection_list.setCurrentIndex(index)
+        return True
+    
+    def selected_connection_name(self):
+        """Get the name of the selected connection, or None."""
+        index = self.connection_list.currentIndex()
+        if not index.isValid():
+            return None
+        return index.data(ConnectionListModel.NameRole)
+    
+    def selected_connection_names(self):
+        """Get the names of all selected connections, in list order."""
+        indexes = sorted(
+            self.connection_list.selectionModel().selectedRows(),
+            key=row_path
+        )
+        names = []
+        for index in indexes:
+            # Groups have no name; pinned rows repeat grouped ones
+            name = index.data(ConnectionListModel.NameRole)
+            if name is not None and name not in names:
+                names.append(name)
+        return names
     
     def add_connection(self):
         """Add a new connection."""
-        dialog = ConnectionDialog(self)
+        with tracing.span("ui.open_dialog", dialog="ConnectionDialog"):
+            dialog = ConnectionDialog(
+                self, profile_store=self.vnc_launcher.profile_store
+            )
         if dialog.exec() == ConnectionDialog.Accepted:
             connection, _ = dialog.get_connection_data()
             
             # Check if name already exists
-            if any(c.name == connection.name for c in self.connections):
+            if self.db.has_connection(connection.name):
                 QMessageBox.warning(
                     self, "Error", 
                     "A connection with this name already exists!"
                 )
                 return
             
-            self.db.add_connection(connection)
+            if not self.db.add_connection(connection):
+                # Another instance took the name after the check above
+                self.load_connections()
+                QMessageBox.warning(
+                    self, "Error",
+                    "A connection with this name already exists!"
+                )
+                return
             self.load_connections()
             self.statusBar().showMessage(f"Added connection: {connection.name}")
     
+    def import_connections(self):
+        """Import connections from ssh_config, CSV/TSV or an inventory."""
+        filters = {
+            "All supported files (*)": None,
+            "SSH config (config ssh_config *.conf)": "ssh",
+            "CSV files (*.csv)": "csv",
+            "TSV files (*.tsv)": "tsv",
+            "Ansible INI inventory (hosts inventory *.ini)": "ini",
+            "Ansible YAML inventory (*.yml *.yaml)": "yaml",
+        }
+        path, selected_filter = QFileDialog.getOpenFileName(
+            self, "Import Connections", "", ";;".join(filters)
+        )
+        if not path:
+            return
+        
+        fmt = filters.get(selected_filter) or detect_format(path)
+        if fmt is None:
+            QMessageBox.warning(
+                self, "Error",
+                "Could not tell the file format; please pick it in the "
+                "file type list."
+            )
+            return
+        
+        self.import_button.setEnabled(False)
+        self.statusBar().showMessage(f"Importing {path}...")
+        self.import_worker = ImportWorker(str(self.db.config_dir), path, fmt)
+        self.import_worker.import_finished.connect(self.on_import_finished)
+        self.import_worker.import_failed.connect(self.on_import_failed)
+        self.import_worker.start()
+    
+    def on_import_finished(self, report):
+        """Show what an import added, skipped and couldn't add."""
+        self.import_button.setEnabled(True)
+        self.load_connections()
+        
+        message = report.summary() + "."
+        if report.conflicts:
+            shown = ", ".join(report.conflicts[:10])
+            more = len(report.conflicts) - 10
+            if more > 0:
+                shown += f" and {more} more"
+            message += f"\n\nNames already in use: {shown}"
+        QMessageBox.information(self, "Import Finished", message)
+        self.statusBar().showMessage(report.summary())
+    
+    def on_import_failed(self, error):
+        """Report an import that couldn't be read or written."""
+        self.import_button.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.warning(self, "Error", f"Import failed: {error}")
+    
+    def discover_servers(self):
+        """Scan address ranges for VNC servers and add the chosen ones."""
+        dialog = DiscoveryDialog(self, self.db)
+        dialog.exec_()
+        if dialog.added:
+            self.load_connections()
+            self.statusBar().showMessage(
+                f"Added {dialog.added} discovered servers"
+            )
+    
     def edit_selected_connection(self):
         """Edit the selected connection."""
-        current_item = self.connection_list.currentItem()
-        if not current_item:
+        connection_name = self.selected_connection_name()
+        if not connection_name:
             QMessageBox.information(
                 self, "Info", 
                 "Please select a connection to edit."
             )
             return
         
-        connection_name = current_item.data(Qt.UserRole)
-        connection = self.db.get_connection_by_name(connection_name)
-        
-        if connection:
-            self.edit_connection(current_item)
+        self.edit_connection(connection_name)
     
-    def edit_connection(self, item):
+    def edit_connection(self, connection_name):
         """Edit a connection."""
-        connection_name = item.data(Qt.UserRole)
         connection = self.db.get_connection_by_name(connection_name)
         
         if not connection:
             return
         
-        dialog = ConnectionDialog(self, connection)
+        with tracing.span("ui.open_dialog", dialog="ConnectionDialog"):
+            dialog = ConnectionDialog(
+                self, connection, self.vnc_launcher.profile_store
+            )
         if dialog.exec() == ConnectionDialog.Accepted:
             new_connection, old_name = dialog.get_connection_data()
             
             # Check if new name conflicts with existing connections
-            if (new_connection.name != old_name and 
-                any(c.name == new_connection.name for c in self.connections)):
+            if (new_connection.name != old_name and
+                    self.db.has_connection(new_connection.name)):
                 QMessageBox.warning(
                     self, "Error", 
                     "A connection with this name already exists!"
                 )
                 return
             
-            self.db.update_connection(old_name, new_connection)
+            if not self.db.update_connection(old_name, new_connection):
+                # Another instance deleted or renamed it meanwhile
+                self.load_connections()
+                QMessageBox.warning(
+                    self, "Error",
+                    f"The connection '{old_name}' no longer exists."
+                )
+                return
+            if new_connection.name != old_name:
+                self.db.history.rename(old_name, new_connection.name)
             self.load_connections()
+            self.select_connection(new_connection.name)
             self.statusBar().showMessage(f"Updated connection: {new_connection.name}")
     
     def delete_selected_connection(self):
         """Delete the selected connection."""
-        current_item = self.connection_list.currentItem()
-        if not current_item:
+        connection_name = self.selected_connection_name()
+        if not connection_name:
             QMessageBox.information(
                 self, "Info", 
                 "Please select a connection to delete."
             )
             return
         
-        connection_name = current_item.data(Qt.UserRole)
-        
         reply = QMessageBox.question(
             self, "Confirm Delete",
             f"Are you sure you want to delete '{connection_name}'?",
@@ -213,57 +774,137 @@ class MainWindow(QMainWindow):
         
         if reply == QMessageBox.Yes:
             if self.db.delete_connection(connection_name):
+                self.vnc_launcher.launch_stats.forget(connection_name)
+                self.db.history.forget(connection_name)
                 self.load_connections()
                 self.statusBar().showMessage(f"Deleted connection: {connection_name}")
             else:
                 QMessageBox.warning(self, "Error", "Failed to delete connection.")
     
-    def connect_to_double_clicked(self, item):
+    def handle_request(self, request):
+        """Act on a request from a later invocation of the app."""
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+        
+        query = request.get("connect")
+        if not query:
+            return
+        connection = resolve_connection(self.db, query)
+        if connection is None:
+            self.statusBar().showMessage(f"No connection matches '{query}'")
+            return
+        
+        if self.select_connection(connection.name):
+            self.connect_to_selected()
+    
+    def connect_to_double_clicked(self, index):
         """Connect to the double-clicked VNC server."""
-        connection_name = item.data(Qt.UserRole)
+        connection_name = index.data(ConnectionListModel.NameRole)
+        if connection_name is None:
+            # A group; the view opens or closes it
+            return
         connection = self.db.get_connection_by_name(connection_name)
         
         if not connection:
             QMessageBox.warning(self, "Error", "Connection not found.")
             return
         
-        # Save as last used connection
-        self.db.save_last_connection(connection)
-        
-        # Launch TurboVNC
-        if self.vnc_launcher.launch_connection(connection):
-            self.statusBar().showMessage(f"Connecting to {connection.name}...")
-        else:
-            QMessageBox.critical(
-                self, "Error", 
-                "Failed to launch TurboVNC. Please check your installation."
-            )
+        self.launch(connection)
     
     def connect_to_selected(self):
-        """Connect to the selected VNC server."""
-        current_item = self.connection_list.currentItem()
-        if not current_item:
+        """Connect to the selected VNC server(s)."""
+        names = self.selected_connection_names()
+        if len(names) > 1:
+            self.connect_to_many(names)
+            return
+        
+        connection_name = names[0] if names else None
+        if not connection_name:
             QMessageBox.information(
                 self, "Info", 
                 "Please select a connection to connect to."
             )
             return
         
-        connection_name = current_item.data(Qt.UserRole)
         connection = self.db.get_connection_by_name(connection_name)
         
         if not connection:
             QMessageBox.warning(self, "Error", "Connection not found.")
             return
         
+        self.launch(connection)
+    
+    def launch(self, connection):
+        """Launch a viewer; the slow setup runs off the GUI thread."""
+        if self.session_limit_reached():
+            return
+        
         # Save as last used connection
         self.db.save_last_connection(connection)
         
-        # Launch TurboVNC
-        if self.vnc_launcher.launch_connection(connection):
-            self.statusBar().showMessage(f"Connecting to {connection.name}...")
-        else:
+        with tracing.span("ui.connect", connection=connection.name):
+            self.launch_workers = [
+                worker for worker in self.launch_workers
+                if worker.isRunning()
+            ]
+            worker = LaunchWorker(self.vnc_launcher, connection, self)
+            worker.launch_prepared.connect(self.on_launch_prepared)
+            worker.launch_failed.connect(self.on_launch_failed)
+            self.launch_workers.append(worker)
+            worker.start()
+        self.statusBar().showMessage(f"Connecting to {connection.name}...")
+    
+    def on_launch_prepared(self, prepared):
+        """Start the viewer of a launch whose tunnel is up."""
+        with tracing.span("ui.spawn", connection=prepared.connection.name):
+            session = self.vnc_launcher.launch_prepared(prepared)
+        if session is None:
             QMessageBox.critical(
-                self, "Error", 
+                self, "Error",
                 "Failed to launch TurboVNC. Please check your installation."
-            ) 
\ No newline at end of file
+            )
+    
+    def on_launch_failed(self, name, error):
+        """Report a launch whose tunnel or command line couldn't be set up."""
+        self.statusBar().showMessage(f"Could not connect to {name}: {error}")
+        QMessageBox.critical(
+            self, "Error", f"Could not connect to {name}:\n{error}"
+        )
+    
+    def connect_to_many(self, connection_names):
+        """Launch several connections at once from the batch dialog."""
+        connections = [
+            connection for connection in
+            (self.db.get_connection_by_name(name) for name in connection_names)
+            if connection is not None
+        ]
+        if not connections:
+            return
+        
+        for connection in connections:
+            self.db.save_last_connection(connection)
+        
+        with tracing.span("ui.open_dialog", dialog="BatchLaunchDialog"):
+            dialog = BatchLaunchDialog(self, self.vnc_launcher, connections)
+        dialog.exec()
+        self.update_session_status()
+
+
+def row_path(index) -> tuple:
+    """Rows from the top of the tree down to an index, for sorting."""
+    rows = []
+    while index.isValid():
+        rows.append(index.row())
+        index = index.parent()
+    return tuple(reversed(rows))
+
+
+def format_duration(seconds: float) -> str:
+    """Format a duration as e.g. 42s, 5m or 3h12m."""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h{(seconds % 3600) // 60:02d}m"
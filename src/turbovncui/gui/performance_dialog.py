@@ -0,0 +1,169 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+    QTableWidget, QTableWidgetItem, QTabWidget, QFileDialog, QMessageBox,
+    QHeaderView
+)
+from turbovncui.utils import tracing
+
+
+# Most recent spans shown in the table; the rest are still exported
+MAX_ROWS = 2000
+
+
+class PerformanceDialog(QDialog):
+    """Hidden diagnostics dialog listing recorded tracing spans.
+
+    Opened with Ctrl+Shift+P from the main window. Spans can be exported
+    as a Chrome trace to attach to bug reports.
+    """
+
+    def __init__(self, parent=None):
+        """Initialize the performance dialog."""
+        super().__init__(parent)
+        self.setWindowTitle("Performance")
+        self.setModal(True)
+        self.resize(800, 500)
+        self.setup_ui()
+        self.refresh()
+
+    def setup_ui(self):
+        """Setup the user interface."""
+        layout = QVBoxLayout()
+
+        self.status_label = QLabel()
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.tabs = QTabWidget()
+
+        self.recent_table = QTableWidget(0, 5)
+        self.recent_table.setHorizontalHeaderLabels(
+            ["Span", "Start (ms)", "Duration (ms)", "Thread", "Details"]
+        )
+        self.recent_table.horizontalHeader().setSectionResizeMode(
+            4, QHeaderView.Stretch
+        )
+        self.recent_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabs.addTab(self.recent_table, "Recent")
+
+        self.summary_table = QTableWidget(0, 5)
+        self.summary_table.setHorizontalHeaderLabels(
+            ["Span", "Count", "Total (ms)", "Median (ms)", "Max (ms)"]
+        )
+        self.summary_table.horizontalHeader().setSectionResizeMode(
+            0, QHeaderView.Stretch
+        )
+        self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabs.addTab(self.summary_table, "Summary")
+
+        layout.addWidget(self.tabs)
+
+        # Buttons
+        button_layout = QHBoxLayout()
+
+        self.toggle_button = QPushButton()
+        self.toggle_button.clicked.connect(self.toggle_tracing)
+        button_layout.addWidget(self.toggle_button)
+
+        refresh_button = QPushButton("Refresh")
+        refresh_button.clicked.connect(self.refresh)
+        button_layout.addWidget(refresh_button)
+
+        clear_button = QPushButton("Clear")
+        clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(clear_button)
+
+        export_button = QPushButton("Export Chrome Trace...")
+        export_button.clicked.connect(self.export)
+        button_layout.addWidget(export_button)
+
+        button_layout.addStretch()
+
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        button_layout.addWidget(close_button)
+
+        layout.addLayout(button_layout)
+        self.setLayout(layout)
+
+    def refresh(self):
+        """Reload the tables from the span buffer."""
+        records = tracing.spans()
+        if tracing.is_enabled():
+            self.status_label.setText(
+                f"Tracing is on; {len(records)} spans recorded."
+            )
+            self.toggle_button.setText("Stop Tracing")
+        else:
+            self.status_label.setText(
+                f"Tracing is off ({len(records)} spans recorded). Start the "
+                f"app with {tracing.ENV_VAR}=1 or --trace to record from "
+                f"startup, or start it now."
+            )
+            self.toggle_button.setText("Start Tracing")
+
+        recent = records[-MAX_ROWS:][::-1]
+        self.recent_table.setRowCount(len(recent))
+        for row, record in enumerate(recent):
+            details = ", ".join(
+                f"{key}={value}" for key, value in record.attrs.items()
+            )
+            self.set_row(self.recent_table, row, [
+                record.name,
+                f"{record.start_ns / 1e6:.1f}",
+                f"{record.duration_ns / 1e6:.2f}",
+                record.thread_name,
+                details,
+            ])
+
+        durations = {}
+        for record in records:
+            durations.setdefault(record.name, []).append(record.duration_ns)
+        summary = sorted(durations.items(), key=lambda item: -sum(item[1]))
+        self.summary_table.setRowCount(len(summary))
+        for row, (name, values) in enumerate(summary):
+            values.sort()
+            self.set_row(self.summary_table, row, [
+                name,
+                str(len(values)),
+                f"{sum(values) / 1e6:.1f}",
+                f"{values[len(values) // 2] / 1e6:.2f}",
+                f"{values[-1] / 1e6:.2f}",
+            ])
+
+    def set_row(self, table, row, values):
+        """Fill one table row with text."""
+        for column, value in enumerate(values):
+            table.setItem(row, column, QTableWidgetItem(value))
+
+    def toggle_tracing(self):
+        """Turn span recording on or off."""
+        if tracing.is_enabled():
+            tracing.disable()
+        else:
+            tracing.enable()
+        self.refresh()
+
+    def clear(self):
+        """Drop all recorded spans."""
+        tracing.clear()
+        self.refresh()
+
+    def export(self):
+        """Save the spans as a Chrome trace-event file."""
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Export Chrome Trace", "turbovncui-trace.json",
+            "Trace files (*.json)"
+        )
+        if not path:
+            return
+        try:
+            count = tracing.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", f"Export failed: {e}")
+            return
+        QMessageBox.information(
+            self, "Trace Exported",
+            f"Wrote {count} spans to {path}.\n\nOpen it in "
+            f"chrome://tracing or https://ui.perfetto.dev."
+        )
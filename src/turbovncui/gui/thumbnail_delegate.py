@@ -0,0 +1,67 @@
+from typing import Optional
+from PyQt5.QtCore import QSize
+from PyQt5.QtGui import QColor, QIcon, QPixmap, QPixmapCache
+from PyQt5.QtWidgets import QStyledItemDelegate, QStyleOptionViewItem
+from turbovncui.gui.connection_model import ConnectionListModel
+from turbovncui.utils.thumbnails import THUMBNAIL_HEIGHT, THUMBNAIL_WIDTH
+
+
+# Space above and below a thumbnail
+ROW_PADDING = 4
+
+
+class ThumbnailDelegate(QStyledItemDelegate):
+    """Draws connection rows with their server's thumbnail in front.
+
+    A thumbnail is read from the ThumbnailCache when its row is painted,
+    so only rows in view ever cost a file read. Decoded pixmaps go into
+    QPixmapCache under the time the thumbnail was taken, so a refreshed
+    thumbnail replaces the old one on the next repaint. Rows without one
+    get a blank placeholder so the text lines up, and every row is a
+    thumbnail tall, which keeps the view's uniform row heights valid.
+    """
+
+    def __init__(self, cache, parent=None):
+        """Initialize with the ThumbnailCache to read from."""
+        super().__init__(parent)
+        self.cache = cache
+        self.thumbnail_size = QSize(THUMBNAIL_WIDTH, THUMBNAIL_HEIGHT)
+        self.placeholder = QPixmap(self.thumbnail_size)
+        self.placeholder.fill(QColor(224, 224, 224))
+
+    def thumbnail(self, connection) -> Optional[QPixmap]:
+        """The thumbnail of a connection's server, if one was taken."""
+        if not self.cache.loaded:
+            # A ThumbnailWorker is indexing it; don't scan it from paint
+            return None
+        stored_at = self.cache.stored_at(connection.host, connection.port)
+        if stored_at is None:
+            return None
+        key = (f"turbovncui-thumbnail:{connection.host.lower()}:"
+               f"{connection.port}:{stored_at}")
+        pixmap = QPixmapCache.find(key)
+        if pixmap is None:
+            data = self.cache.get(connection.host, connection.port)
+            pixmap = QPixmap()
+            if data is None or not pixmap.loadFromData(data, "PNG"):
+                return None
+            QPixmapCache.insert(key, pixmap)
+        return pixmap
+
+    def initStyleOption(self, option, index):
+        """Use the thumbnail as the decoration of connection rows."""
+        super().initStyleOption(option, index)
+        connection = index.data(ConnectionListModel.ConnectionRole)
+        if connection is None:
+            return
+        pixmap = self.thumbnail(connection)
+        option.features |= QStyleOptionViewItem.HasDecoration
+        option.icon = QIcon(pixmap if pixmap is not None
+                            else self.placeholder)
+        option.decorationSize = self.thumbnail_size
+
+    def sizeHint(self, option, index):
+        """Make every row, groups included, a thumbnail tall."""
+        size = super().sizeHint(option, index)
+        return QSize(size.width(),
+                     max(size.height(), THUMBNAIL_HEIGHT + 2 * ROW_PADDING))
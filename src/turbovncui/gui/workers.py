@@ -0,0 +1,182 @@
+from PyQt5.QtCore import QThread, pyqtSignal
+from turbovncui.utils.database import open_database
+from turbovncui.utils.importer import import_file
+from turbovncui.utils.search_index import SearchIndex
+
+
+class ProbeWorker(QThread):
+    """Probes the TurboVNC viewer off the GUI thread."""
+
+    probe_finished = pyqtSignal(object)
+
+    def __init__(self, vnc_launcher, parent=None):
+        """Initialize with the launcher whose binary should be probed."""
+        super().__init__(parent)
+        self.vnc_launcher = vnc_launcher
+
+    def run(self):
+        """Run the (possibly cached) probe and report the result."""
+        self.probe_finished.emit(self.vnc_launcher.probe())
+
+
+class HealthWorker(QThread):
+    """Runs a round of server health checks off the GUI thread."""
+
+    health_checked = pyqtSignal(dict)
+
+    def __init__(self, monitor, connections, parent=None):
+        """Initialize with the monitor and the connections to check."""
+        super().__init__(parent)
+        self.monitor = monitor
+        self.connections = connections
+
+    def run(self):
+        """Check all connections and report name -> HealthResult."""
+        self.health_checked.emit(self.monitor.check_all(self.connections))
+
+
+class SearchIndexWorker(QThread):
+    """Builds the search index for a large inventory off the GUI thread."""
+
+    index_built = pyqtSignal(object)
+
+    def __init__(self, connections, parent=None):
+        """Initialize with the connections to index."""
+        super().__init__(parent)
+        self.connections = connections
+
+    def run(self):
+        """Build a SearchIndex and hand it back to the GUI thread."""
+        index = SearchIndex()
+        index.sync(self.connections)
+        self.index_built.emit(index)
+
+
+class BatchLaunchWorker(QThread):
+    """Runs a BatchLauncher off the GUI thread."""
+
+    launch_progress = pyqtSignal(object)
+    batch_finished = pyqtSignal(list)
+
+    def __init__(self, batch_launcher, connections, geometries=None,
+                 parent=None):
+        """Initialize with the launcher and what to launch."""
+        super().__init__(parent)
+        self.batch_launcher = batch_launcher
+        self.connections = connections
+        self.geometries = geometries
+
+    def run(self):
+        """Launch everything, reporting each LaunchOutcome as it comes."""
+        outcomes = self.batch_launcher.launch_all(
+            self.connections, self.geometries, self.launch_progress.emit
+        )
+        self.batch_finished.emit(outcomes)
+
+
+class LaunchWorker(QThread):
+    """Prepares a viewer launch off the GUI thread.
+
+    Preparing may start an SSH master for the gateway and measure the
+    link, which can take seconds; the GUI starts the viewer itself once
+    launch_prepared arrives.
+    """
+
+    launch_prepared = pyqtSignal(object)
+    launch_failed = pyqtSignal(str, str)
+
+    def __init__(self, vnc_launcher, connection, parent=None):
+        """Initialize with the launcher and the connection to launch."""
+        super().__init__(parent)
+        self.vnc_launcher = vnc_launcher
+        self.connection = connection
+        self.prepared = None
+
+    def run(self):
+        """Prepare the launch and report the PreparedLaunch or the error."""
+        try:
+            self.prepared = self.vnc_launcher.prepare_launch(self.connection)
+        except Exception as e:
+            print(f"Error launching TurboVNC: {e}")
+            self.launch_failed.emit(self.connection.name, str(e))
+            return
+        self.launch_prepared.emit(self.prepared)
+
+
+class DiscoveryWorker(QThread):
+    """Runs a subnet scan off the GUI thread, streaming what it finds."""
+
+    server_found = pyqtSignal(object)
+    scan_progress = pyqtSignal(int, int)
+    scan_finished = pyqtSignal(object)
+    scan_failed = pyqtSignal(str)
+
+    def __init__(self, scanner, networks, ports, parent=None):
+        """Initialize with the scanner and the ranges to sweep."""
+        super().__init__(parent)
+        self.scanner = scanner
+        self.networks = networks
+        self.ports = ports
+
+    def run(self):
+        """Sweep, reporting each DiscoveredServer as it answers."""
+        try:
+            stats = self.scanner.scan(
+                self.networks, self.ports,
+                self.server_found.emit, self.scan_progress.emit
+            )
+        except (OSError, ValueError) as e:
+            self.scan_failed.emit(str(e))
+            return
+        self.scan_finished.emit(stats)
+
+
+class ThumbnailWorker(QThread):
+    """Runs a round of server thumbnail grabs off the GUI thread.
+
+    The thumbnail cache is indexed here first, so painting never has to
+    scan its directory.
+    """
+
+    cache_loaded = pyqtSignal()
+    thumbnail_grabbed = pyqtSignal(str, int)
+
+    def __init__(self, refresher, connections, parent=None):
+        """Initialize with the refresher and the connections to consider."""
+        super().__init__(parent)
+        self.refresher = refresher
+        self.connections = connections
+
+    def run(self):
+        """Grab the servers that are due, reporting each host and port."""
+        if not self.refresher.cache.loaded:
+            self.refresher.cache.load()
+            self.cache_loaded.emit()
+        self.refresher.refresh(self.connections, self.thumbnail_grabbed.emit)
+
+
+class ImportWorker(QThread):
+    """Parses and writes a connection import off the GUI thread."""
+
+    import_finished = pyqtSignal(object)
+    import_failed = pyqtSignal(str)
+
+    def __init__(self, config_dir, path, fmt, parent=None):
+        """Initialize with the config directory and the file to import."""
+        super().__init__(parent)
+        self.config_dir = config_dir
+        self.path = path
+        self.fmt = fmt
+
+    def run(self):
+        """Import the file and report the ImportReport."""
+        # Its own instance, since the GUI thread keeps reading its database
+        db = open_database(self.config_dir)
+        try:
+            report = import_file(db, self.path, self.fmt)
+        except (OSError, ValueError, ImportError) as e:
+            self.import_failed.emit(str(e))
+            return
+        finally:
+            db.close()
+        self.import_finished.emit(report)
@@ -4,12 +4,50 @@ TurboVNC UI - A graphical frontend for TurboVNC
 """
 
 import sys
-from PyQt5.QtWidgets import QApplication
-from turbovncui.gui.main_window import MainWindow
+from turbovncui.utils.instance import forward_request
+
+
+def take_option(argv, option, has_value=False):
+    """Remove an option (and its value) from argv; returns what was found.
+
+    Qt would complain about options it doesn't know, so ours are taken
+    out before it sees them. Returns True/False for flags and the value
+    (or None) for options taking one.
+    """
+    for i, arg in enumerate(argv):
+        if arg == option:
+            del argv[i]
+            if not has_value:
+                return True
+            return argv.pop(i) if i < len(argv) else None
+        if has_value and arg.startswith(option + "="):
+            del argv[i]
+            return arg.split("=", 1)[1]
+    return None if has_value else False
 
 
 def main():
     """Main application entry point."""
+    # --trace records spans from startup (see Ctrl+Shift+P)
+    trace = take_option(sys.argv, "--trace")
+    # --connect NAME launches a connection (a name, or text to match)
+    connect = take_option(sys.argv, "--connect", has_value=True)
+    new_instance = take_option(sys.argv, "--new-instance")
+    
+    # A running app takes the request over, with its store and probe
+    # caches already warm; this exits before PyQt5 is even imported
+    request = {"connect": connect}
+    if not new_instance and forward_request(request):
+        sys.exit(0)
+    
+    from PyQt5.QtWidgets import QApplication
+    from turbovncui.gui.instance_server import InstanceServer
+    from turbovncui.gui.main_window import MainWindow
+    from turbovncui.utils import tracing
+    
+    if trace:
+        tracing.enable()
+    
     app = QApplication(sys.argv)
     app.setApplicationName("TurboVNC UI")
     app.setApplicationVersion("1.0.0")
@@ -17,13 +55,21 @@ def main():
     # Set application style
     app.setStyle("Fusion")
     
+    instance_server = InstanceServer(app)
+    if not new_instance and not instance_server.listen(request):
+        # Another instance started at the same moment, and took it
+        sys.exit(0)
+    
     # Create and show main window
     window = MainWindow()
+    instance_server.request_received.connect(window.handle_request)
     window.show()
+    if connect:
+        window.handle_request(request)
     
     # Start the application
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,8 +1,32 @@
+import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional
+from turbovncui.models.profile import PerformanceSettings
 
 
-@dataclass
+# __slots__ records take about half the memory of ones with a __dict__,
+# which adds up with 100k connections; dataclasses only do it on 3.10+
+_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+# Separates the levels of a group path, e.g. "site/cluster/rack"
+GROUP_SEPARATOR = "/"
+
+
+# Thousands of connections share each group; the cache also makes them
+# share one string for it
+@lru_cache(maxsize=4096)
+def normalize_group(group: Optional[str]) -> Optional[str]:
+    """Tidy a group path: trim each level and drop empty ones.
+
+    " lab / rack1/ " becomes "lab/rack1"; a blank path becomes None.
+    """
+    if group is None:
+        return None
+    parts = [part.strip() for part in group.split(GROUP_SEPARATOR)]
+    return GROUP_SEPARATOR.join(part for part in parts if part) or None
+
+
+@dataclass(**_SLOTS)
 class Connection:
     """Represents a VNC server connection."""
     name: str
@@ -10,6 +34,13 @@ class Connection:
     port: int = 5900
     username: Optional[str] = None
     display: Optional[str] = None
+    # Name of a shared PerformanceProfile; overrides `performance`
+    profile: Optional[str] = None
+    performance: Optional[PerformanceSettings] = None
+    # SSH bastion ("[user@]host[:port]") the server is only reachable through
+    gateway: Optional[str] = None
+    # Folder the connection is shown in, e.g. "site/cluster/rack"
+    group: Optional[str] = None
     
     def __post_init__(self):
         """Validate connection data after initialization."""
@@ -19,6 +50,9 @@ class Connection:
             raise ValueError("Host cannot be empty")
         if not (1 <= self.port <= 65535):
             raise ValueError("Port must be between 1 and 65535")
+        if self.gateway is not None and not self.gateway.strip():
+            raise ValueError("Gateway cannot be blank")
+        self.group = normalize_group(self.group)
     
     def to_dict(self) -> dict:
         """Convert connection to dictionary for storage."""
@@ -27,9 +61,40 @@ class Connection:
             'host': self.host,
             'port': self.port,
             'username': self.username,
-            'display': self.display
+            'display': self.display,
+            'profile': self.profile,
+            'performance': (
+                self.performance.to_dict() if self.performance else None
+            ),
+            'gateway': self.gateway,
+            'group': self.group
         }
     
+    @classmethod
+    def from_trusted(cls, name: str, host: str, port: int = 5900,
+                     username: Optional[str] = None,
+                     display: Optional[str] = None,
+                     profile: Optional[str] = None,
+                     performance: Optional[PerformanceSettings] = None,
+                     gateway: Optional[str] = None,
+                     group: Optional[str] = None
+                     ) -> 'Connection':
+        """Create a connection from fields validated earlier, e.g. cached.
+        
+        Skips __post_init__, so only use it for data this app wrote.
+        """
+        connection = cls.__new__(cls)
+        connection.name = name
+        connection.host = host
+        connection.port = port
+        connection.username = username
+        connection.display = display
+        connection.profile = profile
+        connection.performance = performance
+        connection.gateway = gateway
+        connection.group = group
+        return connection
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Connection':
         """Create connection from dictionary."""
@@ -38,7 +103,14 @@ class Connection:
             host=data['host'],
             port=data.get('port', 5900),
             username=data.get('username'),
-            display=data.get('display')
+            display=data.get('display'),
+            profile=data.get('profile'),
+            performance=(
+                PerformanceSettings.from_dict(data['performance'])
+                if data.get('performance') else None
+            ),
+            gateway=data.get('gateway'),
+            group=data.get('group')
         )
     
     def get_connection_string(self) -> str:
@@ -47,7 +119,9 @@ class Connection:
     
     def __str__(self) -> str:
         """String representation for display."""
+        via = f" via {self.gateway}" if self.gateway else ""
         if self.username:
-            return f"{self.name} ({self.username}@{self.host}:{self.port})"
+            return (f"{self.name} ({self.username}@{self.host}:{self.port}"
+                    f"{via})")
         else:
-            return f"{self.name} ({self.host}:{self.port})" 
\ No newline at end of file
+            return f"{self.name} ({self.host}:{self.port}{via})"
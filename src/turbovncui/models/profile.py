@@ -0,0 +1,100 @@
+from dataclasses import dataclass, replace
+from typing import Optional
+
+
+ENCODINGS = ("Tight", "ZRLE", "Hextile", "Raw")
+SUBSAMPLING = ("1X", "2X", "4X", "Gray")
+
+# Preset name -> settings, modelled on TurboVNC's own encoding presets
+PRESETS = {
+    "lan": dict(encoding="Tight", jpeg_quality=95, jpeg_subsampling="1X",
+                compress_level=1),
+    "wan": dict(encoding="Tight", jpeg_quality=30, jpeg_subsampling="4X",
+                compress_level=1),
+}
+
+
+@dataclass
+class PerformanceSettings:
+    """Viewer encoding and compression settings.
+
+    With preset "lan" or "wan" the values come from the preset; with
+    "custom" the individual fields are used, and None leaves that setting
+    at the viewer's default. "auto" asks the launcher to measure the link
+    and pick settings at launch time.
+    """
+    preset: str = "custom"
+    encoding: Optional[str] = None
+    jpeg_quality: Optional[int] = None
+    jpeg_subsampling: Optional[str] = None
+    compress_level: Optional[int] = None
+    
+    def __post_init__(self):
+        """Validate settings after initialization."""
+        if (self.preset not in ("custom", "auto") and
+                self.preset not in PRESETS):
+            raise ValueError(f"Unknown performance preset: {self.preset}")
+        if self.encoding is not None and self.encoding not in ENCODINGS:
+            raise ValueError(f"Unknown encoding: {self.encoding}")
+        if (self.jpeg_quality is not None and
+                not (1 <= self.jpeg_quality <= 100)):
+            raise ValueError("JPEG quality must be between 1 and 100")
+        if (self.jpeg_subsampling is not None and
+                self.jpeg_subsampling not in SUBSAMPLING):
+            raise ValueError(
+                f"Unknown JPEG subsampling: {self.jpeg_subsampling}"
+            )
+        if (self.compress_level is not None and
+                not (0 <= self.compress_level <= 9)):
+            raise ValueError("Compression level must be between 0 and 9")
+    
+    def resolved(self) -> 'PerformanceSettings':
+        """Get the effective settings, with any preset applied."""
+        if self.preset in PRESETS:
+            return replace(self, **PRESETS[self.preset])
+        return self
+    
+    def to_dict(self) -> dict:
+        """Convert settings to dictionary for storage."""
+        return {
+            'preset': self.preset,
+            'encoding': self.encoding,
+            'jpeg_quality': self.jpeg_quality,
+            'jpeg_subsampling': self.jpeg_subsampling,
+            'compress_level': self.compress_level
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PerformanceSettings':
+        """Create settings from dictionary."""
+        return cls(
+            preset=data.get('preset', 'custom'),
+            encoding=data.get('encoding'),
+            jpeg_quality=data.get('jpeg_quality'),
+            jpeg_subsampling=data.get('jpeg_subsampling'),
+            compress_level=data.get('compress_level')
+        )
+
+
+@dataclass
+class PerformanceProfile:
+    """Named performance settings shared by many connections."""
+    name: str
+    settings: PerformanceSettings
+    
+    def __post_init__(self):
+        """Validate profile data after initialization."""
+        if not self.name.strip():
+            raise ValueError("Profile name cannot be empty")
+    
+    def to_dict(self) -> dict:
+        """Convert profile to dictionary for storage."""
+        return {'name': self.name, 'settings': self.settings.to_dict()}
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'PerformanceProfile':
+        """Create profile from dictionary."""
+        return cls(
+            name=data['name'],
+            settings=PerformanceSettings.from_dict(data.get('settings', {}))
+        )
@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from turbovncui.models.connection import Connection
+from turbovncui.utils.session_supervisor import ViewerSession
+
+
+@dataclass
+class LaunchOutcome:
+    """Result of launching one connection in a batch."""
+    connection_name: str
+    session: Optional[ViewerSession] = None
+    geometry: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the viewer was started."""
+        return self.session is not None
+
+
+def tile_geometries(count: int, width: int, height: int,
+                    x: int = 0, y: int = 0) -> List[str]:
+    """Split a screen area into `count` tiles, as "WxH+X+Y" strings.
+
+    Tiles fill a grid that is as close to square as possible, row by row.
+    """
+    if count <= 0:
+        return []
+    columns = math.ceil(math.sqrt(count))
+    rows = math.ceil(count / columns)
+    tile_width = width // columns
+    tile_height = height // rows
+
+    geometries = []
+    for i in range(count):
+        row, column = divmod(i, columns)
+        geometries.append(
+            f"{tile_width}x{tile_height}"
+            f"+{x + column * tile_width}+{y + row * tile_height}"
+        )
+    return geometries
+
+
+class BatchLauncher:
+    """Launches many connections through a bounded pool of threads.
+
+    At most `max_workers` launches are in flight at once (building the
+    command may measure the link first), and viewer processes are started
+    at least `stagger` seconds apart so a wall of Java viewers doesn't
+    start up all in the same instant.
+    """
+
+    def __init__(self, vnc_launcher, max_workers: int = 4,
+                 stagger: float = 0.5):
+        """Initialize with the launcher to use and the pool limits."""
+        self.vnc_launcher = vnc_launcher
+        self.max_workers = max(1, max_workers)
+        self.stagger = max(0.0, stagger)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Skip launches that haven't started yet."""
+        self._cancelled.set()
+
+    def _wait_for_slot(self) -> bool:
+        """Wait for this launch's turn; False if the batch was cancelled."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.stagger
+        return not self._cancelled.wait(start - now)
+
+    def _launch_one(self, connection: Connection,
+                    geometry: Optional[str]) -> LaunchOutcome:
+        """Launch one viewer, turning failures into an outcome."""
+        outcome = LaunchOutcome(connection.name, geometry=geometry)
+        if not self._wait_for_slot():
+            outcome.error = "cancelled"
+            return outcome
+        try:
+            outcome.session = self.vnc_launcher.start_session(
+                connection, geometry
+            )
+        except FileNotFoundError:
+            outcome.error = (
+                f"viewer not found at '{self.vnc_launcher.turbovnc_path}'"
+            )
+        except Exception as e:
+            outcome.error = str(e)
+        return outcome
+
+    def launch_all(
+            self, connections: List[Connection],
+            geometries: Optional[List[str]] = None,
+            progress: Optional[Callable[[LaunchOutcome], None]] = None
+    ) -> List[LaunchOutcome]:
+        """Launch every connection, in order, and return their outcomes.
+
+        progress is called with each outcome, in connection order, as soon
+        as that launch and the ones before it have finished.
+        """
+        self._cancelled.clear()
+        self._next_start = 0.0
+        if geometries is None:
+            geometries = [None] * len(connections)
+
+        jobs: List[Tuple[Connection, Optional[str]]] = list(
+            zip(connections, geometries)
+        )
+        with ThreadPoolExecutor(max_workers=self.max_workers,
+                                thread_name_prefix="launch") as pool:
+            futures = [pool.submit(self._launch_one, *job) for job in jobs]
+            outcomes = []
+            for future in futures:
+                outcome = future.result()
+                if progress is not None:
+                    progress(outcome)
+                outcomes.append(outcome)
+        return outcomes
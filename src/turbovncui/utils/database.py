@@ -1,12 +1,100 @@
 import json
 import os
+import shutil
+import tempfile
+import threading
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Callable, Dict, List, Optional
 from turbovncui.models.connection import Connection
+from turbovncui.utils import tracing
+from turbovncui.utils.snapshot import read_snapshot, write_snapshot
+
+try:
+    import fcntl
+except ImportError:
+    # No flock() on Windows; a single instance there is still safe
+    fcntl = None
+
+
+def file_signature(path: Path) -> Optional[tuple]:
+    """Get (inode, mtime, size) of a file, or None if it doesn't exist."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def atomic_write_json(path: Path, data: Any,
+                      indent: Optional[int] = 2) -> None:
+    """Write JSON to a temp file and rename it over path.
+
+    Readers (and a crash mid-write) only ever see the old or the new file,
+    never a partially written one.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class FileLock:
+    """Advisory lock on a file, shared by every process of the app.
+
+    Re-entrant within a thread, and it also serializes threads of this
+    process, since flock() alone doesn't.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the lock on path (created when first locked)."""
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def __enter__(self) -> 'FileLock':
+        """Block until the lock is held."""
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                self._thread_lock.release()
+                raise
+            self._fd = fd
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Release one level of the lock."""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._thread_lock.release()
 
 
 class ConnectionDatabase:
-    """Manages storage and retrieval of VNC connections."""
+    """Manages storage and retrieval of VNC connections.
+
+    Connections are kept in an in-memory index keyed by name, so lookups
+    and mutations don't re-parse the JSON file. The index is only reloaded
+    when the file's inode, mtime or size change underneath us.
+
+    Read-modify-write cycles hold an advisory lock on connections.lock and
+    re-check the file first, so several running instances never overwrite
+    each other's changes.
+    """
     
     def __init__(self, config_dir: Optional[str] = None):
         """Initialize database with config directory."""
@@ -17,79 +105,331 @@ class ConnectionDatabase:
         self.config_dir.mkdir(parents=True, exist_ok=True)
         
         self.connections_file = self.config_dir / "connections.json"
+        self.snapshot_file = self.config_dir / "connections.snapshot"
+        self.file_lock = FileLock(self.config_dir / "connections.lock")
+        # Superseded by the usage history; read once to seed it
         self.last_connection_file = self.config_dir / "last_connection.json"
+        self._history = None
+        
+        # name -> Connection, in file order
+        self._index: Dict[str, Connection] = {}
+        # group path ("" for none) -> names in it, rebuilt lazily
+        self._groups: Optional[Dict[str, List[str]]] = None
+        self._signature: Optional[tuple] = None
+        self._loaded = False
     
-    def save_connections(self, connections: List[Connection]) -> None:
-        """Save connections to JSON file."""
-        data = [conn.to_dict() for conn in connections]
-        with open(self.connections_file, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _file_signature(self) -> Optional[tuple]:
+        """Get (inode, mtime, size) of the connections file, if present."""
+        return file_signature(self.connections_file)
     
-    def load_connections(self) -> List[Connection]:
-        """Load connections from JSON file."""
-        if not self.connections_file.exists():
+    def _read_connections(self) -> List[Connection]:
+        """Parse the connections file from disk.
+        
+        Uses the binary snapshot instead when it was made from this exact
+        version of the file, and regenerates it otherwise.
+        """
+        signature = file_signature(self.connections_file)
+        if signature is None:
             return []
         
+        with tracing.span("db.load_snapshot") as span:
+            connections = read_snapshot(self.snapshot_file, signature)
+            span.set("hit", connections is not None)
+        if connections is not None:
+            return connections
+        
         try:
-            with open(self.connections_file, 'r') as f:
-                data = json.load(f)
-            return [Connection.from_dict(item) for item in data]
-        except (json.JSONDecodeError, KeyError, ValueError):
-            # If file is corrupted, return empty list
+            with tracing.span("db.load_json", bytes=signature[2]):
+                with open(self.connections_file, 'r') as f:
+                    data = json.load(f)
+            if not isinstance(data, list):
+                raise ValueError(
+                    f"expected a list, got {type(data).__name__}"
+                )
+        except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
+            self._keep_corrupt_copy(e)
             return []
+        
+        connections = []
+        skipped = 0
+        with tracing.span("db.validate", count=len(data)):
+            for item in data:
+                try:
+                    connections.append(Connection.from_dict(item))
+                except (KeyError, TypeError, ValueError) as e:
+                    skipped += 1
+                    print(f"Warning: skipping invalid connection "
+                          f"{item!r}: {e}")
+        if skipped:
+            # The next save drops them, so keep the file they came from
+            self._keep_corrupt_copy(
+                ValueError(f"{skipped} invalid connections skipped")
+            )
+        self._save_snapshot(connections, signature)
+        return connections
     
-    def save_last_connection(self, connection: Connection) -> None:
-        """Save the last used connection."""
-        data = connection.to_dict()
-        with open(self.last_connection_file, 'w') as f:
-            json.dump(data, f, indent=2)
+    def _keep_corrupt_copy(self, error: Exception) -> None:
+        """Back up an unreadable connections file before it is overwritten."""
+        # Keep a copy so the next save can't wipe the user's list
+        backup = self.connections_file.with_suffix(".json.corrupt")
+        try:
+            shutil.copyfile(self.connections_file, backup)
+        except OSError as e:
+            print(f"Error: {self.connections_file} is corrupt ({error}), "
+                  f"and it could not be copied to {backup}: {e}")
+            return
+        print(f"Error: {self.connections_file} is corrupt ({error}), "
+              f"saved a copy to {backup}")
     
-    def load_last_connection(self) -> Optional[Connection]:
-        """Load the last used connection."""
-        if not self.last_connection_file.exists():
-            return None
+    def _save_snapshot(self, connections: List[Connection],
+                       signature: Optional[tuple]) -> None:
+        """Cache validated connections in the binary snapshot."""
+        if signature is None:
+            return
+        try:
+            with tracing.span("db.save_snapshot", count=len(connections)):
+                write_snapshot(self.snapshot_file, connections, signature)
+        except OSError as e:
+            print(f"Warning: could not write {self.snapshot_file}: {e}")
+        except (TypeError, ValueError) as e:
+            # The JSON stays authoritative; it is just parsed every time
+            print(f"Warning: not caching connections in "
+                  f"{self.snapshot_file}: {e}")
+    
+    def _ensure_loaded(self) -> None:
+        """Reload the index if the file changed since we last saw it."""
+        signature = self._file_signature()
+        if self._loaded and signature == self._signature:
+            return
         
+        self._index = {conn.name: conn for conn in self._read_connections()}
+        self._groups = None
+        self._signature = signature
+        self._loaded = True
+    
+    def _write_index(self) -> None:
+        """Write the in-memory index back to disk."""
+        with tracing.span("db.save_json", count=len(self._index)):
+            data = [conn.to_dict() for conn in self._index.values()]
+            atomic_write_json(self.connections_file, data)
+        self._signature = self._file_signature()
+        self._save_snapshot(
+            list(self._index.values()), file_signature(self.connections_file)
+        )
+    
+    def _apply(self, op: str, name: str,
+               connection: Optional[Connection]) -> bool:
+        """Apply one add/update/delete to the in-memory index."""
+        self._groups = None
+        if op == 'add':
+            if connection.name in self._index:
+                return False
+            self._index[connection.name] = connection
+            return True
+        
+        if op == 'update':
+            if name not in self._index:
+                return False
+            if connection.name == name:
+                self._index[name] = connection
+            else:
+                # Rebuild so the renamed entry keeps its position
+                self._index = {
+                    (connection.name if key == name else key):
+                    (connection if key == name else conn)
+                    for key, conn in self._index.items()
+                    if key != connection.name
+                }
+            return True
+        
+        if op == 'delete':
+            return self._index.pop(name, None) is not None
+        
+        raise ValueError(f"Unknown operation: {op}")
+    
+    def _persist(self, op: str, name: str,
+                 connection: Optional[Connection]) -> None:
+        """Write a mutation that was just applied to the index."""
+        self._write_index()
+    
+    def _mutate(self, op: str, name: str,
+                connection: Optional[Connection] = None) -> bool:
+        """Apply a mutation to the index and persist it."""
+        with self.file_lock:
+            # Pick up whatever another instance wrote before we got the lock
+            self._ensure_loaded()
+            if not self._apply(op, name, connection):
+                return False
+            self._persist(op, name, connection)
+            return True
+    
+    def save_connections(self, connections: List[Connection]) -> None:
+        """Save connections to JSON file."""
+        with self.file_lock:
+            self._index = {conn.name: conn for conn in connections}
+            self._groups = None
+            self._loaded = True
+            self._write_index()
+    
+    def load_connections(self) -> List[Connection]:
+        """Load connections, re-reading the file only if it changed."""
+        self._ensure_loaded()
+        return list(self._index.values())
+    
+    @property
+    def history(self):
+        """Usage history of the connections, ranked by frecency."""
+        if self._history is None:
+            from turbovncui.utils.history import HistoryStore
+            self._history = HistoryStore(self.config_dir)
+            if not self._history.history_file.exists():
+                self._seed_history()
+        return self._history
+    
+    def _seed_history(self) -> None:
+        """Start a new history from the old last_connection.json."""
         try:
             with open(self.last_connection_file, 'r') as f:
-                data = json.load(f)
-            return Connection.from_dict(data)
-        except (json.JSONDecodeError, KeyError, ValueError):
+                name = json.load(f)['name']
+            when = os.stat(self.last_connection_file).st_mtime
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return
+        self._history.record(name, when)
+    
+    def save_last_connection(self, connection: Connection) -> None:
+        """Record a connect in the usage history."""
+        self.history.record(connection.name)
+    
+    def load_last_connection(self) -> Optional[Connection]:
+        """Load the most recently used connection."""
+        name = self.history.last_used()
+        if name is None:
             return None
+        return self.get_connection_by_name(name)
     
-    def add_connection(self, connection: Connection) -> None:
-        """Add a new connection."""
-        connections = self.load_connections()
-        connections.append(connection)
-        self.save_connections(connections)
+    def add_connection(self, connection: Connection) -> bool:
+        """Add a new connection, unless one with its name exists."""
+        return self._mutate('add', connection.name, connection)
+    
+    def add_connections(self, connections: List[Connection],
+                        select: Optional[Callable] = None) -> List[Connection]:
+        """Add many connections with a single write; returns those added.
+
+        Connections whose name is taken are left out. If select is given,
+        it is called with the stored connections while the store is locked
+        and returns which of the new ones to add, so a check against the
+        store can't race another instance's writes.
+        """
+        with self.file_lock:
+            self._ensure_loaded()
+            if select is not None:
+                connections = select(list(self._index.values()))
+            added = [
+                connection for connection in connections
+                if self._apply('add', connection.name, connection)
+            ]
+            if added:
+                self._write_index()
+            return added
+    
+    def watched_paths(self) -> List[Path]:
+        """Paths whose changes mean another instance edited the store."""
+        # The directory catches atomic replaces and newly created files
+        return [self.config_dir, self.connections_file]
+    
+    def has_changed(self) -> bool:
+        """Check whether the store changed since this instance last saw it."""
+        return not self._loaded or self._file_signature() != self._signature
+    
+    def close(self) -> None:
+        """Release the store; the JSON files are only open while in use."""
     
     def update_connection(self, old_name: str, new_connection: Connection) -> bool:
         """Update an existing connection."""
-        connections = self.load_connections()
-        for i, conn in enumerate(connections):
-            if conn.name == old_name:
-                connections[i] = new_connection
-                self.save_connections(connections)
-                return True
-        return False
+        return self._mutate('update', old_name, new_connection)
     
     def delete_connection(self, name: str) -> bool:
         """Delete a connection by name."""
-        connections = self.load_connections()
-        original_count = len(connections)
-        connections = [
-            conn for conn in connections
-            if conn.name != name
-        ]
-        
-        if len(connections) < original_count:
-            self.save_connections(connections)
-            return True
-        return False
+        return self._mutate('delete', name)
+    
+    def has_connection(self, name: str) -> bool:
+        """Check whether a connection with this name exists."""
+        self._ensure_loaded()
+        return name in self._index
     
     def get_connection_by_name(self, name: str) -> Optional[Connection]:
         """Get a connection by name."""
+        self._ensure_loaded()
+        return self._index.get(name)
+    
+    def _matches(self, connection: Connection, text: str) -> bool:
+        """Check if text appears in the connection's name, host or username."""
+        text = text.lower()
+        return (text in connection.name.lower() or
+                text in connection.host.lower() or
+                text in (connection.username or "").lower())
+    
+    def query_connections(self, text: Optional[str] = None, offset: int = 0,
+                          limit: Optional[int] = None) -> List[Connection]:
+        """Get one page of connections, optionally filtered by text."""
         connections = self.load_connections()
-        for conn in connections:
-            if conn.name == name:
-                return conn
-        return None 
\ No newline at end of file
+        if text:
+            connections = [c for c in connections if self._matches(c, text)]
+        end = None if limit is None else offset + limit
+        return connections[offset:end]
+    
+    def count_connections(self, text: Optional[str] = None) -> int:
+        """Count connections, optionally filtered by text."""
+        self._ensure_loaded()
+        if not text:
+            return len(self._index)
+        return sum(1 for c in self._index.values() if self._matches(c, text))
+    
+    def _group_index(self) -> Dict[str, List[str]]:
+        """Get the names of the connections directly in each group."""
+        self._ensure_loaded()
+        if self._groups is None:
+            with tracing.span("db.group_index", count=len(self._index)):
+                groups: Dict[str, List[str]] = {}
+                for conn in self._index.values():
+                    groups.setdefault(conn.group or "", []).append(conn.name)
+                self._groups = groups
+        return self._groups
+    
+    def group_counts(self) -> Dict[str, int]:
+        """Count the connections directly in each group ("" for none).
+        
+        Parent groups with no connections of their own are left out;
+        callers derive them (and totals) from the paths.
+        """
+        return {
+            group: len(names) for group, names in self._group_index().items()
+        }
+    
+    def query_group(self, group: Optional[str], offset: int = 0,
+                    limit: Optional[int] = None) -> List[Connection]:
+        """Get one page of the connections directly in a group."""
+        names = self._group_index().get(group or "", [])
+        end = None if limit is None else offset + limit
+        return [self._index[name] for name in names[offset:end]]
+
+
+def open_database(config_dir: Optional[str] = None,
+                  backend: Optional[str] = None) -> ConnectionDatabase:
+    """Open the connection database with the configured storage backend.
+
+    The backend is "json" (default), "journal" or "sqlite", and can also
+    be picked with the TURBOVNCUI_STORAGE environment variable.
+    """
+    if backend is None:
+        backend = os.environ.get("TURBOVNCUI_STORAGE", "json")
+    
+    if backend == "json":
+        return ConnectionDatabase(config_dir)
+    if backend == "journal":
+        from turbovncui.utils.journal import JournaledConnectionDatabase
+        return JournaledConnectionDatabase(config_dir)
+    if backend == "sqlite":
+        from turbovncui.utils.sqlite_database import SQLiteConnectionDatabase
+        return SQLiteConnectionDatabase(config_dir)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,300 @@
+import asyncio
+import ipaddress
+import re
+import time
+from dataclasses import dataclass
+from typing import (
+    Callable, Iterable, Iterator, List, Optional, Set, Tuple, Union
+)
+from turbovncui.utils.health import REFUSED, check_rfb
+
+try:
+    import resource
+except ImportError:
+    # No RLIMIT_NOFILE on Windows; only the concurrency cap applies there
+    resource = None
+
+
+# Displays :0 to :99
+DEFAULT_PORTS = "5900-5999"
+# File descriptors left to the rest of the app when capping concurrency
+RESERVED_FDS = 128
+# Refuse sweeps bigger than this many probes (a /16 of 100 ports is 6.5M)
+MAX_PROBES = 1 << 24
+# Seconds between progress reports
+PROGRESS_INTERVAL = 0.1
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+Address = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def parse_networks(text: str) -> List[Network]:
+    """Parse comma/space separated CIDR ranges or single addresses."""
+    networks = []
+    for item in re.split(r"[\s,]+", text.strip()):
+        if not item:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(item, strict=False))
+        except ValueError:
+            raise ValueError(f"Not an address or CIDR range: {item}")
+    if not networks:
+        raise ValueError("No address ranges given")
+    return networks
+
+
+def parse_ports(text: str) -> List[int]:
+    """Parse ports and port ranges like "5900-5910, 5800"."""
+    ports = set()
+    for item in re.split(r"[\s,]+", text.strip()):
+        if not item:
+            continue
+        first, sep, last = item.partition("-")
+        try:
+            low = int(first)
+            high = int(last) if sep else low
+        except ValueError:
+            raise ValueError(f"Not a port or port range: {item}")
+        if not 1 <= low <= high <= 65535:
+            raise ValueError(f"Not a valid port range: {item}")
+        ports.update(range(low, high + 1))
+    if not ports:
+        raise ValueError("No ports given")
+    return sorted(ports)
+
+
+def host_count(network: Network) -> int:
+    """Number of addresses network_hosts() yields, without listing them."""
+    if network.version == 4 and network.prefixlen <= 30:
+        # Without the network and broadcast addresses
+        return network.num_addresses - 2
+    if network.version == 6 and network.prefixlen <= 126:
+        # Without the subnet-router anycast address
+        return network.num_addresses - 1
+    return network.num_addresses
+
+
+def network_hosts(network: Network) -> Iterator[Address]:
+    """Addresses of a network to probe, as many as host_count() says."""
+    # A single address or a point-to-point /31 (/127) has no network or
+    # broadcast address to leave out, and hosts() yields nothing for a
+    # /32 on older Pythons
+    if network.prefixlen >= network.max_prefixlen - 1:
+        return iter(network)
+    return network.hosts()
+
+
+def fd_limited_concurrency(concurrency: int) -> int:
+    """Cap concurrency so every probe's socket fits under the fd limit."""
+    if resource is None:
+        return concurrency
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return concurrency
+    return max(1, min(concurrency, soft - RESERVED_FDS))
+
+
+@dataclass
+class DiscoveredServer:
+    """A VNC server that answered a probe with an RFB banner."""
+    host: str
+    port: int
+    server_version: str
+    connect_ms: float
+
+    def suggested_name(self) -> str:
+        """Name for a new connection, in vncviewer's host:display form."""
+        if 5900 <= self.port < 6000:
+            return f"{self.host}:{self.port - 5900}"
+        return f"{self.host}::{self.port}"
+
+    def to_record(self, group: Optional[str] = None) -> dict:
+        """Convert to a record for importer.import_records()."""
+        return {'name': self.suggested_name(), 'host': self.host,
+                'port': self.port, 'group': group}
+
+
+@dataclass
+class ScanStats:
+    """What a scan did."""
+    probes: int = 0
+    # Hosts that accepted or refused a connection
+    live_hosts: int = 0
+    found: int = 0
+    elapsed: float = 0.0
+    cancelled: bool = False
+
+    def summary(self) -> str:
+        """One-line description of the scan."""
+        text = (f"Found {self.found} VNC servers on {self.live_hosts} "
+                f"live hosts ({self.probes} probes in {self.elapsed:.1f}s)")
+        if self.cancelled:
+            text += ", stopped early"
+        return text
+
+
+class RateLimiter:
+    """Spaces out events on one event loop to at most `rate` per second."""
+
+    def __init__(self, rate: float):
+        """Initialize; a rate of 0 means no limit."""
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        """Wait for this event's slot."""
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next)
+        self._next = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class SubnetScanner:
+    """Sweeps address and port ranges for VNC servers.
+
+    A fixed pool of `concurrency` probe tasks pulls targets from a shared
+    generator, so a sweep never holds more than that many sockets (or
+    tasks) however big the range is, and connects are started at most
+    `rate` per second. A target counts as a VNC server only if it sends
+    an RFB banner within `timeout`.
+
+    With skip_dead_hosts, every host is first probed on the first port
+    only, and the other ports are only tried on hosts that accepted or
+    refused that connection. Most of a sparse /16 never answers, so this
+    cuts a sweep of 100 ports by almost 100x; hosts that silently drop
+    the first port are missed.
+    """
+
+    def __init__(self, concurrency: int = 512, rate: float = 2000.0,
+                 timeout: float = 1.0, skip_dead_hosts: bool = True):
+        """Initialize the scanner with its limits."""
+        self.concurrency = fd_limited_concurrency(concurrency)
+        self.rate = rate
+        self.timeout = timeout
+        self.skip_dead_hosts = skip_dead_hosts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def count_probes(self, networks: List[Network],
+                     ports: List[int]) -> int:
+        """Most probes a sweep can make."""
+        return sum(host_count(net) for net in networks) * len(ports)
+
+    async def scan_async(
+            self, networks: List[Network], ports: List[int],
+            on_found: Callable[[DiscoveredServer], None],
+            on_progress: Optional[Callable[[int, int], None]] = None
+    ) -> ScanStats:
+        """Sweep the ranges, calling on_found for each server as it answers.
+
+        on_progress(done, total) is called every PROGRESS_INTERVAL
+        seconds; with skip_dead_hosts, total grows as live hosts turn up.
+        Raises ValueError if the sweep is bigger than MAX_PROBES.
+        """
+        if self.count_probes(networks, ports) > MAX_PROBES:
+            raise ValueError(
+                f"That is more than {MAX_PROBES} probes; use smaller "
+                f"ranges or fewer ports"
+            )
+
+        stats = ScanStats()
+        start = time.monotonic()
+        limiter = RateLimiter(self.rate)
+        host_total = sum(host_count(net) for net in networks)
+        total = host_total if self.skip_dead_hosts else (
+            host_total * len(ports)
+        )
+        live: Set[str] = set()
+        last_report = 0.0
+
+        def report(force: bool = False) -> None:
+            nonlocal last_report
+            now = time.monotonic()
+            if on_progress is not None and (
+                    force or now - last_report >= PROGRESS_INTERVAL):
+                last_report = now
+                on_progress(stats.probes, total)
+
+        async def probe(targets: Iterator[Tuple[str, int]]) -> None:
+            nonlocal total
+            # The pool shares one iterator, so each target is probed once
+            for host, port in targets:
+                await limiter.wait()
+                result = await check_rfb(host, port, self.timeout)
+                stats.probes += 1
+                answered = (result.connect_ms is not None or
+                            result.error == REFUSED)
+                if answered and host not in live:
+                    live.add(host)
+                    if self.skip_dead_hosts:
+                        total += len(ports) - 1
+                if result.reachable:
+                    stats.found += 1
+                    on_found(DiscoveredServer(
+                        host, port, result.server_version,
+                        result.connect_ms
+                    ))
+                report()
+
+        async def run_pool(targets: Iterable[Tuple[str, int]]) -> None:
+            targets = iter(targets)
+            await asyncio.gather(
+                *(probe(targets) for _ in range(self.concurrency))
+            )
+
+        try:
+            if self.skip_dead_hosts:
+                await run_pool(
+                    (str(host), ports[0])
+                    for net in networks for host in network_hosts(net)
+                )
+                await run_pool(
+                    (host, port) for host in sorted(live)
+                    for port in ports[1:]
+                )
+            else:
+                await run_pool(
+                    (str(host), port)
+                    for net in networks for host in network_hosts(net)
+                    for port in ports
+                )
+        except asyncio.CancelledError:
+            stats.cancelled = True
+        stats.live_hosts = len(live)
+        stats.elapsed = time.monotonic() - start
+        report(force=True)
+        return stats
+
+    def scan(self, networks: List[Network], ports: List[int],
+             on_found: Callable[[DiscoveredServer], None],
+             on_progress: Optional[Callable[[int, int], None]] = None
+             ) -> ScanStats:
+        """Blocking wrapper around scan_async, for worker threads.
+
+        The callbacks run on the calling thread. cancel() from another
+        thread stops the sweep; the stats then say so.
+        """
+        async def run():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            try:
+                return await self.scan_async(
+                    networks, ports, on_found, on_progress
+                )
+            finally:
+                self._loop = self._task = None
+
+        return asyncio.run(run())
+
+    def cancel(self) -> None:
+        """Stop a sweep running in scan() on another thread."""
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # The loop finished in the meantime
+                pass
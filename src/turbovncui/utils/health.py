@@ -0,0 +1,187 @@
+import asyncio
+import errno
+import re
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from turbovncui.models.connection import Connection
+
+
+# The 12-byte greeting every RFB server sends first, e.g. b"RFB 003.008\n"
+RFB_BANNER_RE = re.compile(rb"^RFB (\d{3})\.(\d{3})\n$")
+# Error text for a refused connection: the host is up, the port closed
+REFUSED = "connection refused"
+
+
+def parse_rfb_banner(banner: bytes) -> Optional[str]:
+    """Get the protocol version ("3.8") from an RFB banner, or None."""
+    match = RFB_BANNER_RE.match(banner)
+    if not match:
+        return None
+    return f"{int(match.group(1))}.{int(match.group(2))}"
+
+
+def describe_socket_error(error: OSError) -> str:
+    """Short human-readable reason a connection attempt failed."""
+    if isinstance(error, ConnectionRefusedError):
+        return REFUSED
+    if isinstance(error, socket.gaierror):
+        return "unknown host"
+    if error.errno == errno.EHOSTUNREACH:
+        return "no route to host"
+    if error.errno == errno.ENETUNREACH:
+        return "network unreachable"
+    return error.strerror or str(error)
+
+
+@dataclass
+class HealthResult:
+    """Outcome of one health check against host:port."""
+    host: str
+    port: int
+    reachable: bool
+    checked_at: float
+    connect_ms: Optional[float] = None
+    handshake_ms: Optional[float] = None
+    server_version: Optional[str] = None
+    error: Optional[str] = None
+
+    def summary(self) -> str:
+        """Short status text for the connection list."""
+        if self.reachable:
+            return f"up {self.connect_ms:.0f} ms"
+        return f"down: {self.error}"
+
+
+async def check_rfb(host: str, port: int,
+                    timeout: float = 3.0) -> HealthResult:
+    """Connect to host:port and read the RFB ProtocolVersion banner."""
+    checked_at = time.time()
+    start = time.monotonic()
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+    except asyncio.TimeoutError:
+        return HealthResult(host, port, False, checked_at, error="timeout")
+    except OSError as e:
+        return HealthResult(host, port, False, checked_at,
+                            error=describe_socket_error(e))
+    connected = time.monotonic()
+
+    try:
+        banner = await asyncio.wait_for(reader.readexactly(12), timeout)
+        version = parse_rfb_banner(banner)
+        if version is None:
+            error = "not a VNC server"
+        else:
+            error = None
+    except asyncio.TimeoutError:
+        version, error = None, "no RFB banner"
+    except (asyncio.IncompleteReadError, OSError):
+        version, error = None, "connection closed"
+    finally:
+        # Also when a sweep is cancelled mid-read
+        writer.close()
+    finished = time.monotonic()
+
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+
+    return HealthResult(
+        host, port,
+        reachable=version is not None,
+        checked_at=checked_at,
+        connect_ms=(connected - start) * 1000,
+        handshake_ms=(finished - connected) * 1000,
+        server_version=version,
+        error=error,
+    )
+
+
+class HealthMonitor:
+    """Checks many VNC servers concurrently and caches the results.
+
+    Checks run on an asyncio loop with at most `concurrency` sockets open
+    at once. Results are cached per host:port for `ttl` seconds, so
+    connections sharing a server are only checked once.
+    """
+
+    def __init__(self, concurrency: int = 256, timeout: float = 3.0,
+                 ttl: float = 60.0):
+        """Initialize the monitor with concurrency, timeout and cache TTL."""
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Dict[Tuple[str, int], HealthResult] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def cached(self, connection: Connection) -> Optional[HealthResult]:
+        """Get a still-fresh result for a connection's server."""
+        with self._lock:
+            result = self._cache.get((connection.host, connection.port))
+        if result is None or time.time() - result.checked_at > self.ttl:
+            return None
+        return result
+
+    async def check_all_async(
+            self, connections: List[Connection]) -> Dict[str, HealthResult]:
+        """Check every connection whose cached result has expired."""
+        # Servers behind a gateway can't be probed from here
+        connections = [c for c in connections if not c.gateway]
+        targets = set()
+        for connection in connections:
+            if self.cached(connection) is None:
+                targets.add((connection.host, connection.port))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def check(host: str, port: int) -> None:
+            async with semaphore:
+                result = await check_rfb(host, port, self.timeout)
+            with self._lock:
+                self._cache[(host, port)] = result
+
+        await asyncio.gather(*(check(host, port) for host, port in targets))
+
+        results = {}
+        with self._lock:
+            for connection in connections:
+                result = self._cache.get((connection.host, connection.port))
+                if result is not None:
+                    results[connection.name] = result
+        return results
+
+    def check_all(self, connections: List[Connection]
+                  ) -> Dict[str, HealthResult]:
+        """Blocking wrapper around check_all_async, for worker threads.
+        
+        Returns an empty dict if the round is cancelled with cancel().
+        """
+        async def run():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            try:
+                return await self.check_all_async(connections)
+            except asyncio.CancelledError:
+                return {}
+            finally:
+                self._loop = self._task = None
+        
+        return asyncio.run(run())
+    
+    def cancel(self) -> None:
+        """Cancel a round running in check_all() on another thread."""
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # The loop finished in the meantime
+                pass
@@ -0,0 +1,299 @@
+import heapq
+import json
+import math
+import os
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from turbovncui.utils.database import FileLock, file_signature
+
+
+# A connect counts half as much after two weeks
+HALF_LIFE = 14 * 24 * 3600.0
+DECAY = math.log(2) / HALF_LIFE
+# Entries whose weight has decayed below this are dropped on compaction
+MIN_SCORE = 1e-3
+
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflow."""
+    if a == -math.inf:
+        return b
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+@dataclass
+class UsageEntry:
+    """How often and how recently one connection was used.
+
+    The frecency score is the sum of exp(-DECAY * age) over all connects.
+    It is kept as log_score = log(sum(exp(DECAY * t))), relative to the
+    epoch, so the order of entries never changes as time passes and only
+    a new event can reorder them.
+    """
+    name: str
+    log_score: float = -math.inf
+    count: int = 0
+    last_used: float = 0.0
+
+    def score(self, now: Optional[float] = None) -> float:
+        """Frecency right now: about 1 per recent connect, decaying."""
+        if now is None:
+            now = time.time()
+        return math.exp(self.log_score - DECAY * now)
+
+    def to_dict(self) -> dict:
+        """Convert to a compacted history record."""
+        return {"op": "score", "name": self.name,
+                "log_score": self.log_score, "count": self.count,
+                "last_used": self.last_used}
+
+
+class HistoryStore:
+    """Connection usage history, ranked by frecency.
+
+    Connects are appended to history.jsonl in the config directory, one
+    JSON line each, so recording one never rewrites the file. Once
+    `compact_after` events have piled up, the log is rewritten as one
+    score record per connection, dropping entries that have decayed away
+    and keeping at most `max_entries`.
+
+    Scores live in memory, and the `top_k` best are kept in order as they
+    change, so "most used" and "last used" never scan the history. The
+    file is re-read only when another process has changed it.
+    """
+
+    def __init__(self, config_dir: Path, top_k: int = 20,
+                 compact_after: int = 1000, max_entries: int = 5000):
+        """Initialize the store; the file is read on first use."""
+        self.history_file = Path(config_dir) / "history.jsonl"
+        self.file_lock = FileLock(Path(config_dir) / "history.lock")
+        self.top_k = top_k
+        self.compact_after = compact_after
+        self.max_entries = max_entries
+
+        self._entries: Dict[str, UsageEntry] = {}
+        # Best entries first, at most top_k of them
+        self._top: List[UsageEntry] = []
+        self._last: Optional[UsageEntry] = None
+        self._events = 0
+        self._signature: Optional[tuple] = None
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        """(Re)load the history if it is new or another process wrote it."""
+        signature = file_signature(self.history_file)
+        if self._loaded and signature == self._signature:
+            return
+
+        self._loaded = False
+        self._entries = {}
+        self._last = None
+        self._events = 0
+        try:
+            with open(self.history_file, 'r') as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # A torn or foreign line; skip it
+                        continue
+        except OSError:
+            pass
+        self._rebuild_top()
+        self._signature = signature
+        self._loaded = True
+
+    def _apply(self, record: dict) -> None:
+        """Apply one history record to the in-memory scores."""
+        op = record["op"]
+        name = record["name"]
+        if op == "connect":
+            self._events += 1
+            when = float(record["t"])
+            entry = self._entries.get(name)
+            if entry is None:
+                entry = self._entries[name] = UsageEntry(name)
+            entry.log_score = _log_add(entry.log_score, DECAY * when)
+            entry.count += 1
+            entry.last_used = max(entry.last_used, when)
+            self._note_used(entry)
+            if self._loaded:
+                self._promote(entry)
+        elif op == "score":
+            entry = UsageEntry(name, float(record["log_score"]),
+                               int(record["count"]),
+                               float(record["last_used"]))
+            self._entries[name] = entry
+            self._note_used(entry)
+        elif op == "forget":
+            self._events += 1
+            entry = self._entries.pop(name, None)
+            if entry is not None:
+                self._dropped(entry)
+        elif op == "rename":
+            self._events += 1
+            entry = self._entries.pop(name, None)
+            if entry is None:
+                return
+            self._dropped(entry)
+            target = self._entries.get(record["to"])
+            if target is None:
+                entry.name = record["to"]
+                target = self._entries[entry.name] = entry
+            else:
+                target.log_score = _log_add(target.log_score, entry.log_score)
+                target.count += entry.count
+                target.last_used = max(target.last_used, entry.last_used)
+            self._note_used(target)
+            if self._loaded:
+                self._promote(target)
+
+    def _note_used(self, entry: UsageEntry) -> None:
+        """Track the most recently used entry."""
+        if self._last is None or entry.last_used >= self._last.last_used:
+            self._last = entry
+
+    def _promote(self, entry: UsageEntry) -> None:
+        """Move an entry whose score went up into place in the top list.
+
+        Scores only rise between rebuilds, so an entry outside the top
+        list can only get in by beating its current last member.
+        """
+        if entry not in self._top:
+            if len(self._top) < self.top_k:
+                self._top.append(entry)
+            elif entry.log_score > self._top[-1].log_score:
+                self._top[-1] = entry
+            else:
+                return
+        self._top.sort(key=lambda e: e.log_score, reverse=True)
+
+    def _dropped(self, entry: UsageEntry) -> None:
+        """Rebuild derived state after an entry went away."""
+        if self._loaded and entry in self._top:
+            self._rebuild_top()
+        if self._last is entry:
+            self._last = max(self._entries.values(),
+                             key=lambda e: e.last_used, default=None)
+
+    def _rebuild_top(self) -> None:
+        """Recompute the top list from all entries."""
+        self._top = heapq.nlargest(self.top_k, self._entries.values(),
+                                   key=lambda e: e.log_score)
+
+    def _append(self, record: dict) -> None:
+        """Append a record to the log and apply it."""
+        with self.file_lock:
+            self._ensure_loaded()
+            with open(self.history_file, 'a') as f:
+                f.write(json.dumps(record) + "\n")
+            self._apply(record)
+            self._signature = file_signature(self.history_file)
+            if self._events >= self.compact_after:
+                self.compact()
+
+    def record(self, name: str, when: Optional[float] = None) -> None:
+        """Record that a connection was used."""
+        if when is None:
+            when = time.time()
+        self._append({"op": "connect", "name": name, "t": when})
+
+    def forget(self, name: str) -> None:
+        """Drop a deleted connection's history."""
+        self._append({"op": "forget", "name": name})
+
+    def rename(self, old_name: str, new_name: str) -> None:
+        """Carry a renamed connection's history over to its new name."""
+        if old_name != new_name:
+            self._append({"op": "rename", "name": old_name, "to": new_name})
+
+    def compact(self) -> None:
+        """Rewrite the log as one score record per connection."""
+        with self.file_lock:
+            self._ensure_loaded()
+            now = time.time()
+            kept = heapq.nlargest(
+                self.max_entries,
+                (e for e in self._entries.values()
+                 if e.score(now) >= MIN_SCORE),
+                key=lambda e: e.log_score
+            )
+
+            fd, tmp_path = tempfile.mkstemp(
+                dir=str(self.history_file.parent),
+                prefix=f".{self.history_file.name}.", suffix=".tmp"
+            )
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    for entry in kept:
+                        f.write(json.dumps(entry.to_dict()) + "\n")
+                os.replace(tmp_path, self.history_file)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+
+            self._entries = {entry.name: entry for entry in kept}
+            self._last = max(kept, key=lambda e: e.last_used, default=None)
+            self._events = 0
+            self._rebuild_top()
+            self._signature = file_signature(self.history_file)
+
+    def most_used(self, limit: Optional[int] = None) -> List[str]:
+        """Names of the most used connections, best first (up to top_k)."""
+        with self.file_lock:
+            self._ensure_loaded()
+            return [entry.name for entry in self._top[:limit]]
+
+    def last_used(self) -> Optional[str]:
+        """Name of the most recently used connection."""
+        with self.file_lock:
+            self._ensure_loaded()
+            return self._last.name if self._last is not None else None
+
+    def entry(self, name: str) -> Optional[UsageEntry]:
+        """Usage of one connection, if it was ever used."""
+        with self.file_lock:
+            self._ensure_loaded()
+            return self._entries.get(name)
+
+    def best_of(self, names: Iterable[str]) -> Optional[str]:
+        """The most used of some candidate names (the first on a tie)."""
+        with self.file_lock:
+            self._ensure_loaded()
+            best = None
+            best_score = -math.inf
+            for name in names:
+                if best is None:
+                    best = name
+                entry = self._entries.get(name)
+                if entry is not None and entry.log_score > best_score:
+                    best, best_score = name, entry.log_score
+            return best
+
+
+def resolve_connection(db, query: Optional[str]):
+    """Find the connection meant by a name, or the best match for text.
+
+    An exact name wins; otherwise the most used connection whose name or
+    host contains the text. Without a query, the most used connection.
+    """
+    if query is None:
+        names = db.history.most_used(1)
+        return db.get_connection_by_name(names[0]) if names else None
+
+    connection = db.get_connection_by_name(query)
+    if connection is not None:
+        return connection
+    # query_connections() also matches usernames, which would let "bob"
+    # pick whatever connection logs in as bob
+    text = query.lower()
+    candidates = [
+        c for c in db.query_connections(query)
+        if text in c.name.lower() or text in c.host.lower()
+    ]
+    name = db.history.best_of(c.name for c in candidates)
+    return db.get_connection_by_name(name) if name is not None else None
@@ -0,0 +1,335 @@
+import csv
+import os
+import re
+import shlex
+from dataclasses import dataclass, field
+from itertools import product
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from turbovncui.models.connection import Connection
+
+
+FORMATS = ("ssh", "csv", "tsv", "ini", "yaml")
+
+# Column headers accepted for each field in CSV/TSV files
+CSV_COLUMNS = {
+    'name': ('name', 'alias', 'label'),
+    'host': ('host', 'hostname', 'address', 'ip'),
+    'port': ('port', 'vnc_port'),
+    'username': ('username', 'user', 'login'),
+    'display': ('display', 'vnc_display'),
+    'gateway': ('gateway', 'bastion', 'jump_host', 'proxyjump'),
+    'group': ('group', 'folder'),
+}
+
+# Inventory variables mapped onto connection fields
+INVENTORY_VARS = {
+    'ansible_host': 'host',
+    'ansible_user': 'username',
+    'vnc_port': 'port',
+    'vnc_display': 'display',
+    'vnc_gateway': 'gateway',
+    'vnc_group': 'group',
+}
+
+# Inventory groups that every host is in; they don't make a folder
+IMPLICIT_GROUPS = ('all', 'ungrouped')
+
+# Ansible host ranges, e.g. render[01:50] or rack-[a:f]
+HOST_RANGE_RE = re.compile(r"\[([0-9]+|[a-z]):([0-9]+|[a-z])\]")
+
+
+@dataclass
+class ImportReport:
+    """What an import did with the records it read."""
+    added: int = 0
+    # Same host, port and username as a stored (or earlier) connection
+    skipped: int = 0
+    # Name already used by a connection to a different server
+    conflicted: int = 0
+    invalid: int = 0
+    conflicts: List[str] = field(default_factory=list)
+
+    def summary(self) -> str:
+        """One-line description of the import."""
+        text = (f"Added {self.added}, skipped {self.skipped} duplicates, "
+                f"{self.conflicted} name conflicts")
+        if self.invalid:
+            text += f", {self.invalid} invalid records"
+        return text
+
+
+def detect_format(path: str) -> Optional[str]:
+    """Guess the import format from a file name."""
+    name = os.path.basename(path).lower()
+    ext = os.path.splitext(name)[1]
+    if ext in (".csv", ".tsv", ".ini"):
+        return ext[1:]
+    if ext in (".yml", ".yaml"):
+        return "yaml"
+    if name in ("config", "ssh_config") or ext == ".conf":
+        return "ssh"
+    if name in ("hosts", "inventory"):
+        return "ini"
+    return None
+
+
+def parse_ssh_config(lines: Iterable[str]) -> Iterator[dict]:
+    """Yield one record per concrete alias in ssh_config Host blocks.
+
+    Wildcard patterns and Match blocks are skipped; HostName and User are
+    used when given, and the first ProxyJump hop becomes the gateway. The
+    SSH port is not the VNC port, so it is ignored.
+    """
+    aliases: List[str] = []
+    options: Dict[str, str] = {}
+
+    def flush():
+        for alias in aliases:
+            host = options.get('hostname', alias).replace("%h", alias)
+            jump = options.get('proxyjump', 'none').split(",")[0].strip()
+            yield {'name': alias, 'host': host,
+                   'username': options.get('user'),
+                   'gateway': jump if jump.lower() != 'none' else None}
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        parts = re.split(r"\s*=\s*|\s+", line, maxsplit=1)
+        keyword = parts[0].lower()
+        value = parts[1].strip() if len(parts) > 1 else ""
+
+        if keyword in ("host", "match"):
+            yield from flush()
+            options = {}
+            aliases = []
+            if keyword == "host":
+                aliases = [
+                    alias for alias in shlex.split(value)
+                    if not any(c in alias for c in "*?!")
+                ]
+        elif keyword not in options:
+            # As in ssh, the first value given for an option wins
+            options[keyword] = value.strip('"')
+    yield from flush()
+
+
+def parse_csv(f: TextIO, delimiter: str = ",") -> Iterator[dict]:
+    """Yield records from a CSV/TSV file with a header row."""
+    reader = csv.reader(f, delimiter=delimiter)
+    header = next(reader, None)
+    if header is None:
+        return
+
+    columns = {}
+    for i, title in enumerate(header):
+        title = title.strip().lower()
+        for key, aliases in CSV_COLUMNS.items():
+            if title in aliases and key not in columns:
+                columns[key] = i
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        yield {
+            key: row[i].strip() or None
+            for key, i in columns.items() if i < len(row)
+        }
+
+
+def expand_host_range(pattern: str) -> List[str]:
+    """Expand Ansible host ranges like node[01:20] into host names."""
+    spans = []
+    for start, end in HOST_RANGE_RE.findall(pattern):
+        if start.isdigit():
+            width = len(start) if start.startswith("0") else 0
+            spans.append([
+                str(i).zfill(width) for i in range(int(start), int(end) + 1)
+            ])
+        else:
+            spans.append([chr(c) for c in range(ord(start), ord(end) + 1)])
+    if not spans:
+        return [pattern]
+
+    template = HOST_RANGE_RE.sub("{}", pattern.replace("{", "{{").replace(
+        "}", "}}"))
+    return [template.format(*values) for values in product(*spans)]
+
+
+def _inventory_record(alias: str, variables: Dict[str, str],
+                      group: Optional[str] = None) -> dict:
+    """Map an inventory host and its variables onto a record."""
+    record = {'name': alias, 'host': alias, 'group': group}
+    for var, key in INVENTORY_VARS.items():
+        if variables.get(var) is not None:
+            record[key] = str(variables[var])
+    return record
+
+
+def parse_ini_inventory(lines: Iterable[str]) -> Iterator[dict]:
+    """Yield records from an Ansible INI inventory.
+
+    Host lines in plain [group] sections are read, and the section name
+    becomes the connection's group; [group:vars] and [group:children]
+    sections don't list hosts and are skipped.
+    """
+    in_hosts = True
+    group = None
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in "#;":
+            continue
+        if line.startswith("["):
+            in_hosts = ":" not in line
+            group = line.strip("[]").strip()
+            if group in IMPLICIT_GROUPS:
+                group = None
+            continue
+        if not in_hosts:
+            continue
+
+        try:
+            parts = shlex.split(line, comments=True)
+        except ValueError:
+            parts = line.split()
+        if not parts:
+            continue
+        variables = dict(
+            part.split("=", 1) for part in parts[1:] if "=" in part
+        )
+        for alias in expand_host_range(parts[0]):
+            yield _inventory_record(alias, variables, group)
+
+
+def parse_yaml_inventory(f: TextIO) -> Iterator[dict]:
+    """Yield records from an Ansible YAML inventory.
+
+    Needs PyYAML. YAML has no useful streaming form for a nested
+    inventory, so the document is loaded whole and walked group by group.
+    Nested groups become a group path, e.g. site1/cluster2/rack3.
+    """
+    try:
+        import yaml
+    except ImportError:
+        raise ImportError(
+            "Reading YAML inventories needs PyYAML (pip install PyYAML)"
+        )
+
+    pending = [(yaml.safe_load(f) or {}, None)]
+    while pending:
+        groups, parent_path = pending.pop()
+        if not isinstance(groups, dict):
+            continue
+        for name, group in groups.items():
+            if not isinstance(group, dict):
+                continue
+            path = parent_path
+            if str(name) not in IMPLICIT_GROUPS:
+                path = f"{parent_path}/{name}" if parent_path else str(name)
+            hosts = group.get('hosts') or {}
+            if isinstance(hosts, dict):
+                for pattern, variables in hosts.items():
+                    for alias in expand_host_range(str(pattern)):
+                        yield _inventory_record(alias, variables or {}, path)
+            if group.get('children'):
+                pending.append((group['children'], path))
+
+
+def read_records(f: TextIO, fmt: str) -> Iterator[dict]:
+    """Yield raw records from an open file in the given format."""
+    if fmt == "ssh":
+        return parse_ssh_config(f)
+    if fmt == "csv":
+        return parse_csv(f)
+    if fmt == "tsv":
+        return parse_csv(f, delimiter="\t")
+    if fmt == "ini":
+        return parse_ini_inventory(f)
+    if fmt == "yaml":
+        return parse_yaml_inventory(f)
+    raise ValueError(f"Unknown import format: {fmt}")
+
+
+def _to_connection(record: dict) -> Connection:
+    """Build a connection from a raw record, validating it."""
+    host = record.get('host')
+    if not host:
+        raise ValueError("no host")
+    port = record.get('port')
+    return Connection(
+        name=record.get('name') or host,
+        host=host,
+        port=int(port) if port else 5900,
+        username=record.get('username') or None,
+        display=record.get('display') or None,
+        gateway=record.get('gateway') or None,
+        group=record.get('group') or None,
+    )
+
+
+def _key(connection: Connection) -> Tuple[str, int, Optional[str],
+                                          Optional[str]]:
+    """Identify the server and account a connection points at."""
+    # Private addresses behind different bastions are different servers
+    return (connection.host.lower(), connection.port, connection.username,
+            connection.gateway)
+
+
+def import_records(db, records: Iterable[dict],
+                   dry_run: bool = False) -> ImportReport:
+    """Add new connections from records to db in one batched write.
+
+    A record is skipped when a connection to the same (host, port,
+    username, gateway) already exists, and counted as a conflict when its
+    name is taken by a connection to somewhere else. Both checks run while
+    the store is locked for the write.
+    """
+    report = ImportReport()
+    candidates = []
+    for record in records:
+        try:
+            candidates.append(_to_connection(record))
+        except (ValueError, TypeError) as e:
+            report.invalid += 1
+            print(f"Warning: skipping invalid record {record!r}: {e}")
+
+    def select(existing: List[Connection]) -> List[Connection]:
+        """Pick the candidates that are new to the stored connections."""
+        names = {connection.name for connection in existing}
+        keys = {_key(connection) for connection in existing}
+        new_connections = []
+        for connection in candidates:
+            key = _key(connection)
+            if key in keys:
+                report.skipped += 1
+                continue
+            if connection.name in names:
+                report.conflicted += 1
+                report.conflicts.append(connection.name)
+                continue
+
+            names.add(connection.name)
+            keys.add(key)
+            new_connections.append(connection)
+        return new_connections
+
+    if dry_run:
+        report.added = len(select(db.load_connections()))
+    elif candidates:
+        report.added = len(db.add_connections(candidates, select))
+    return report
+
+
+def import_file(db, path: str, fmt: Optional[str] = None,
+                dry_run: bool = False) -> ImportReport:
+    """Import connections from a file, detecting its format if not given."""
+    if fmt is None:
+        fmt = detect_format(path)
+        if fmt is None:
+            raise ValueError(
+                f"Can't tell the format of {path}; "
+                f"pick one of: {', '.join(FORMATS)}"
+            )
+    with open(path, 'r', newline='' if fmt in ("csv", "tsv") else None,
+              encoding='utf-8', errors='replace') as f:
+        return import_records(db, read_records(f, fmt), dry_run)
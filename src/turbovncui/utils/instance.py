@@ -0,0 +1,60 @@
+import json
+import os
+import socket
+from typing import Optional
+
+
+# Used before PyQt5 is imported, so only the standard library here; the
+# listening side is gui/instance_server.py
+SOCKET_NAME = "turbovncui.sock"
+# How long a second invocation waits for the running app to answer
+FORWARD_TIMEOUT = 2.0
+
+
+def socket_path() -> str:
+    """Path of the per-user socket the running app listens on."""
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, SOCKET_NAME)
+    return os.path.join(os.environ.get("TMPDIR", "/tmp"),
+                        f"turbovncui-{os.getuid()}.sock")
+
+
+def forward_request(request: dict,
+                    timeout: float = FORWARD_TIMEOUT) -> bool:
+    """Send a request to the running app; False if there is none.
+
+    The request is one JSON line, answered with "ok". A socket that
+    nobody listens on, or that belongs to another user, counts as no
+    running app. An app that accepts the request but is too busy to
+    answer in time still gets it, once its event loop runs again.
+    """
+    path = socket_path()
+    try:
+        if os.stat(path).st_uid != os.getuid():
+            return False
+    except OSError:
+        return False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+            sock.sendall(json.dumps(request).encode('utf-8') + b"\n")
+        except OSError:
+            return False
+        try:
+            return sock.makefile('rb').readline().strip() == b"ok"
+        except socket.timeout:
+            return True
+        except OSError:
+            return False
+
+
+def parse_request(line: bytes) -> Optional[dict]:
+    """Decode a request line, or None if it is malformed."""
+    try:
+        request = json.loads(line.decode('utf-8'))
+    except ValueError:
+        return None
+    return request if isinstance(request, dict) else None
@@ -0,0 +1,231 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, List, Optional
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import (
+    ConnectionDatabase, atomic_write_json, file_signature
+)
+
+
+class JournaledConnectionDatabase(ConnectionDatabase):
+    """Connection storage with an append-only change journal.
+
+    connections.json is treated as a snapshot. Each add/update/delete is
+    appended as one JSON line to connections.journal and fsynced, so a
+    write costs the size of the change rather than the whole inventory.
+    Loading replays the journal on top of the snapshot. Once the journal
+    grows past a size or entry threshold it is folded into a new snapshot
+    on a background thread.
+    """
+
+    def __init__(self, config_dir: Optional[str] = None,
+                 max_journal_entries: int = 1000,
+                 max_journal_bytes: int = 1024 * 1024):
+        """Initialize the journal files and compaction thresholds."""
+        super().__init__(config_dir)
+        self.journal_file = self.config_dir / "connections.journal"
+        # Journal being folded into the snapshot by the compactor
+        self.compacting_file = (
+            self.config_dir / "connections.journal.compacting"
+        )
+
+        self.max_journal_entries = max_journal_entries
+        self.max_journal_bytes = max_journal_bytes
+
+        self._lock = threading.RLock()
+        self._journal_entries = 0
+        self._compactor: Optional[threading.Thread] = None
+
+    def _file_signature(self) -> Optional[tuple]:
+        """Get the signatures of the snapshot and both journal files."""
+        return (
+            file_signature(self.connections_file),
+            file_signature(self.compacting_file),
+            file_signature(self.journal_file),
+        )
+
+    def _read_connections(self) -> List[Connection]:
+        """Load the snapshot and replay the journals on top of it."""
+        self._index = {
+            conn.name: conn for conn in super()._read_connections()
+        }
+        self._journal_entries = 0
+        for path in (self.compacting_file, self.journal_file):
+            self._journal_entries += self._replay(path)
+        return list(self._index.values())
+
+    def _replay(self, path) -> int:
+        """Apply every complete record in a journal file to the index."""
+        if not path.exists():
+            return 0
+
+        count = 0
+        with open(path, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    payload = record.get('payload')
+                    connection = (
+                        Connection.from_dict(payload) if payload else None
+                    )
+                    self._apply(record['op'], record['name'], connection)
+                except (json.JSONDecodeError, KeyError, TypeError,
+                        ValueError, AttributeError):
+                    # A torn last line from a crash mid-append
+                    print(f"Warning: skipping bad journal record in {path}")
+                    continue
+                count += 1
+        return count
+
+    def _ensure_loaded(self) -> None:
+        """Reload the index if any of the files changed."""
+        # Under the file lock, so we never see another instance halfway
+        # through swapping in a compacted snapshot
+        with self.file_lock, self._lock:
+            super()._ensure_loaded()
+
+    def _persist(self, op: str, name: str,
+                 connection: Optional[Connection]) -> None:
+        """Append one record to the journal and fsync it."""
+        self._append_records([(op, name, connection)])
+
+    def _append_records(self, records: list) -> None:
+        """Append (op, name, connection) records with a single fsync."""
+        lines = "".join(
+            json.dumps({
+                'op': op,
+                'name': name,
+                'payload': connection.to_dict() if connection else None,
+            }, separators=(',', ':')) + "\n"
+            for op, name, connection in records
+        )
+        with open(self.journal_file, 'a+b') as f:
+            # Don't glue this record onto a torn line left by a crash
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode())
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_entries += len(records)
+        self._signature = self._file_signature()
+        self._maybe_compact()
+
+    def _mutate(self, op: str, name: str,
+                connection: Optional[Connection] = None) -> bool:
+        """Apply and journal a mutation."""
+        with self.file_lock, self._lock:
+            return super()._mutate(op, name, connection)
+
+    def add_connections(self, connections: List[Connection],
+                        select: Optional[Callable] = None) -> List[Connection]:
+        """Add many connections as one journal append."""
+        with self.file_lock, self._lock:
+            self._ensure_loaded()
+            if select is not None:
+                connections = select(list(self._index.values()))
+            added = [
+                connection for connection in connections
+                if self._apply('add', connection.name, connection)
+            ]
+            if added:
+                self._append_records([
+                    ('add', connection.name, connection)
+                    for connection in added
+                ])
+            return added
+
+    def save_connections(self, connections: List[Connection]) -> None:
+        """Replace all connections with a fresh snapshot."""
+        self.wait_for_compaction()
+        with self.file_lock, self._lock:
+            super().save_connections(connections)
+            for path in (self.compacting_file, self.journal_file):
+                if path.exists():
+                    path.unlink()
+            self._journal_entries = 0
+            self._signature = self._file_signature()
+
+    def _maybe_compact(self) -> None:
+        """Start a background compaction if the journal is too big."""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+
+        signature = file_signature(self.journal_file)
+        journal_bytes = signature[2] if signature else 0
+        if (self._journal_entries < self.max_journal_entries and
+                journal_bytes < self.max_journal_bytes):
+            return
+        self.compact(background=True)
+
+    def compact(self, background: bool = False) -> None:
+        """Fold the journal into a new snapshot.
+
+        The current journal is renamed aside first, so new mutations go to
+        a fresh journal while the snapshot is being written.
+        """
+        self.wait_for_compaction()
+        with self.file_lock, self._lock:
+            self._ensure_loaded()
+            if self.compacting_file.exists() and self.journal_file.exists():
+                # Left over from an interrupted compaction; keep its records
+                with open(self.journal_file, 'r') as src, \
+                        open(self.compacting_file, 'a') as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                self.journal_file.unlink()
+            elif self.journal_file.exists():
+                os.replace(self.journal_file, self.compacting_file)
+            data = [conn.to_dict() for conn in self._index.values()]
+            # What the new snapshot folds together
+            folded = (file_signature(self.connections_file),
+                      file_signature(self.compacting_file))
+            self._journal_entries = 0
+            self._signature = self._file_signature()
+
+        if background:
+            self._compactor = threading.Thread(
+                target=self._write_snapshot, args=(data, folded), daemon=True
+            )
+            self._compactor.start()
+        else:
+            self._write_snapshot(data, folded)
+
+    def _write_snapshot(self, data: list, folded: tuple) -> None:
+        """Replace the snapshot and drop the folded journal.
+
+        The snapshot is written aside without holding any lock, then
+        swapped in under the file lock, but only if no other instance
+        replaced the snapshot or touched the folded journal in the
+        meantime; if one did, its own compaction already covers ours.
+        """
+        staging = self.config_dir / (
+            f".connections.json.{os.getpid()}.{threading.get_ident()}.new"
+        )
+        atomic_write_json(staging, data)
+        with self.file_lock, self._lock:
+            if (file_signature(self.connections_file),
+                    file_signature(self.compacting_file)) != folded:
+                staging.unlink()
+                return
+            os.replace(staging, self.connections_file)
+            if self.compacting_file.exists():
+                self.compacting_file.unlink()
+            self._signature = self._file_signature()
+
+    def watched_paths(self) -> List[Path]:
+        """The snapshot, the journal and the config directory."""
+        return super().watched_paths() + [self.journal_file]
+
+    def wait_for_compaction(self) -> None:
+        """Block until a running background compaction has finished."""
+        compactor = self._compactor
+        if (compactor is not None and compactor.is_alive() and
+                compactor is not threading.current_thread()):
+            compactor.join()
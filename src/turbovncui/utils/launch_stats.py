@@ -0,0 +1,170 @@
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+from turbovncui.utils.database import atomic_write_json
+
+
+# Latency histogram buckets grow by 25% from 50 ms, so a percentile read
+# back from the histogram is within about 12% of the true value
+BUCKET_BASE_MS = 50.0
+BUCKET_GROWTH = 1.25
+MAX_BUCKET = 40  # ~375 s; anything slower lands in the last bucket
+
+
+def bucket_for(latency_ms: float) -> int:
+    """Histogram bucket index for a latency."""
+    if latency_ms <= BUCKET_BASE_MS:
+        return 0
+    index = int(math.log(latency_ms / BUCKET_BASE_MS, BUCKET_GROWTH)) + 1
+    return min(index, MAX_BUCKET)
+
+
+def bucket_value(index: int) -> float:
+    """Representative latency (geometric middle) of a bucket, in ms."""
+    if index == 0:
+        return BUCKET_BASE_MS
+    low = BUCKET_BASE_MS * BUCKET_GROWTH ** (index - 1)
+    return low * math.sqrt(BUCKET_GROWTH)
+
+
+class ConnectionStats:
+    """Launch outcomes for one connection."""
+
+    def __init__(self, histogram: Optional[Dict[int, int]] = None,
+                 failures: Optional[Dict[str, int]] = None,
+                 last_phases: Optional[Dict[str, float]] = None):
+        """Initialize from stored counts."""
+        self.histogram = histogram or {}
+        self.failures = failures or {}
+        self.last_phases = last_phases or {}
+
+    @property
+    def launches(self) -> int:
+        """Launches that reached a connected viewer."""
+        return sum(self.histogram.values())
+
+    @property
+    def failure_count(self) -> int:
+        """Launches that failed."""
+        return sum(self.failures.values())
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Approximate latency percentile in ms, e.g. fraction=0.95."""
+        total = self.launches
+        if total == 0:
+            return None
+        rank = max(1, math.ceil(total * fraction))
+        seen = 0
+        for index in sorted(self.histogram):
+            seen += self.histogram[index]
+            if seen >= rank:
+                return bucket_value(index)
+        return None
+
+    def summary(self) -> Optional[str]:
+        """Short text for the connection list, e.g. 'p50 2.1s / p95 4.0s'."""
+        parts = []
+        p50 = self.percentile(0.5)
+        if p50 is not None:
+            parts.append(f"p50 {p50 / 1000:.1f}s / "
+                         f"p95 {self.percentile(0.95) / 1000:.1f}s")
+        if self.failures:
+            parts.append(f"{self.failure_count} failed")
+        return ", ".join(parts) or None
+
+    def to_dict(self) -> dict:
+        """Convert to the stats file format."""
+        return {
+            "histogram": {str(k): v for k, v in self.histogram.items()},
+            "failures": self.failures,
+            "last_phases": self.last_phases,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'ConnectionStats':
+        """Create from the stats file format."""
+        return cls(
+            histogram={int(k): int(v)
+                       for k, v in data.get("histogram", {}).items()},
+            failures=dict(data.get("failures", {})),
+            last_phases=dict(data.get("last_phases", {})),
+        )
+
+
+class LaunchStats:
+    """Per-connection launch latency histograms and failure counts.
+
+    Kept in ~/.cache/turbovncui/launch_stats.json. Records arrive from the
+    session supervisor's thread, so access is serialized with a lock, and
+    the file is rewritten atomically after each one.
+    """
+
+    def __init__(self, cache_dir: str):
+        """Initialize with the cache directory."""
+        self.stats_file = Path(cache_dir) / "launch_stats.json"
+        self._lock = threading.Lock()
+        self._stats: Optional[Dict[str, ConnectionStats]] = None
+        # Bumped on every change so the GUI can skip unchanged redraws
+        self.version = 0
+
+    def _load(self) -> Dict[str, ConnectionStats]:
+        """Load the stats file the first time it is needed."""
+        if self._stats is None:
+            self._stats = {}
+            try:
+                with open(self.stats_file, 'r') as f:
+                    for name, item in json.load(f).items():
+                        self._stats[name] = ConnectionStats.from_dict(item)
+            except (OSError, json.JSONDecodeError, TypeError, ValueError,
+                    AttributeError):
+                pass
+        return self._stats
+
+    def _save(self) -> None:
+        """Write the stats file; losing it only loses history."""
+        data = {name: stats.to_dict() for name, stats in self._stats.items()}
+        try:
+            atomic_write_json(self.stats_file, data)
+        except OSError as e:
+            print(f"Warning: could not save launch stats: {e}")
+
+    def record_success(self, connection_name: str, latency_ms: float,
+                       phases: Optional[Dict[str, float]] = None) -> None:
+        """Record a launch that reached a connected, authenticated viewer."""
+        with self._lock:
+            stats = self._load().setdefault(connection_name,
+                                            ConnectionStats())
+            index = bucket_for(latency_ms)
+            stats.histogram[index] = stats.histogram.get(index, 0) + 1
+            if phases is not None:
+                stats.last_phases = phases
+            self.version += 1
+            self._save()
+
+    def record_failure(self, connection_name: str, reason: str) -> None:
+        """Record a launch that failed, by failure class."""
+        with self._lock:
+            stats = self._load().setdefault(connection_name,
+                                            ConnectionStats())
+            stats.failures[reason] = stats.failures.get(reason, 0) + 1
+            self.version += 1
+            self._save()
+
+    def stats_for(self, connection_name: str) -> Optional[ConnectionStats]:
+        """Stats for one connection, if it was ever launched."""
+        with self._lock:
+            return self._load().get(connection_name)
+
+    def all_stats(self) -> Dict[str, ConnectionStats]:
+        """Stats for every connection launched so far."""
+        with self._lock:
+            return dict(self._load())
+
+    def forget(self, connection_name: str) -> None:
+        """Drop a connection's stats."""
+        with self._lock:
+            if self._load().pop(connection_name, None) is not None:
+                self.version += 1
+                self._save()
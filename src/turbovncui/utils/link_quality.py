@@ -0,0 +1,253 @@
+import json
+import os
+import socket
+import statistics
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from turbovncui.models.profile import PerformanceSettings
+from turbovncui.utils import tracing
+from turbovncui.utils.database import atomic_write_json
+
+
+# Checked in order; the first rule whose limits the link fits wins.
+# A limit that is missing or None always matches.
+DEFAULT_RULES = [
+    {"max_rtt_ms": 2, "max_jitter_ms": 1,
+     "settings": {"encoding": "Tight", "jpeg_quality": 95,
+                  "jpeg_subsampling": "1X", "compress_level": 1}},
+    {"max_rtt_ms": 20, "max_jitter_ms": 10,
+     "settings": {"encoding": "Tight", "jpeg_quality": 80,
+                  "jpeg_subsampling": "2X", "compress_level": 1}},
+    {"max_rtt_ms": 80,
+     "settings": {"encoding": "Tight", "jpeg_quality": 30,
+                  "jpeg_subsampling": "4X", "compress_level": 1}},
+    {"settings": {"encoding": "Tight", "jpeg_quality": 20,
+                  "jpeg_subsampling": "4X", "compress_level": 2}},
+]
+# Upper limits a rule may set, in milliseconds
+RULE_LIMITS = ("max_rtt_ms", "max_jitter_ms", "max_handshake_ms")
+
+
+@dataclass
+class LinkMeasurement:
+    """Round-trip measurements to one VNC server, in milliseconds."""
+    host: str
+    port: int
+    rtt_ms: float
+    jitter_ms: float
+    handshake_ms: Optional[float]
+    measured_at: float
+
+
+@tracing.traced("link.measure")
+def measure_link(host: str, port: int, samples: int = 3,
+                 timeout: float = 1.0) -> Optional[LinkMeasurement]:
+    """Sample TCP connect RTT and the RFB handshake time to host:port.
+
+    The handshake time is measured from sending our ProtocolVersion to
+    receiving the server's security types, i.e. one application-level
+    round trip including server processing. Returns None if the server
+    can't be reached.
+    """
+    rtts = []
+    handshake_ms = None
+    for i in range(samples):
+        start = time.monotonic()
+        try:
+            sock = socket.create_connection((host, port), timeout=timeout)
+        except OSError:
+            return None
+        rtts.append((time.monotonic() - start) * 1000)
+
+        try:
+            if i == 0:
+                handshake_ms = _sample_handshake(sock)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+    return LinkMeasurement(
+        host=host,
+        port=port,
+        # Best case is the path latency; queueing shows up as the spread
+        rtt_ms=min(rtts),
+        jitter_ms=statistics.median(rtts) - min(rtts),
+        handshake_ms=handshake_ms,
+        measured_at=time.time(),
+    )
+
+
+def check_rule(rule: Any) -> None:
+    """Raise ValueError if a link rule can't be used."""
+    if not isinstance(rule, dict):
+        raise ValueError("not an object")
+    for limit in RULE_LIMITS:
+        value = rule.get(limit)
+        if value is not None and (isinstance(value, bool) or
+                                  not isinstance(value, (int, float))):
+            raise ValueError(f"{limit} must be a number")
+    settings = rule.get("settings")
+    if not isinstance(settings, dict):
+        raise ValueError("settings must be an object")
+    try:
+        PerformanceSettings(preset="custom", **settings)
+    except TypeError as e:
+        # An unknown or duplicate settings key
+        raise ValueError(str(e))
+
+
+def _sample_handshake(sock: socket.socket) -> Optional[float]:
+    """Time one RFB version exchange on a connected socket."""
+    banner = _recv_exactly(sock, 12)
+    if not banner.startswith(b"RFB "):
+        return None
+    start = time.monotonic()
+    sock.sendall(banner)
+    if not sock.recv(1):
+        return None
+    return (time.monotonic() - start) * 1000
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    """Read exactly size bytes, or fewer if the peer closes."""
+    data = b""
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+class LinkTuner:
+    """Picks viewer settings for a host from measured link quality.
+
+    Measurements are cached per host:port for `ttl` seconds, in memory and
+    in ~/.cache/turbovncui/link_quality.json, so repeat launches don't
+    measure again. Failed measurements are remembered in memory for as
+    long, so an unreachable host only costs one timeout per `ttl`. The
+    rule table can be overridden with link_rules.json in the config
+    directory; rules in it that can't be used are skipped.
+    """
+
+    def __init__(self, cache_dir: str, config_dir: Optional[str] = None,
+                 ttl: float = 600.0):
+        """Initialize the tuner with cache location and TTL."""
+        if config_dir is None:
+            config_dir = os.path.expanduser("~/.config/turbovncui")
+        self.cache_file = Path(cache_dir) / "link_quality.json"
+        self.rules_file = Path(config_dir) / "link_rules.json"
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache: Optional[Dict[str, LinkMeasurement]] = None
+        # host:port -> when measuring it last failed
+        self._failures: Dict[str, float] = {}
+        self._rules: Optional[List[dict]] = None
+
+    def rules(self) -> List[dict]:
+        """Get the rule table, from link_rules.json if present."""
+        if self._rules is None:
+            rules = self._load_rules() if self.rules_file.exists() else []
+            self._rules = rules or DEFAULT_RULES
+        return self._rules
+
+    def _load_rules(self) -> List[dict]:
+        """Read the usable rules from link_rules.json."""
+        try:
+            with open(self.rules_file, 'r') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Warning: could not load {self.rules_file}: {e}")
+            return []
+        if not isinstance(data, list):
+            print(f"Warning: {self.rules_file} should hold a list of rules")
+            return []
+
+        rules = []
+        for number, rule in enumerate(data, 1):
+            try:
+                check_rule(rule)
+            except ValueError as e:
+                print(f"Warning: skipping rule {number} in "
+                      f"{self.rules_file}: {e}")
+                continue
+            rules.append(rule)
+        return rules
+
+    def _load_cache(self) -> Dict[str, LinkMeasurement]:
+        """Load cached measurements the first time they are needed."""
+        if self._cache is None:
+            self._cache = {}
+            try:
+                with open(self.cache_file, 'r') as f:
+                    for key, item in json.load(f).items():
+                        self._cache[key] = LinkMeasurement(**item)
+            except (OSError, json.JSONDecodeError, TypeError):
+                pass
+        return self._cache
+
+    def measurement_for(self, host: str, port: int,
+                        refresh: bool = False) -> Optional[LinkMeasurement]:
+        """Get a fresh measurement for host:port, measuring if needed."""
+        key = f"{host}:{port}"
+        with self._lock:
+            cached = self._load_cache().get(key)
+            failed_at = self._failures.get(key)
+        if not refresh:
+            if (cached is not None and
+                    time.time() - cached.measured_at < self.ttl):
+                return cached
+            if failed_at is not None and time.time() - failed_at < self.ttl:
+                return None
+
+        measurement = measure_link(host, port)
+        if measurement is None:
+            with self._lock:
+                self._failures[key] = time.time()
+            return None
+
+        with self._lock:
+            self._failures.pop(key, None)
+            cache = self._load_cache()
+            cache[key] = measurement
+            now = time.time()
+            try:
+                self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+                atomic_write_json(self.cache_file, {
+                    k: asdict(m) for k, m in cache.items()
+                    if now - m.measured_at < self.ttl
+                })
+            except OSError as e:
+                print(f"Warning: could not write link cache: {e}")
+        return measurement
+
+    def settings_for_measurement(
+            self, measurement: LinkMeasurement) -> PerformanceSettings:
+        """Map a measurement to viewer settings with the rule table."""
+        for rule in self.rules():
+            if (_within(measurement.rtt_ms, rule.get("max_rtt_ms")) and
+                    _within(measurement.jitter_ms,
+                            rule.get("max_jitter_ms")) and
+                    _within(measurement.handshake_ms,
+                            rule.get("max_handshake_ms"))):
+                return PerformanceSettings(preset="custom", **rule["settings"])
+        return PerformanceSettings(preset="custom")
+
+    def settings_for(self, host: str,
+                     port: int) -> Optional[PerformanceSettings]:
+        """Measure (or reuse a measurement of) host:port and pick settings."""
+        measurement = self.measurement_for(host, port)
+        if measurement is None:
+            return None
+        return self.settings_for_measurement(measurement)
+
+
+def _within(value: Optional[float], limit: Optional[float]) -> bool:
+    """Check a measured value against an optional upper limit."""
+    if limit is None or value is None:
+        return True
+    return value <= limit
@@ -0,0 +1,81 @@
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+from turbovncui.models.connection import Connection
+from turbovncui.models.profile import PerformanceProfile, PerformanceSettings
+from turbovncui.utils.database import atomic_write_json
+
+
+class ProfileStore:
+    """Manages named performance profiles in profiles.json."""
+    
+    def __init__(self, config_dir: Optional[str] = None):
+        """Initialize the store with config directory."""
+        if config_dir is None:
+            config_dir = os.path.expanduser("~/.config/turbovncui")
+        
+        self.config_dir = Path(config_dir)
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        self.profiles_file = self.config_dir / "profiles.json"
+        self._profiles: Optional[Dict[str, PerformanceProfile]] = None
+    
+    def _load(self) -> Dict[str, PerformanceProfile]:
+        """Load profiles from disk the first time they are needed."""
+        if self._profiles is not None:
+            return self._profiles
+        
+        self._profiles = {}
+        if self.profiles_file.exists():
+            try:
+                with open(self.profiles_file, 'r') as f:
+                    data = json.load(f)
+                for item in data:
+                    profile = PerformanceProfile.from_dict(item)
+                    self._profiles[profile.name] = profile
+            except (json.JSONDecodeError, KeyError, TypeError,
+                    ValueError) as e:
+                print(f"Warning: could not load {self.profiles_file}: {e}")
+        return self._profiles
+    
+    def _save(self) -> None:
+        """Write all profiles back to disk."""
+        atomic_write_json(
+            self.profiles_file,
+            [profile.to_dict() for profile in self._load().values()]
+        )
+    
+    def load_profiles(self) -> List[PerformanceProfile]:
+        """Get all profiles."""
+        return list(self._load().values())
+    
+    def get_profile(self, name: str) -> Optional[PerformanceProfile]:
+        """Get a profile by name."""
+        return self._load().get(name)
+    
+    def save_profile(self, profile: PerformanceProfile) -> None:
+        """Add or replace a profile."""
+        self._load()[profile.name] = profile
+        self._save()
+    
+    def delete_profile(self, name: str) -> bool:
+        """Delete a profile by name."""
+        if self._load().pop(name, None) is None:
+            return False
+        self._save()
+        return True
+    
+    def settings_for(
+            self, connection: Connection) -> Optional[PerformanceSettings]:
+        """Get the effective performance settings for a connection.
+        
+        A shared profile wins over the connection's own settings; a missing
+        profile falls back to them.
+        """
+        if connection.profile:
+            profile = self.get_profile(connection.profile)
+            if profile is not None:
+                return profile.settings.resolved()
+        if connection.performance:
+            return connection.performance.resolved()
+        return None
@@ -0,0 +1,326 @@
+import contextlib
+import json
+import os
+import signal
+import threading
+import time
+from dataclasses import dataclass, fields, replace
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+
+PROC = Path("/proc")
+# Most processes counted per viewer (the wrapper script, java, ssh, ...)
+MAX_TREE_SIZE = 64
+MEMORY_ACTIONS = ("warn", "kill")
+
+if hasattr(os, "sysconf"):
+    CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+    PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+else:
+    # No /proc on Windows either, so these are never used there
+    CLOCK_TICKS, PAGE_SIZE = 100, 4096
+
+
+class SessionLimitError(OSError):
+    """Starting another viewer would exceed max_sessions."""
+
+
+@dataclass
+class ResourcePolicy:
+    """Limits for running viewers, from resource_limits.json.
+
+    Unset limits don't apply. A viewer counts as idle once its CPU use
+    and I/O rate have both stayed under the idle thresholds for
+    idle_after_minutes.
+    """
+    sample_seconds: float = 2.0
+    max_sessions: Optional[int] = None
+    memory_limit_mb: Optional[int] = None
+    # "warn" only reports a viewer over the limit, "kill" also ends it
+    memory_action: str = "warn"
+    idle_after_minutes: float = 30.0
+    idle_cpu_percent: float = 1.0
+    idle_io_bytes_per_second: float = 1024.0
+
+    @classmethod
+    def load(cls, path: Path) -> 'ResourcePolicy':
+        """Read a policy file; missing keys keep their defaults."""
+        if not path.exists():
+            return cls()
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            known = {field.name for field in fields(cls)}
+            policy = cls(**{k: v for k, v in data.items() if k in known})
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            print(f"Warning: could not load {path}: {e}")
+            return cls()
+        if policy.memory_action not in MEMORY_ACTIONS:
+            print(f"Warning: unknown memory_action "
+                  f"{policy.memory_action!r} in {path}; using \"warn\"")
+            policy.memory_action = "warn"
+        return policy
+
+
+@dataclass
+class ProcessSample:
+    """Counters of one process from /proc."""
+    cpu_ticks: int
+    rss_bytes: int
+    threads: int
+    # Bytes passed through read()/write() and friends, sockets included
+    io_bytes: Optional[int] = None
+
+
+def read_process(pid: int) -> Optional[ProcessSample]:
+    """Read a process's counters, or None if it is gone."""
+    try:
+        stat = (PROC / str(pid) / "stat").read_bytes()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses
+    values = stat[stat.rindex(b")") + 2:].split()
+    sample = ProcessSample(
+        cpu_ticks=int(values[11]) + int(values[12]),
+        rss_bytes=int(values[21]) * PAGE_SIZE,
+        threads=int(values[17]),
+    )
+    try:
+        with open(PROC / str(pid) / "io", 'rb') as f:
+            counters = dict(line.split(b":", 1) for line in f)
+        sample.io_bytes = int(counters[b"rchar"]) + int(counters[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        pass
+    return sample
+
+
+def child_pids(pid: int) -> List[int]:
+    """Direct children of a process, started from any of its threads."""
+    children = []
+    try:
+        tasks = os.listdir(PROC / str(pid) / "task")
+    except OSError:
+        return children
+    for task in tasks:
+        try:
+            with open(PROC / str(pid) / "task" / task / "children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            pass
+    return children
+
+
+def process_tree(pid: int) -> List[int]:
+    """A process and its descendants, parents first."""
+    tree = [pid]
+    for parent in tree:
+        if len(tree) >= MAX_TREE_SIZE:
+            break
+        tree.extend(child for child in child_pids(parent)
+                    if child not in tree)
+    return tree[:MAX_TREE_SIZE]
+
+
+@dataclass
+class SessionUsage:
+    """Latest resource use of one viewer, with its descendants."""
+    session_id: int
+    connection_name: str
+    cpu_percent: float = 0.0
+    rss_bytes: int = 0
+    threads: int = 0
+    processes: int = 0
+    # Rates need two samples, so the first only sets the baseline
+    samples: int = 0
+    io_bytes_per_second: Optional[float] = None
+    sampled_at: float = 0.0
+    # Since when CPU and I/O have stayed under the idle thresholds
+    quiet_since: Optional[float] = None
+    idle: bool = False
+    over_memory_limit: bool = False
+    killed: bool = False
+    # Totals at the previous sample, for the rates
+    cpu_ticks: int = 0
+    io_bytes: Optional[int] = None
+
+    @property
+    def rss_mb(self) -> float:
+        """Resident memory in MiB."""
+        return self.rss_bytes / (1024 * 1024)
+
+    def summary(self) -> str:
+        """Short usage text for the connection list."""
+        text = (f"CPU {self.cpu_percent:.0f}%, {self.rss_mb:.0f} MB, "
+                f"{self.threads} threads")
+        if self.idle:
+            minutes = int((self.sampled_at - self.quiet_since) // 60)
+            text += f", idle {minutes}m"
+        return text
+
+
+class ResourceMonitor:
+    """Samples CPU, memory and threads of all running viewers from /proc.
+
+    One background thread reads every supervised viewer's process tree
+    each policy.sample_seconds, so the cost doesn't grow with a thread
+    per session. Each sample also applies the policy: viewers over the
+    memory limit are flagged (and with memory_action "kill", terminated)
+    and quiet viewers are marked idle. Per-process network counters
+    don't exist in /proc, so the I/O rate comes from rchar/wchar, which
+    for a viewer is mostly its socket traffic.
+
+    launch_slot() enforces max_sessions when starting viewers. Without
+    /proc (i.e. not on Linux), nothing is sampled but the limit still
+    holds.
+    """
+
+    def __init__(self, supervisor, policy: Optional[ResourcePolicy] = None):
+        """Initialize with the supervisor whose viewers to watch."""
+        self.supervisor = supervisor
+        self.policy = policy if policy is not None else ResourcePolicy()
+        self._lock = threading.Lock()
+        self._usage: Dict[int, SessionUsage] = {}
+        # Launches that passed the session limit but aren't running yet
+        self._starting = 0
+        self._thread: Optional[threading.Thread] = None
+
+    @contextlib.contextmanager
+    def launch_slot(self) -> Iterator[None]:
+        """Hold a place for a viewer being started.
+
+        Raises SessionLimitError if max_sessions viewers are already
+        running or starting. Leave the block once the viewer has been
+        handed to the supervisor, or has failed to start.
+        """
+        limit = self.policy.max_sessions
+        with self._lock:
+            running = len(self.supervisor.running_sessions())
+            if limit is not None and running + self._starting >= limit:
+                raise SessionLimitError(
+                    f"{limit} viewers are already running; close one "
+                    f"first (max_sessions in resource_limits.json)"
+                )
+            self._starting += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._starting -= 1
+
+    def start(self) -> None:
+        """Start the sampler thread, if it isn't running yet."""
+        with self._lock:
+            if self._thread is not None or not PROC.is_dir():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name="resource-monitor", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        """Sampler loop."""
+        while True:
+            time.sleep(self.policy.sample_seconds)
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"Warning: resource sampling failed: {e}")
+
+    def sample(self) -> None:
+        """Take one sample of every running viewer and apply the policy."""
+        sessions = self.supervisor.sessions()
+        known = {session.session_id for session in sessions}
+        now = time.time()
+        to_kill = []
+        with self._lock:
+            for session_id in [sid for sid in self._usage if sid not in known]:
+                del self._usage[session_id]
+            for session in sessions:
+                if not session.running:
+                    continue
+                usage = self._usage.get(session.session_id)
+                if usage is None:
+                    usage = self._usage[session.session_id] = SessionUsage(
+                        session.session_id, session.connection_name
+                    )
+                tree = self._update(usage, session.pid, now)
+                if usage.over_memory_limit and not usage.killed and \
+                        self.policy.memory_action == "kill":
+                    usage.killed = True
+                    to_kill.append((usage, tree))
+
+        for usage, tree in to_kill:
+            print(f"Warning: stopping the viewer for "
+                  f"{usage.connection_name}: {usage.rss_mb:.0f} MB is over "
+                  f"the {self.policy.memory_limit_mb} MB limit")
+            # Children first, so the wrapper can't restart anything
+            for pid in reversed(tree):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except OSError:
+                    pass
+
+    def _update(self, usage: SessionUsage, pid: int, now: float) -> List[int]:
+        """Fold a new sample of a viewer's process tree into its usage."""
+        tree = process_tree(pid)
+        cpu_ticks = rss = threads = processes = 0
+        io_bytes: Optional[int] = 0
+        for member in tree:
+            sample = read_process(member)
+            if sample is None:
+                continue
+            processes += 1
+            cpu_ticks += sample.cpu_ticks
+            rss += sample.rss_bytes
+            threads += sample.threads
+            if sample.io_bytes is None:
+                io_bytes = None
+            elif io_bytes is not None:
+                io_bytes += sample.io_bytes
+
+        elapsed = now - usage.sampled_at
+        if usage.sampled_at and elapsed > 0:
+            # Totals drop when a child exits; count that as no activity
+            usage.cpu_percent = max(0, cpu_ticks - usage.cpu_ticks) * 100 / (
+                CLOCK_TICKS * elapsed)
+            if io_bytes is not None and usage.io_bytes is not None:
+                usage.io_bytes_per_second = max(
+                    0, io_bytes - usage.io_bytes) / elapsed
+            else:
+                usage.io_bytes_per_second = None
+
+            policy = self.policy
+            quiet = usage.cpu_percent < policy.idle_cpu_percent and (
+                usage.io_bytes_per_second is None or
+                usage.io_bytes_per_second < policy.idle_io_bytes_per_second)
+            if not quiet:
+                usage.quiet_since = None
+            elif usage.quiet_since is None:
+                usage.quiet_since = now
+            usage.idle = (usage.quiet_since is not None and
+                          now - usage.quiet_since >=
+                          policy.idle_after_minutes * 60)
+
+        usage.cpu_ticks = cpu_ticks
+        usage.io_bytes = io_bytes
+        usage.rss_bytes = rss
+        usage.threads = threads
+        usage.processes = processes
+        usage.sampled_at = now
+        usage.samples += 1
+        limit = self.policy.memory_limit_mb
+        usage.over_memory_limit = (limit is not None and
+                                   usage.rss_mb > limit)
+        return tree
+
+    def usage(self, session_id: int) -> Optional[SessionUsage]:
+        """Latest usage of a session, if it has been sampled."""
+        with self._lock:
+            usage = self._usage.get(session_id)
+            return replace(usage) if usage is not None else None
+
+    def all_usage(self) -> Dict[int, SessionUsage]:
+        """Latest usage of every sampled session, by session id."""
+        with self._lock:
+            return {sid: replace(usage) for sid, usage in self._usage.items()}
@@ -0,0 +1,348 @@
+import asyncio
+import struct
+import zlib
+from dataclasses import dataclass
+from typing import List, Optional
+from turbovncui.utils.health import describe_socket_error, parse_rfb_banner
+from turbovncui.utils.vncauth import vnc_auth_response
+
+
+# Security types
+SECURITY_NONE = 1
+SECURITY_VNC_AUTH = 2
+# Encodings it can decode
+ENCODING_RAW = 0
+ENCODING_ZRLE = 16
+# Refuse framebuffers bigger than 8K UHD rather than allocate gigabytes
+MAX_PIXELS = 7680 * 4320
+# ZRLE tile edge
+TILE_SIZE = 64
+
+# Server-to-client message types
+_FRAMEBUFFER_UPDATE = 0
+_SET_COLOUR_MAP_ENTRIES = 1
+_BELL = 2
+_SERVER_CUT_TEXT = 3
+
+# SetPixelFormat: 32bpp little-endian true colour, red/green/blue in bits
+# 16/8/0, i.e. B, G, R, padding in memory (QImage.Format_RGB32)
+_SET_PIXEL_FORMAT = struct.pack(
+    ">B3xBBBBHHHBBB3x", 0, 32, 24, 0, 1, 255, 255, 255, 16, 8, 0
+)
+
+
+class RFBError(OSError):
+    """A VNC server could not be read from."""
+
+
+@dataclass
+class Framebuffer:
+    """One screenful from a VNC server."""
+    width: int
+    height: int
+    # 4 bytes per pixel: blue, green, red, padding
+    pixels: bytearray
+    name: str = ""
+
+
+async def grab_framebuffer(host: str, port: int,
+                           password: Optional[bytes] = None,
+                           timeout: float = 10.0) -> Framebuffer:
+    """Connect to a VNC server and read its whole screen once.
+
+    Speaks just enough RFB for that: protocol 3.3 to 3.8, the None and
+    VNC authentication security types, and Raw and ZRLE encodings. The
+    session is shared, so viewers already connected aren't kicked off.
+    Raises RFBError if anything fails or the whole grab takes longer than
+    timeout.
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+    except asyncio.TimeoutError:
+        raise RFBError("timeout")
+    except OSError as e:
+        raise RFBError(describe_socket_error(e))
+
+    try:
+        return await asyncio.wait_for(
+            _RFBSession(reader, writer, password).grab(), timeout
+        )
+    except asyncio.TimeoutError:
+        raise RFBError("timeout")
+    except asyncio.IncompleteReadError:
+        raise RFBError("connection closed")
+    except RFBError:
+        raise
+    except OSError as e:
+        raise RFBError(describe_socket_error(e))
+    except (zlib.error, IndexError):
+        # Bad compressed data, or a palette index past the palette
+        raise RFBError("corrupt framebuffer update")
+    finally:
+        writer.close()
+
+
+class _RFBSession:
+    """State of one connection while grabbing the framebuffer."""
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 writer: asyncio.StreamWriter, password: Optional[bytes]):
+        """Initialize with an open connection."""
+        self.reader = reader
+        self.writer = writer
+        self.password = password
+        # ZRLE uses one zlib stream for the whole connection
+        self.inflater = zlib.decompressobj()
+
+    async def read(self, fmt: str) -> tuple:
+        """Read and unpack a big-endian struct."""
+        data = await self.reader.readexactly(struct.calcsize(fmt))
+        return struct.unpack(fmt, data)
+
+    async def read_reason(self) -> str:
+        """Read a length-prefixed failure reason."""
+        length, = await self.read(">I")
+        reason = await self.reader.readexactly(min(length, 4096))
+        return reason.decode('utf-8', 'replace')
+
+    async def grab(self) -> Framebuffer:
+        """Handshake, then read one full framebuffer update."""
+        minor = await self.negotiate_version()
+        await self.authenticate(minor)
+
+        # ClientInit: shared session
+        self.writer.write(b"\x01")
+        width, height = await self.read(">HH")
+        await self.reader.readexactly(16)
+        name_length, = await self.read(">I")
+        name = await self.reader.readexactly(min(name_length, 4096))
+        if width * height > MAX_PIXELS:
+            raise RFBError(f"framebuffer too large ({width}x{height})")
+
+        encodings = [ENCODING_ZRLE, ENCODING_RAW]
+        self.writer.write(_SET_PIXEL_FORMAT)
+        self.writer.write(struct.pack(f">BxH{len(encodings)}i", 2,
+                                      len(encodings), *encodings))
+        # Non-incremental: the whole screen
+        self.writer.write(struct.pack(">BBHHHH", 3, 0, 0, 0, width, height))
+        await self.writer.drain()
+
+        framebuffer = Framebuffer(width, height,
+                                  bytearray(width * height * 4),
+                                  name.decode('utf-8', 'replace'))
+        await self.read_update(framebuffer)
+        return framebuffer
+
+    async def negotiate_version(self) -> int:
+        """Agree on a protocol version; returns the minor version."""
+        version = parse_rfb_banner(await self.reader.readexactly(12))
+        if version is None:
+            raise RFBError("not a VNC server")
+        major, minor = (int(part) for part in version.split("."))
+        if major != 3:
+            raise RFBError(f"unsupported RFB version {version}")
+        # Servers may announce odd minor versions; those mean 3.3
+        minor = 8 if minor >= 8 else 7 if minor == 7 else 3
+        self.writer.write(b"RFB 003.%03d\n" % minor)
+        return minor
+
+    async def authenticate(self, minor: int) -> None:
+        """Pick a security type and pass it."""
+        if minor == 3:
+            security, = await self.read(">I")
+            if security == 0:
+                raise RFBError(await self.read_reason())
+        else:
+            count, = await self.read(">B")
+            if count == 0:
+                raise RFBError(await self.read_reason())
+            security = choose_security(
+                list(await self.reader.readexactly(count)),
+                self.password is not None
+            )
+            self.writer.write(bytes([security]))
+
+        if security == SECURITY_VNC_AUTH:
+            if self.password is None:
+                raise RFBError("needs a password")
+            challenge = await self.reader.readexactly(16)
+            self.writer.write(vnc_auth_response(self.password, challenge))
+        elif security != SECURITY_NONE:
+            raise RFBError(f"unsupported security type {security}")
+
+        # 3.8 always sends a result; older versions only after VNC auth
+        if minor == 8 or security == SECURITY_VNC_AUTH:
+            result, = await self.read(">I")
+            if result != 0:
+                reason = (await self.read_reason() if minor == 8
+                          else "authentication failed")
+                raise RFBError(reason or "authentication failed")
+
+    async def read_update(self, framebuffer: Framebuffer) -> None:
+        """Read messages until a framebuffer update has been applied."""
+        while True:
+            message_type, = await self.read(">B")
+            if message_type == _FRAMEBUFFER_UPDATE:
+                _, rectangles = await self.read(">BH")
+                for _ in range(rectangles):
+                    await self.read_rectangle(framebuffer)
+                return
+            if message_type == _SET_COLOUR_MAP_ENTRIES:
+                _, _, count = await self.read(">BHH")
+                await self.reader.readexactly(count * 6)
+            elif message_type == _SERVER_CUT_TEXT:
+                length, = await self.read(">3xI")
+                await self.reader.readexactly(length)
+            elif message_type != _BELL:
+                raise RFBError(f"unexpected message type {message_type}")
+
+    async def read_rectangle(self, framebuffer: Framebuffer) -> None:
+        """Read one rectangle of an update into the framebuffer."""
+        x, y, width, height, encoding = await self.read(">HHHHi")
+        if (x + width > framebuffer.width or
+                y + height > framebuffer.height):
+            raise RFBError("rectangle outside the framebuffer")
+        if encoding == ENCODING_RAW:
+            data = await self.reader.readexactly(width * height * 4)
+            blit(framebuffer, x, y, width, height, data)
+        elif encoding == ENCODING_ZRLE:
+            length, = await self.read(">I")
+            data = self.inflater.decompress(
+                await self.reader.readexactly(length)
+            )
+            decode_zrle(framebuffer, x, y, width, height, data)
+        else:
+            raise RFBError(f"unexpected encoding {encoding}")
+
+
+def choose_security(offered: List[int], have_password: bool) -> int:
+    """Pick the security type to use from those a server offers."""
+    if SECURITY_NONE in offered:
+        return SECURITY_NONE
+    if SECURITY_VNC_AUTH in offered:
+        if not have_password:
+            raise RFBError("needs a password")
+        return SECURITY_VNC_AUTH
+    raise RFBError(
+        "no supported security type (offered "
+        f"{', '.join(str(security) for security in offered)})"
+    )
+
+
+def blit(framebuffer: Framebuffer, x: int, y: int, width: int, height: int,
+         data: bytes) -> None:
+    """Copy 4-byte pixels for a rectangle into the framebuffer."""
+    pixels = framebuffer.pixels
+    stride = framebuffer.width * 4
+    row_bytes = width * 4
+    if x == 0 and width == framebuffer.width:
+        pixels[y * stride:(y + height) * stride] = data
+        return
+    offset = y * stride + x * 4
+    for row in range(height):
+        start = row * row_bytes
+        pixels[offset:offset + row_bytes] = data[start:start + row_bytes]
+        offset += stride
+
+
+def _widen(cpixels: bytes) -> bytearray:
+    """Turn 3-byte ZRLE CPIXELs into 4-byte framebuffer pixels."""
+    count = len(cpixels) // 3
+    pixels = bytearray(count * 4)
+    pixels[0::4] = cpixels[0::3]
+    pixels[1::4] = cpixels[1::3]
+    pixels[2::4] = cpixels[2::3]
+    return pixels
+
+
+# Byte -> the palette indices packed in it, for 1, 2 and 4 bits per index
+_UNPACK = {
+    bits: [
+        [(byte >> shift) & ((1 << bits) - 1)
+         for shift in range(8 - bits, -1, -bits)]
+        for byte in range(256)
+    ]
+    for bits in (1, 2, 4)
+}
+
+
+def decode_zrle(framebuffer: Framebuffer, x: int, y: int, width: int,
+                height: int, data: bytes) -> None:
+    """Decode an inflated ZRLE rectangle into the framebuffer.
+
+    With our pixel format a CPIXEL is the 3 low bytes of a pixel.
+    """
+    position = 0
+
+    def take(count: int) -> bytes:
+        nonlocal position
+        if position + count > len(data):
+            raise RFBError("truncated ZRLE data")
+        chunk = data[position:position + count]
+        position += count
+        return chunk
+
+    def run_length() -> int:
+        length = 1
+        while True:
+            byte = take(1)[0]
+            length += byte
+            if byte != 255:
+                return length
+
+    for tile_y in range(y, y + height, TILE_SIZE):
+        tile_height = min(TILE_SIZE, y + height - tile_y)
+        for tile_x in range(x, x + width, TILE_SIZE):
+            tile_width = min(TILE_SIZE, x + width - tile_x)
+            count = tile_width * tile_height
+            subencoding = take(1)[0]
+
+            if subencoding == 0:
+                tile = _widen(take(count * 3))
+            elif subencoding == 1:
+                tile = take(3) + b"\0"
+                tile *= count
+            elif subencoding <= 16:
+                palette = [take(3) + b"\0" for _ in range(subencoding)]
+                bits = 1 if subencoding == 2 else 2 if subencoding <= 4 else 4
+                unpack = _UNPACK[bits]
+                row_bytes = (tile_width * bits + 7) // 8
+                rows = []
+                for _ in range(tile_height):
+                    indexes = [
+                        index for byte in take(row_bytes)
+                        for index in unpack[byte]
+                    ][:tile_width]
+                    rows.append(b"".join(palette[index]
+                                         for index in indexes))
+                tile = b"".join(rows)
+            elif subencoding == 128:
+                runs = []
+                filled = 0
+                while filled < count:
+                    pixel = take(3) + b"\0"
+                    length = run_length()
+                    runs.append(pixel * length)
+                    filled += length
+                tile = b"".join(runs)
+            elif subencoding >= 130:
+                palette = [take(3) + b"\0" for _ in range(subencoding - 128)]
+                runs = []
+                filled = 0
+                while filled < count:
+                    index = take(1)[0]
+                    length = 1
+                    if index & 128:
+                        index &= 127
+                        length = run_length()
+                    runs.append(palette[index] * length)
+                    filled += length
+                tile = b"".join(runs)
+            else:
+                raise RFBError(f"bad ZRLE subencoding {subencoding}")
+
+            if len(tile) != count * 4:
+                raise RFBError("ZRLE run overflows its tile")
+            blit(framebuffer, tile_x, tile_y, tile_width, tile_height, tile)
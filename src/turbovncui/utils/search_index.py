@@ -0,0 +1,263 @@
+import re
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+from turbovncui.models.connection import Connection
+
+
+WORD_RE = re.compile(r"[a-z0-9]+")
+# Compact once tombstones outnumber live documents, and at least this many
+MIN_TOMBSTONES = 1000
+# Syncs changing more entries than this rebuild the name keys in one go
+BULK_CHANGES = 1000
+
+
+def _trigrams(text: str) -> set:
+    """Get the distinct trigrams of a string."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _document(connection: Connection) -> str:
+    """The lowercased text a connection is searched by."""
+    return "\n".join(
+        field.lower() for field in
+        (connection.name, connection.host, connection.username or "")
+    )
+
+
+def _word_prefixes(text: str) -> set:
+    """Get the one- and two-character prefixes of every word in text."""
+    prefixes = set()
+    for word in WORD_RE.findall(text):
+        prefixes.add(word[:1])
+        prefixes.add(word[:2])
+    return prefixes
+
+
+class SearchIndex:
+    """Incremental trigram/prefix index over connection name, host and user.
+
+    Each connection is a document with an integer id. Queries of three or
+    more characters are matched against trigram postings; shorter ones use
+    postings of word prefixes. Postings are compact int arrays, removed
+    documents are tombstoned, and once tombstones outnumber the live
+    documents the index is compacted and the survivors renumbered.
+    Everything is kept in flat strings and arrays so a 100k-entry index
+    doesn't burden the garbage collector.
+
+    search() ranks results in tiers (name prefix, then word prefix or
+    substring, then fuzzy trigram overlap) and stops collecting once it
+    has `limit` results, so broad queries stay cheap on large inventories.
+    """
+
+    def __init__(self):
+        """Initialize an empty index."""
+        # doc id -> connection / lowercased searchable text, None if removed
+        self._connections: List[Optional[Connection]] = []
+        self._texts: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._postings: Dict[str, array] = {}
+        # Sorted "lowercased name\0doc id" keys for name prefix lookups
+        self._name_keys: List[str] = []
+        self._removed = 0
+
+    def __len__(self) -> int:
+        """Number of indexed connections."""
+        return len(self._ids)
+
+    def add(self, connection: Connection, _keep_sorted: bool = True) -> None:
+        """Index a connection, replacing one with the same name."""
+        if connection.name in self._ids:
+            self.remove(connection.name)
+
+        text = _document(connection)
+        doc_id = len(self._connections)
+        self._connections.append(connection)
+        self._texts.append(text)
+        self._ids[connection.name] = doc_id
+
+        postings = self._postings
+        for key in _trigrams(text) | _word_prefixes(text):
+            posting = postings.get(key)
+            if posting is None:
+                posting = postings[key] = array('i')
+            posting.append(doc_id)
+
+        name_key = f"{connection.name.lower()}\0{doc_id}"
+        if _keep_sorted:
+            insort(self._name_keys, name_key)
+        else:
+            self._name_keys.append(name_key)
+
+    def remove(self, name: str) -> bool:
+        """Drop a connection from the index."""
+        doc_id = self._tombstone(name)
+        if doc_id is None:
+            return False
+
+        name_key = f"{name.lower()}\0{doc_id}"
+        i = bisect_left(self._name_keys, name_key)
+        if i < len(self._name_keys) and self._name_keys[i] == name_key:
+            del self._name_keys[i]
+        self._maybe_compact()
+        return True
+
+    def _tombstone(self, name: str) -> Optional[int]:
+        """Mark a connection's document removed, except in the name keys."""
+        doc_id = self._ids.pop(name, None)
+        if doc_id is None:
+            return None
+        # Postings keep the id until the index is compacted
+        self._connections[doc_id] = None
+        self._texts[doc_id] = None
+        self._removed += 1
+        return doc_id
+
+    def _maybe_compact(self) -> None:
+        """Compact once enough tombstones have piled up."""
+        if (self._removed > MIN_TOMBSTONES and
+                self._removed > len(self._ids)):
+            self._compact()
+
+    def update(self, old_name: str, connection: Connection) -> None:
+        """Re-index a connection that was edited (and maybe renamed)."""
+        self.remove(old_name)
+        self.add(connection)
+
+    def sync(self, connections: List[Connection]) -> int:
+        """Bring the index in line with a list of connections.
+
+        Connections are compared by the text they are searched by, not by
+        identity, so a reload that rebuilt every object re-indexes only
+        the ones whose name, host or username changed; the others just
+        swap in the new object. Returns how many entries were added,
+        re-indexed or removed.
+        """
+        names = set()
+        changed = []
+        for connection in connections:
+            names.add(connection.name)
+            doc_id = self._ids.get(connection.name)
+            if doc_id is None:
+                changed.append(connection)
+            elif (self._connections[doc_id] == connection or
+                  self._texts[doc_id] == _document(connection)):
+                self._connections[doc_id] = connection
+            else:
+                changed.append(connection)
+        gone = [name for name in self._ids if name not in names]
+
+        # Inserting into or deleting from the sorted name keys one by one
+        # is quadratic, so big batches (like the first sync) drop and add
+        # keys in one pass and sort once
+        if len(changed) + len(gone) <= BULK_CHANGES:
+            for name in gone:
+                self.remove(name)
+            for connection in changed:
+                self.add(connection)
+            return len(changed) + len(gone)
+
+        dead = set()
+        for name in gone + [c.name for c in changed]:
+            doc_id = self._tombstone(name)
+            if doc_id is not None:
+                dead.add(f"{name.lower()}\0{doc_id}")
+        if dead:
+            self._name_keys = [
+                key for key in self._name_keys if key not in dead
+            ]
+        for connection in changed:
+            self.add(connection, _keep_sorted=False)
+        self._name_keys.sort()
+        self._maybe_compact()
+        return len(changed) + len(gone)
+
+    def _compact(self) -> None:
+        """Drop tombstoned documents and renumber the live ones."""
+        # Old doc id -> new one, or -1 if removed; ids stay in order, so
+        # postings stay sorted
+        remap = array('i', [-1]) * len(self._texts)
+        connections: List[Optional[Connection]] = []
+        texts: List[Optional[str]] = []
+        for doc_id, text in enumerate(self._texts):
+            if text is not None:
+                remap[doc_id] = len(texts)
+                connections.append(self._connections[doc_id])
+                texts.append(text)
+
+        for key, posting in list(self._postings.items()):
+            live = array('i', (remap[i] for i in posting if remap[i] >= 0))
+            if live:
+                self._postings[key] = live
+            else:
+                del self._postings[key]
+        self._connections = connections
+        self._texts = texts
+        self._ids = {name: remap[doc_id] for name, doc_id in self._ids.items()}
+        self._name_keys = sorted(
+            f"{connection.name.lower()}\0{doc_id}"
+            for doc_id, connection in enumerate(connections)
+        )
+        self._removed = 0
+
+    def search(self, query: str, limit: int = 1000) -> List[Connection]:
+        """Get connections matching query, best matches first."""
+        q = query.strip().lower()
+        if not q:
+            return []
+
+        texts = self._texts
+        found: Dict[int, None] = {}
+
+        def take(doc_ids: Iterable[int]) -> bool:
+            for doc_id in doc_ids:
+                if texts[doc_id] is not None:
+                    found.setdefault(doc_id)
+                    if len(found) >= limit:
+                        return True
+            return False
+
+        # Exact name and name prefix; an exact match sorts first
+        if take(self._name_prefix_ids(q)):
+            return self._result(found)
+
+        if len(q) < 3:
+            # Word prefix
+            take(self._postings.get(q, ()))
+            return self._result(found)
+
+        # Substring, checking candidates from the rarest trigram
+        grams = _trigrams(q)
+        postings = [self._postings.get(gram) for gram in grams]
+        if all(postings):
+            rarest = min(postings, key=len)
+            if take(doc_id for doc_id in rarest
+                    if texts[doc_id] is not None and q in texts[doc_id]):
+                return self._result(found)
+
+        # Fuzzy: enough shared trigrams, ignoring very common ones
+        if not found:
+            counts = Counter()
+            cap = max(len(self._ids) // 20, 100)
+            for posting in postings:
+                if posting and len(posting) <= cap:
+                    counts.update(posting)
+            needed = max(1, (len(grams) + 1) // 2)
+            take(doc_id for doc_id, count in counts.most_common()
+                 if count >= needed)
+
+        return self._result(found)
+
+    def _name_prefix_ids(self, prefix: str):
+        """Iterate doc ids whose lowercased name starts with prefix."""
+        keys = self._name_keys
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            key = keys[i]
+            if not key.startswith(prefix):
+                break
+            yield int(key[key.rindex("\0") + 1:])
+
+    def _result(self, found: Dict[int, None]) -> List[Connection]:
+        """Map collected doc ids back to connections."""
+        return [self._connections[doc_id] for doc_id in found]
@@ -0,0 +1,354 @@
+import os
+import re
+import selectors
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+
+# Launch milestones, matched against the viewer's console output in order
+# of appearance. TurboVNC prints the desktop name once the server has
+# accepted authentication and sent its ServerInit.
+LAUNCH_MARKERS = [
+    ("connected", re.compile(rb"Connected to ")),
+    ("protocol", re.compile(rb"(?:Using|Server supports) RFB protocol")),
+    ("authenticated", re.compile(
+        rb"Desktop name|Using pixel format|Enabling continuous updates"
+    )),
+]
+
+# Failure classes, checked in order against the viewer's recent output
+FAILURE_PATTERNS = [
+    ("authentication failed", re.compile(
+        rb"(?i)authentication fail|password check failed|"
+        rb"too many security failures"
+    )),
+    ("connection refused", re.compile(rb"(?i)connection refused")),
+    ("host unreachable", re.compile(
+        rb"(?i)no route to host|network is unreachable|unknown ?host|"
+        rb"name or service not known|nodename nor servname"
+    )),
+    ("timed out", re.compile(rb"(?i)timed out")),
+    ("no display", re.compile(
+        rb"(?i)can't open display|cannot open display|headlessexception"
+    )),
+    ("java not found", re.compile(
+        rb"(?i)java: (?:command )?not found|could not find java|"
+        rb"java_home is not"
+    )),
+]
+
+# Viewer output kept in memory per session for failure classification
+TAIL_BYTES = 8192
+
+
+def classify_failure(output: bytes, exit_code: Optional[int]) -> str:
+    """Name the reason a viewer failed from its output and exit code."""
+    for reason, pattern in FAILURE_PATTERNS:
+        if pattern.search(output):
+            return reason
+    if exit_code is None or exit_code == 0:
+        return "closed before connecting"
+    return f"exit code {exit_code}"
+
+
+@dataclass
+class ViewerSession:
+    """A viewer process started by the launcher."""
+    session_id: int
+    connection_name: str
+    pid: int
+    started_at: float
+    log_path: Path
+    exit_code: Optional[int] = None
+    ended_at: Optional[float] = None
+    # When the launch was requested; milestones are seconds after it
+    requested_at: Optional[float] = None
+    milestones: Dict[str, float] = field(default_factory=dict)
+    failure: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        """Whether the viewer is still running."""
+        return self.exit_code is None
+
+    @property
+    def uptime(self) -> float:
+        """Seconds the viewer has been (or was) running."""
+        end = self.ended_at if self.ended_at is not None else time.time()
+        return end - self.started_at
+
+    @property
+    def launch_latency(self) -> Optional[float]:
+        """Seconds from the launch request to an authenticated viewer."""
+        return self.milestones.get("authenticated")
+
+
+class SessionLog:
+    """Size-capped log file, rotated to .1, .2, ... when full."""
+
+    def __init__(self, path: Path, max_bytes: int, backup_count: int):
+        """Open the log for appending."""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = open(path, 'ab')
+
+    def write(self, data: bytes) -> None:
+        """Append output, rotating first if it would exceed the cap."""
+        if self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+
+    def _rotate(self) -> None:
+        """Shift log -> log.1 -> log.2 ..., dropping the oldest."""
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = Path(f"{self.path}.{i}")
+            if src.exists():
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        self._file = open(self.path, 'wb')
+
+    def close(self) -> None:
+        """Close the log file."""
+        self._file.close()
+
+
+class SessionSupervisor:
+    """Tracks launched viewers, drains their output and reaps them.
+
+    All sessions share one background thread that multiplexes the viewers'
+    output pipes with a selector and writes it to per-session logs, so a
+    chatty viewer can never block on a full pipe. The same thread polls for
+    exits so finished viewers don't linger as zombies.
+
+    While a viewer starts up, its output is also matched against
+    LAUNCH_MARKERS to time the launch, and a viewer that reports an error
+    or exits before connecting (or within `early_exit` seconds) is marked
+    failed. Listeners hear about both outcomes, and about every exit, on
+    the supervisor thread.
+    """
+
+    def __init__(self, log_dir: Path, max_log_bytes: int = 1024 * 1024,
+                 backup_count: int = 2, poll_interval: float = 1.0,
+                 early_exit: float = 10.0):
+        """Initialize; the supervisor thread starts with the first session."""
+        self.log_dir = Path(log_dir)
+        self.max_log_bytes = max_log_bytes
+        self.backup_count = backup_count
+        self.poll_interval = poll_interval
+        self.early_exit = early_exit
+
+        self._lock = threading.Lock()
+        self._sessions: Dict[int, ViewerSession] = {}
+        self._processes: Dict[int, subprocess.Popen] = {}
+        self._logs: Dict[int, SessionLog] = {}
+        self._tails: Dict[int, bytearray] = {}
+        self._listeners: List[Callable[[str, ViewerSession], None]] = []
+        self._next_id = 1
+
+        self._selector = selectors.DefaultSelector()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        os.set_blocking(self._wakeup_r, False)
+        self._selector.register(self._wakeup_r, selectors.EVENT_READ, None)
+        self._thread: Optional[threading.Thread] = None
+
+    def add_listener(
+            self, listener: Callable[[str, ViewerSession], None]) -> None:
+        """Call listener(event, session) on "connected", "failed", "exited"."""
+        self._listeners.append(listener)
+
+    def add(self, process: subprocess.Popen, connection_name: str,
+            requested_at: Optional[float] = None) -> ViewerSession:
+        """Start supervising a viewer whose output goes to process.stdout."""
+        now = time.time()
+        if requested_at is None:
+            requested_at = now
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            session_id = self._next_id
+            self._next_id += 1
+
+            safe_name = re.sub(r"[^\w.-]", "_", connection_name)
+            log_path = self.log_dir / f"{safe_name}-{session_id}.log"
+            session = ViewerSession(
+                session_id=session_id,
+                connection_name=connection_name,
+                pid=process.pid,
+                started_at=now,
+                log_path=log_path,
+                requested_at=requested_at,
+                milestones={"spawned": now - requested_at},
+            )
+            self._sessions[session_id] = session
+            self._processes[session_id] = process
+            self._logs[session_id] = SessionLog(
+                log_path, self.max_log_bytes, self.backup_count
+            )
+            self._tails[session_id] = bytearray()
+            if process.stdout is not None:
+                os.set_blocking(process.stdout.fileno(), False)
+                self._selector.register(
+                    process.stdout, selectors.EVENT_READ, session_id
+                )
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="session-supervisor", daemon=True
+                )
+                self._thread.start()
+
+        os.write(self._wakeup_w, b"\0")
+        return session
+
+    def sessions(self) -> List[ViewerSession]:
+        """All sessions started so far, running or not."""
+        with self._lock:
+            return list(self._sessions.values())
+
+    def running_sessions(self) -> List[ViewerSession]:
+        """Sessions whose viewer is still running."""
+        return [s for s in self.sessions() if s.running]
+
+    def sessions_for(self, connection_name: str) -> List[ViewerSession]:
+        """Sessions started for one connection."""
+        return [
+            s for s in self.sessions() if s.connection_name == connection_name
+        ]
+
+    def forget_finished(self,
+                        session_ids: Optional[Iterable[int]] = None) -> None:
+        """Drop sessions that have exited, or only those of session_ids."""
+        with self._lock:
+            candidates = (list(self._sessions) if session_ids is None
+                          else session_ids)
+            for session_id in candidates:
+                session = self._sessions.get(session_id)
+                if session is not None and not session.running:
+                    del self._sessions[session_id]
+
+    def _run(self) -> None:
+        """Supervisor loop: drain pipes, then reap exited viewers."""
+        while True:
+            for key, _ in self._selector.select(self.poll_interval):
+                if key.data is None:
+                    try:
+                        os.read(self._wakeup_r, 4096)
+                    except BlockingIOError:
+                        pass
+                    continue
+                self._drain(key.fileobj, key.data)
+            self._reap()
+
+    def _drain(self, pipe, session_id: int) -> bool:
+        """Copy whatever a viewer has written into its log.
+
+        Returns whether there may be more to read.
+        """
+        try:
+            data = os.read(pipe.fileno(), 65536)
+        except BlockingIOError:
+            return False
+        except OSError:
+            data = b""
+
+        event = None
+        with self._lock:
+            if data:
+                log = self._logs.get(session_id)
+                if log is not None:
+                    log.write(data)
+                event = self._scan_output(session_id, data)
+            else:
+                # EOF: the viewer closed its output (usually because it exited)
+                self._selector.unregister(pipe)
+                pipe.close()
+                log = self._logs.pop(session_id, None)
+                if log is not None:
+                    log.close()
+        if event is not None:
+            self._notify(*event)
+        return bool(data)
+
+    def _scan_output(self, session_id: int, data: bytes):
+        """Note launch milestones and errors in new viewer output.
+
+        Returns an (event, session) pair to pass to listeners, or None.
+        """
+        session = self._sessions.get(session_id)
+        tail = self._tails.get(session_id)
+        if session is None or tail is None:
+            return None
+
+        tail += data
+        del tail[:-TAIL_BYTES]
+        if session.launch_latency is not None or session.failure is not None:
+            return None
+
+        elapsed = time.time() - session.requested_at
+        session.milestones.setdefault("first_output", elapsed)
+        for marker, pattern in LAUNCH_MARKERS:
+            if marker not in session.milestones and pattern.search(tail):
+                session.milestones[marker] = elapsed
+        if session.launch_latency is not None:
+            return ("connected", session)
+
+        for reason, pattern in FAILURE_PATTERNS:
+            if pattern.search(tail):
+                session.failure = reason
+                return ("failed", session)
+        return None
+
+    def _notify(self, event: str, session: ViewerSession) -> None:
+        """Tell listeners about a launch outcome."""
+        for listener in self._listeners:
+            try:
+                listener(event, session)
+            except Exception as e:
+                print(f"Warning: launch listener failed: {e}")
+
+    def _reap(self) -> None:
+        """Collect exit codes of finished viewers."""
+        with self._lock:
+            exited = [
+                (session_id, process)
+                for session_id, process in self._processes.items()
+                if process.poll() is not None
+            ]
+
+        events = []
+        for session_id, process in exited:
+            # Read the viewer's last words before classifying its exit
+            pipe = process.stdout
+            while pipe is not None and not pipe.closed and \
+                    self._drain(pipe, session_id):
+                pass
+
+            with self._lock:
+                del self._processes[session_id]
+                tail = self._tails.pop(session_id, b"")
+                session = self._sessions.get(session_id)
+                if session is None:
+                    continue
+                session.ended_at = time.time()
+                if session.failure is None and (
+                        session.launch_latency is None or (
+                            process.returncode != 0 and
+                            session.uptime < self.early_exit)):
+                    session.failure = classify_failure(
+                        bytes(tail), process.returncode
+                    )
+                    events.append(("failed", session))
+                # Last: readers without the lock take this as "finished",
+                # and the GUI forgets a session once it showed its exit
+                session.exit_code = process.returncode
+                events.append(("exited", session))
+
+        for event in events:
+            self._notify(*event)
@@ -0,0 +1,163 @@
+import json
+import os
+import struct
+import sys
+import tempfile
+import zlib
+from array import array
+from itertools import accumulate
+from pathlib import Path
+from typing import List, Optional
+from turbovncui.models.connection import Connection
+from turbovncui.models.profile import PerformanceSettings
+
+
+# Bump the version whenever the layout below changes
+MAGIC = b"TVUISNP3"
+# Source signature (inode, mtime_ns, size), record count, byte order,
+# then the CRC32 of everything after the header
+HEADER = struct.Struct("<8sQQQIcI")
+BYTE_ORDER = b"L" if sys.byteorder == "little" else b"B"
+
+STRING_FIELDS = ("name", "host", "username", "display", "profile",
+                 "gateway", "group")
+
+
+def _pack_block(data: bytes) -> bytes:
+    """Prefix a block with its length."""
+    return struct.pack("<I", len(data)) + data
+
+
+def write_snapshot(path: Path, connections: List[Connection],
+                   source_signature: tuple) -> None:
+    """Write a binary snapshot of already-validated connections.
+
+    All strings go into one deduplicated table, so hosts and usernames
+    shared by thousands of connections are stored (and later loaded) once;
+    each string field is an int array of table indexes (-1 for None) and
+    ports are a uint16 array. Per-connection performance settings are rare
+    and are kept as JSON. source_signature identifies the connections.json
+    the snapshot was made from.
+
+    Raises TypeError for fields the layout can't hold, such as a number
+    for a string field in a hand-edited file; nothing is written then.
+    """
+    table = {}
+    columns = {field: array('i') for field in STRING_FIELDS}
+    ports = array('H')
+    performance = {}
+
+    for row, connection in enumerate(connections):
+        for field in STRING_FIELDS:
+            value = getattr(connection, field)
+            if value is None:
+                columns[field].append(-1)
+            elif isinstance(value, str):
+                columns[field].append(table.setdefault(value, len(table)))
+            else:
+                raise TypeError(
+                    f"{field} of {connection.name!r} is not a string: "
+                    f"{value!r}"
+                )
+        ports.append(connection.port)
+        if connection.performance is not None:
+            performance[row] = connection.performance.to_dict()
+
+    strings = list(table)
+    lengths = array('I', (len(s) for s in strings))
+    body = b"".join([
+        _pack_block(lengths.tobytes()),
+        _pack_block("".join(strings).encode('utf-8', 'surrogatepass')),
+        *(_pack_block(columns[field].tobytes()) for field in STRING_FIELDS),
+        _pack_block(ports.tobytes()),
+        _pack_block(json.dumps(performance).encode('utf-8')),
+    ])
+    inode, mtime_ns, size = source_signature
+    header = HEADER.pack(MAGIC, inode, mtime_ns, size, len(connections),
+                         BYTE_ORDER, zlib.crc32(body))
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: Path,
+                  source_signature: tuple) -> Optional[List[Connection]]:
+    """Load a snapshot made from the given connections.json.
+
+    Returns None when there is no usable snapshot: it is missing, older
+    than the JSON, made from a different version of it, or damaged. The
+    records were validated when the snapshot was written, so they are
+    rebuilt with Connection.from_trusted().
+    """
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_mtime_ns < source_signature[1]:
+                return None
+            data = f.read()
+    except OSError:
+        return None
+
+    try:
+        magic, inode, mtime_ns, size, count, byte_order, crc = \
+            HEADER.unpack_from(data)
+        if (magic != MAGIC or byte_order != BYTE_ORDER or
+                (inode, mtime_ns, size) != tuple(source_signature)):
+            return None
+        body = memoryview(data)[HEADER.size:]
+        if zlib.crc32(body) != crc:
+            return None
+
+        blocks = []
+        offset = 0
+        while offset < len(body):
+            (length,) = struct.unpack_from("<I", body, offset)
+            blocks.append(body[offset + 4:offset + 4 + length])
+            offset += 4 + length
+        lengths_block, text_block, *column_blocks, ports_block, perf_block = \
+            blocks
+
+        lengths = array('I')
+        lengths.frombytes(lengths_block)
+        text = str(text_block, 'utf-8', 'surrogatepass')
+        ends = list(accumulate(lengths))
+        strings = [text[end - n:end] for end, n in zip(ends, lengths)]
+        # Index -1 (no value) picks this up
+        strings.append(None)
+
+        columns = []
+        for block in column_blocks:
+            column = array('i')
+            column.frombytes(block)
+            columns.append(column)
+        ports = array('H')
+        ports.frombytes(ports_block)
+        performance = {
+            int(row): PerformanceSettings.from_dict(item)
+            for row, item in json.loads(str(perf_block, 'utf-8')).items()
+        }
+
+        names, hosts, usernames, displays, profiles, gateways, groups = \
+            columns
+        if not all(len(column) == count for column in (*columns, ports)):
+            return None
+        from_trusted = Connection.from_trusted
+        return [
+            from_trusted(
+                strings[names[row]], strings[hosts[row]], ports[row],
+                strings[usernames[row]], strings[displays[row]],
+                strings[profiles[row]], performance.get(row),
+                strings[gateways[row]], strings[groups[row]]
+            )
+            for row in range(count)
+        ]
+    except (struct.error, ValueError, TypeError, KeyError, IndexError):
+        return None
@@ -0,0 +1,301 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import ConnectionDatabase
+
+
+# Columns stored directly; any other Connection fields go in `extra`
+COLUMNS = ('name', 'host', 'port', 'username', 'display')
+# Connection.group, in its own column so one folder can be read alone
+GROUP_COLUMN = 'group_path'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS connections (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    host TEXT NOT NULL,
+    port INTEGER NOT NULL DEFAULT 5900,
+    username TEXT,
+    display TEXT,
+    extra TEXT,
+    group_path TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_connections_host ON connections(host);
+CREATE INDEX IF NOT EXISTS idx_connections_username ON connections(username);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteConnectionDatabase(ConnectionDatabase):
+    """Connection storage backed by an SQLite database.
+
+    Every operation is a single indexed statement, so edits cost the same
+    at 50 connections as at 50k. An existing connections.json is imported
+    the first time the database is created.
+    """
+    
+    def __init__(self, config_dir: Optional[str] = None):
+        """Open (and if needed create) connections.db in the config dir."""
+        super().__init__(config_dir)
+        self.database_file = self.config_dir / "connections.db"
+        
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            str(self.database_file), check_same_thread=False
+        )
+        self._db.row_factory = sqlite3.Row
+        with self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+            self._upgrade_schema()
+        self._migrate_from_json()
+        self._data_version = self._db.execute(
+            "PRAGMA data_version"
+        ).fetchone()[0]
+    
+    def watched_paths(self) -> List[Path]:
+        """The database and its write-ahead log, where commits land."""
+        return [
+            self.config_dir, self.database_file,
+            Path(f"{self.database_file}-wal")
+        ]
+    
+    def has_changed(self) -> bool:
+        """Check whether another process committed since the last call."""
+        # data_version only moves for commits made by other connections
+        version = self._db.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+    
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        self._db.close()
+    
+    def _upgrade_schema(self) -> None:
+        """Bring a database made by an older version up to date."""
+        columns = {
+            row['name'] for row in
+            self._db.execute("PRAGMA table_info(connections)")
+        }
+        if GROUP_COLUMN not in columns:
+            self._db.execute(
+                f"ALTER TABLE connections ADD COLUMN {GROUP_COLUMN} TEXT"
+            )
+        # Rows of a group come out of this index in insertion (id) order
+        self._db.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_connections_group "
+            f"ON connections({GROUP_COLUMN})"
+        )
+    
+    def _migrate_from_json(self) -> None:
+        """Import connections.json once, the first time the db is opened."""
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'migrated'"
+        ).fetchone()
+        if row is not None:
+            return
+        
+        connections = self._read_connections()
+        with self._lock, self._db:
+            self._db.executemany(
+                self._insert_sql(), [self._to_row(c) for c in connections]
+            )
+            self._set_meta('migrated', '1')
+    
+    def _insert_sql(self) -> str:
+        """SQL to insert a row, replacing one with the same name."""
+        return (
+            "INSERT INTO connections "
+            "(name, host, port, username, display, extra, group_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET "
+            "host = excluded.host, port = excluded.port, "
+            "username = excluded.username, display = excluded.display, "
+            "extra = excluded.extra, group_path = excluded.group_path"
+        )
+    
+    def _to_row(self, connection: Connection) -> tuple:
+        """Convert a connection to a row tuple."""
+        data = connection.to_dict()
+        extra = {
+            k: v for k, v in data.items()
+            if k not in COLUMNS and k != 'group' and v is not None
+        }
+        return tuple(data[k] for k in COLUMNS) + (
+            json.dumps(extra) if extra else None, connection.group
+        )
+    
+    def _from_row(self, row: sqlite3.Row) -> Connection:
+        """Convert a row back to a connection."""
+        data = {k: row[k] for k in COLUMNS}
+        data['group'] = row[GROUP_COLUMN]
+        if row['extra']:
+            data.update(json.loads(row['extra']))
+        return Connection.from_dict(data)
+    
+    def _set_meta(self, key: str, value: str) -> None:
+        """Store a value in the meta table."""
+        self._db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, value)
+        )
+    
+    def _where(self, text: Optional[str]) -> tuple:
+        """Build a WHERE clause and parameters for a text filter."""
+        if not text:
+            return "", ()
+        pattern = "%" + text.replace("\\", "\\\\").replace(
+            "%", "\\%").replace("_", "\\_") + "%"
+        return (
+            " WHERE name LIKE ? ESCAPE '\\' OR host LIKE ? ESCAPE '\\' "
+            "OR username LIKE ? ESCAPE '\\'",
+            (pattern, pattern, pattern)
+        )
+    
+    def save_connections(self, connections: List[Connection]) -> None:
+        """Replace all stored connections."""
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM connections")
+            self._db.executemany(
+                self._insert_sql(), [self._to_row(c) for c in connections]
+            )
+    
+    def load_connections(self) -> List[Connection]:
+        """Load all connections in insertion order."""
+        return self.query_connections()
+    
+    def _seed_history(self) -> None:
+        """Start a new history from the last connection kept in meta."""
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'last_connection'"
+        ).fetchone()
+        if row is None:
+            super()._seed_history()
+            return
+        
+        try:
+            name = json.loads(row['value'])['name']
+        except (json.JSONDecodeError, KeyError, TypeError):
+            return
+        self._history.record(name)
+    
+    def _insert_new(self, connection: Connection) -> bool:
+        """Insert a row unless its name is taken; returns whether it was."""
+        cursor = self._db.execute(
+            "INSERT INTO connections "
+            "(name, host, port, username, display, extra, group_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO NOTHING",
+            self._to_row(connection)
+        )
+        return cursor.rowcount > 0
+    
+    def add_connection(self, connection: Connection) -> bool:
+        """Add a new connection, unless one with its name exists."""
+        with self._lock, self._db:
+            return self._insert_new(connection)
+    
+    def add_connections(self, connections: List[Connection],
+                        select: Optional[Callable] = None) -> List[Connection]:
+        """Add many connections in one transaction; returns those added."""
+        with self._lock, self._db:
+            # Take the write lock up front so select() sees what we insert into
+            self._db.execute("BEGIN IMMEDIATE")
+            if select is not None:
+                connections = select(self.query_connections())
+            return [
+                connection for connection in connections
+                if self._insert_new(connection)
+            ]
+    
+    def update_connection(self, old_name: str,
+                          new_connection: Connection) -> bool:
+        """Update an existing connection, keeping its position."""
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT id FROM connections WHERE name = ?", (old_name,)
+            ).fetchone()
+            if row is None:
+                return False
+            if new_connection.name != old_name:
+                # Renaming onto another connection replaces it
+                self._db.execute(
+                    "DELETE FROM connections WHERE name = ?",
+                    (new_connection.name,)
+                )
+            self._db.execute(
+                "UPDATE connections SET name = ?, host = ?, port = ?, "
+                "username = ?, display = ?, extra = ?, group_path = ? "
+                "WHERE id = ?",
+                self._to_row(new_connection) + (row['id'],)
+            )
+        return True
+    
+    def delete_connection(self, name: str) -> bool:
+        """Delete a connection by name."""
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                "DELETE FROM connections WHERE name = ?", (name,)
+            )
+        return cursor.rowcount > 0
+    
+    def has_connection(self, name: str) -> bool:
+        """Check whether a connection with this name exists."""
+        row = self._db.execute(
+            "SELECT 1 FROM connections WHERE name = ?", (name,)
+        ).fetchone()
+        return row is not None
+    
+    def get_connection_by_name(self, name: str) -> Optional[Connection]:
+        """Get a connection by name."""
+        row = self._db.execute(
+            "SELECT * FROM connections WHERE name = ?", (name,)
+        ).fetchone()
+        return self._from_row(row) if row else None
+    
+    def query_connections(self, text: Optional[str] = None, offset: int = 0,
+                          limit: Optional[int] = None) -> List[Connection]:
+        """Get one page of connections, optionally filtered by text."""
+        where, params = self._where(text)
+        rows = self._db.execute(
+            f"SELECT * FROM connections{where} ORDER BY id LIMIT ? OFFSET ?",
+            params + (-1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
+    
+    def count_connections(self, text: Optional[str] = None) -> int:
+        """Count connections, optionally filtered by text."""
+        where, params = self._where(text)
+        row = self._db.execute(
+            f"SELECT COUNT(*) FROM connections{where}", params
+        ).fetchone()
+        return row[0]
+    
+    def group_counts(self) -> Dict[str, int]:
+        """Count the connections directly in each group ("" for none)."""
+        rows = self._db.execute(
+            f"SELECT {GROUP_COLUMN}, COUNT(*) FROM connections "
+            f"GROUP BY {GROUP_COLUMN}"
+        ).fetchall()
+        return {group or "": count for group, count in rows}
+    
+    def query_group(self, group: Optional[str], offset: int = 0,
+                    limit: Optional[int] = None) -> List[Connection]:
+        """Get one page of the connections directly in a group."""
+        if group:
+            where, params = f"{GROUP_COLUMN} = ?", (group,)
+        else:
+            where, params = f"{GROUP_COLUMN} IS NULL", ()
+        rows = self._db.execute(
+            f"SELECT * FROM connections WHERE {where} ORDER BY id "
+            f"LIMIT ? OFFSET ?",
+            params + (-1 if limit is None else limit, offset)
+        ).fetchall()
+        return [self._from_row(row) for row in rows]
@@ -0,0 +1,339 @@
+import asyncio
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+from turbovncui.models.connection import Connection
+from turbovncui.utils.discovery import RateLimiter
+from turbovncui.utils.rfb_client import Framebuffer, RFBError, grab_framebuffer
+from turbovncui.utils.vncauth import DEFAULT_PASSWORD_FILE, read_password_file
+
+
+# Largest thumbnail, in pixels; the aspect ratio is kept
+THUMBNAIL_WIDTH = 96
+THUMBNAIL_HEIGHT = 60
+# Disk budget for all thumbnails (at a few KiB each, thousands of servers)
+MAX_CACHE_BYTES = 32 * 1024 * 1024
+# Thumbnails older than this are dropped rather than shown
+MAX_THUMBNAIL_AGE = 7 * 24 * 3600
+
+
+def downscale(framebuffer: Framebuffer, max_width: int = THUMBNAIL_WIDTH,
+              max_height: int = THUMBNAIL_HEIGHT) -> Tuple[int, int, bytes]:
+    """Shrink a framebuffer to fit max_width x max_height.
+
+    Each thumbnail pixel averages 2x2 samples of the area it covers,
+    which is far cheaper in Python than a full box filter and still
+    smooths out most aliasing. Returns (width, height, RGB bytes).
+    """
+    scale = max(framebuffer.width / max_width,
+                framebuffer.height / max_height, 1.0)
+    width = max(1, round(framebuffer.width / scale))
+    height = max(1, round(framebuffer.height / scale))
+    stride = framebuffer.width * 4
+    columns = [int((x + f) * framebuffer.width / width) * 4
+               for x in range(width) for f in (0.25, 0.75)]
+    rows = [int((y + f) * framebuffer.height / height) * stride
+            for y in range(height) for f in (0.25, 0.75)]
+
+    pixels = framebuffer.pixels
+    rgb = bytearray(width * height * 3)
+    out = 0
+    for y in range(height):
+        top, bottom = rows[2 * y], rows[2 * y + 1]
+        for x in range(width):
+            left, right = columns[2 * x], columns[2 * x + 1]
+            # Framebuffer pixels are blue, green, red, padding
+            for channel in (2, 1, 0):
+                rgb[out] = (pixels[top + left + channel] +
+                            pixels[top + right + channel] +
+                            pixels[bottom + left + channel] +
+                            pixels[bottom + right + channel]) >> 2
+                out += 1
+    return width, height, bytes(rgb)
+
+
+def encode_png(width: int, height: int, rgb: bytes) -> bytes:
+    """Encode 8-bit RGB pixels as a PNG file."""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return (struct.pack(">I", len(data)) + kind + data +
+                struct.pack(">I", zlib.crc32(kind + data)))
+
+    row_bytes = width * 3
+    # Filter type 0 (none) before every row
+    raw = b"".join(b"\0" + rgb[y * row_bytes:(y + 1) * row_bytes]
+                   for y in range(height))
+    return (b"\x89PNG\r\n\x1a\n" +
+            chunk(b"IHDR", struct.pack(">IIBBBBB", width, height,
+                                       8, 2, 0, 0, 0)) +
+            chunk(b"IDAT", zlib.compress(raw, 9)) +
+            chunk(b"IEND", b""))
+
+
+class ThumbnailCache:
+    """Server thumbnails as PNG files, bounded by total size and age.
+
+    One file per host:port under ~/.cache/turbovncui/thumbnails. When the
+    files add up to more than max_bytes, the least recently used ones are
+    deleted; the use order is tracked in memory and starts out as the
+    order the files were written. A thumbnail older than max_age is
+    deleted instead of returned. The index is in memory, so asking
+    whether a thumbnail exists doesn't touch the disk. The GUI reads
+    while a worker writes, so access is serialized with a lock.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = MAX_CACHE_BYTES,
+                 max_age: float = MAX_THUMBNAIL_AGE):
+        """Initialize with the cache directory and limits."""
+        self.directory = Path(cache_dir) / "thumbnails"
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        # file name -> (size, written at), least recently used first
+        self._entries: Optional[
+            'OrderedDict[str, Tuple[int, float]]'] = None
+        self._total = 0
+
+    @staticmethod
+    def file_name(host: str, port: int) -> str:
+        """File a server's thumbnail is kept in."""
+        digest = hashlib.sha1(f"{host.lower()}:{port}".encode()).hexdigest()
+        return f"{digest[:20]}.png"
+
+    def _load(self) -> 'OrderedDict[str, Tuple[int, float]]':
+        """Index the cache directory the first time it is needed."""
+        if self._entries is None:
+            found = []
+            try:
+                with os.scandir(self.directory) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(".png"):
+                            stat = entry.stat()
+                            found.append((stat.st_mtime, entry.name,
+                                          stat.st_size))
+            except OSError:
+                pass
+            found.sort()
+            self._entries = OrderedDict(
+                (name, (size, mtime)) for mtime, name, size in found
+            )
+            self._total = sum(size for _, _, size in found)
+        return self._entries
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the cache directory has been indexed yet."""
+        return self._entries is not None
+
+    def load(self) -> None:
+        """Index the cache directory now, e.g. from a worker thread."""
+        with self._lock:
+            self._load()
+
+    def _drop(self, name: str) -> None:
+        """Forget and delete one thumbnail."""
+        size, _ = self._entries.pop(name)
+        self._total -= size
+        try:
+            os.unlink(self.directory / name)
+        except OSError:
+            pass
+
+    def _fresh(self, name: str) -> Optional[float]:
+        """When a thumbnail was written, dropping it if it is too old."""
+        entry = self._load().get(name)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > self.max_age:
+            self._drop(name)
+            return None
+        return entry[1]
+
+    def stored_at(self, host: str, port: int) -> Optional[float]:
+        """When a server's thumbnail was taken, or None if there is none."""
+        with self._lock:
+            return self._fresh(self.file_name(host, port))
+
+    def get(self, host: str, port: int) -> Optional[bytes]:
+        """Read a server's thumbnail as PNG data."""
+        name = self.file_name(host, port)
+        with self._lock:
+            if self._fresh(name) is None:
+                return None
+            self._entries.move_to_end(name)
+            try:
+                with open(self.directory / name, 'rb') as f:
+                    return f.read()
+            except OSError:
+                # Deleted behind our back
+                self._drop(name)
+                return None
+
+    def put(self, host: str, port: int, png: bytes) -> None:
+        """Store a server's thumbnail, evicting old ones to fit the budget."""
+        name = self.file_name(host, port)
+        with self._lock:
+            entries = self._load()
+            tmp_path = None
+            try:
+                self.directory.mkdir(parents=True, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=str(self.directory), prefix=".", suffix=".tmp"
+                )
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(png)
+                os.replace(tmp_path, self.directory / name)
+            except OSError as e:
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                print(f"Warning: could not save thumbnail: {e}")
+                return
+
+            if name in entries:
+                self._total -= entries.pop(name)[0]
+            entries[name] = (len(png), time.time())
+            self._total += len(png)
+            while self._total > self.max_bytes and len(entries) > 1:
+                self._drop(next(iter(entries)))
+
+    def total_bytes(self) -> int:
+        """Disk space the thumbnails take."""
+        with self._lock:
+            self._load()
+            return self._total
+
+
+class ThumbnailRefresher:
+    """Takes thumbnails of many servers in the background, gently.
+
+    A round grabs at most `max_per_round` servers, `concurrency` at a
+    time, starting at most `rate` connections per second, and skips
+    servers whose thumbnail is younger than `interval` or whose last
+    attempt failed less than `interval` ago. Connections sharing a server
+    share its thumbnail. Servers behind a gateway are skipped, as are
+    ones the health monitor last saw down. VNC authentication uses the
+    password vncpasswd stored in password_file.
+    """
+
+    def __init__(self, cache: ThumbnailCache, health_monitor=None,
+                 concurrency: int = 4, rate: float = 2.0,
+                 max_per_round: int = 32, interval: float = 900.0,
+                 timeout: float = 10.0,
+                 password_file: str = DEFAULT_PASSWORD_FILE):
+        """Initialize with the cache to fill and the throttling limits."""
+        self.cache = cache
+        self.health_monitor = health_monitor
+        self.concurrency = concurrency
+        self.rate = rate
+        self.max_per_round = max_per_round
+        self.interval = interval
+        self.timeout = timeout
+        self.password_file = password_file
+        self._lock = threading.Lock()
+        # host:port -> (time, reason) of the last failed grab
+        self._failures: Dict[Tuple[str, int], Tuple[float, str]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def failure(self, host: str, port: int) -> Optional[str]:
+        """Why the last grab of a server failed, if it did."""
+        with self._lock:
+            failure = self._failures.get((host, port))
+        return failure[1] if failure is not None else None
+
+    def due(self, connections: List[Connection]) -> List[Tuple[str, int]]:
+        """Servers to grab this round, in the order of connections."""
+        now = time.time()
+        seen = set()
+        targets = []
+        for connection in connections:
+            key = (connection.host, connection.port)
+            if connection.gateway or key in seen:
+                continue
+            seen.add(key)
+            if self.health_monitor is not None:
+                result = self.health_monitor.cached(connection)
+                if result is not None and not result.reachable:
+                    continue
+            stored_at = self.cache.stored_at(*key)
+            if stored_at is not None and now - stored_at < self.interval:
+                continue
+            with self._lock:
+                failure = self._failures.get(key)
+            if failure is not None and now - failure[0] < self.interval:
+                continue
+            targets.append(key)
+            if len(targets) >= self.max_per_round:
+                break
+        return targets
+
+    async def refresh_async(
+            self, connections: List[Connection],
+            on_grabbed: Optional[Callable[[str, int], None]] = None) -> int:
+        """Grab the servers that are due; returns how many succeeded."""
+        targets = self.due(connections)
+        if not targets:
+            return 0
+        password = read_password_file(self.password_file)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        limiter = RateLimiter(self.rate)
+        grabbed = 0
+
+        async def grab(host: str, port: int) -> None:
+            nonlocal grabbed
+            async with semaphore:
+                await limiter.wait()
+                try:
+                    framebuffer = await grab_framebuffer(
+                        host, port, password, self.timeout
+                    )
+                except RFBError as e:
+                    with self._lock:
+                        self._failures[(host, port)] = (time.time(), str(e))
+                    return
+            self.cache.put(host, port, encode_png(*downscale(framebuffer)))
+            with self._lock:
+                self._failures.pop((host, port), None)
+            grabbed += 1
+            if on_grabbed is not None:
+                on_grabbed(host, port)
+
+        await asyncio.gather(*(grab(host, port) for host, port in targets))
+        return grabbed
+
+    def refresh(self, connections: List[Connection],
+                on_grabbed: Optional[Callable[[str, int], None]] = None
+                ) -> int:
+        """Blocking wrapper around refresh_async, for worker threads.
+
+        on_grabbed runs on the calling thread, inside the round's event
+        loop, so a GUI should only pass it on through a queued signal. A
+        round cancelled with cancel() returns 0.
+        """
+        async def run():
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.current_task()
+            try:
+                return await self.refresh_async(connections, on_grabbed)
+            except asyncio.CancelledError:
+                return 0
+            finally:
+                self._loop = self._task = None
+
+        return asyncio.run(run())
+
+    def cancel(self) -> None:
+        """Cancel a round running in refresh() on another thread."""
+        loop, task = self._loop, self._task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                # The loop finished in the meantime
+                pass
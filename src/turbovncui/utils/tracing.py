@@ -0,0 +1,176 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+
+# Set TURBOVNCUI_TRACE=1 (or pass --trace) to record spans from startup
+ENV_VAR = "TURBOVNCUI_TRACE"
+DEFAULT_CAPACITY = 10000
+
+
+class SpanRecord(NamedTuple):
+    """One finished span."""
+    name: str
+    start_ns: int
+    duration_ns: int
+    thread_id: int
+    thread_name: str
+    attrs: Dict[str, Any]
+
+
+_enabled = bool(os.environ.get(ENV_VAR))
+_buffer: deque = deque(maxlen=DEFAULT_CAPACITY)
+# Timestamps in exported traces count from here
+_origin_ns = time.perf_counter_ns()
+
+
+class Span:
+    """Times a block of code and records it when the block exits."""
+
+    __slots__ = ("name", "attrs", "_start")
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        """Initialize the span; timing starts on __enter__."""
+        self.name = name
+        self.attrs = attrs
+        self._start = 0
+
+    def set(self, key: str, value: Any) -> None:
+        """Add an attribute, e.g. a result known only at the end."""
+        self.attrs[key] = value
+
+    def __enter__(self) -> 'Span':
+        """Start timing."""
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Record the span in the ring buffer."""
+        end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        thread = threading.current_thread()
+        _buffer.append(SpanRecord(
+            self.name, self._start - _origin_ns, end - self._start,
+            thread.ident, thread.name, self.attrs
+        ))
+
+
+class _NullSpan:
+    """Stands in for Span while tracing is off; does nothing."""
+
+    __slots__ = ()
+
+    def set(self, key: str, value: Any) -> None:
+        """Ignore the attribute."""
+
+    def __enter__(self) -> '_NullSpan':
+        """Do nothing."""
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        """Do nothing."""
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **attrs):
+    """Context manager timing a block as a span named `name`.
+
+    While tracing is off this returns a shared no-op object, so an
+    instrumented block costs one function call and a global lookup.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attrs)
+
+
+def traced(name: str):
+    """Decorator recording every call of a function as a span."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def enable(capacity: Optional[int] = None) -> None:
+    """Start recording spans, optionally resizing the ring buffer."""
+    global _enabled, _buffer
+    if capacity is not None and capacity != _buffer.maxlen:
+        _buffer = deque(_buffer, maxlen=capacity)
+    _enabled = True
+
+
+def disable() -> None:
+    """Stop recording spans; recorded ones are kept."""
+    global _enabled
+    _enabled = False
+
+
+def is_enabled() -> bool:
+    """Whether spans are being recorded."""
+    return _enabled
+
+
+def spans() -> List[SpanRecord]:
+    """Recorded spans, oldest first."""
+    return list(_buffer)
+
+
+def clear() -> None:
+    """Drop all recorded spans."""
+    _buffer.clear()
+
+
+def chrome_trace(records: Optional[List[SpanRecord]] = None) -> dict:
+    """Convert spans to Chrome trace-event JSON, for chrome://tracing."""
+    if records is None:
+        records = spans()
+    pid = os.getpid()
+    events = []
+    threads = {}
+    for record in records:
+        threads[record.thread_id] = record.thread_name
+        events.append({
+            "name": record.name,
+            "cat": record.name.split(".", 1)[0],
+            "ph": "X",
+            "ts": record.start_ns / 1000,
+            "dur": record.duration_ns / 1000,
+            "pid": pid,
+            "tid": record.thread_id,
+            "args": {key: _jsonable(value)
+                     for key, value in record.attrs.items()},
+        })
+    for thread_id, thread_name in threads.items():
+        events.append({
+            "name": "thread_name", "ph": "M", "pid": pid, "tid": thread_id,
+            "args": {"name": thread_name},
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export_chrome_trace(path: str) -> int:
+    """Write recorded spans to a Chrome trace file; returns the count."""
+    records = spans()
+    with open(Path(path), 'w') as f:
+        json.dump(chrome_trace(records), f)
+    return len(records)
+
+
+def _jsonable(value: Any) -> Any:
+    """Keep JSON-friendly attribute values, stringify the rest."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
@@ -0,0 +1,329 @@
+import atexit
+import hashlib
+import os
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from turbovncui.utils import tracing
+
+
+# Longest control socket path: sun_path holds 107 characters, and ssh
+# appends a 17-character random suffix while the master binds it
+MAX_CONTROL_PATH = 90
+
+
+class TunnelError(OSError):
+    """An SSH master connection or port forward could not be set up."""
+
+
+def parse_gateway(gateway: str) -> Tuple[str, Optional[int]]:
+    """Split "[user@]host[:port]" into an ssh destination and port."""
+    destination, sep, port = gateway.strip().rpartition(":")
+    if sep and port.isdigit() and ":" not in destination:
+        return destination, int(port)
+    return gateway.strip(), None
+
+
+def short_control_dir() -> Path:
+    """A private directory for control sockets, with a short path."""
+    base = os.environ.get("XDG_RUNTIME_DIR") or tempfile.gettempdir()
+    return Path(base) / f"turbovncui-ssh-{os.getuid()}"
+
+
+def free_local_port() -> int:
+    """Ask the kernel for a free loopback port."""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@dataclass
+class Tunnel:
+    """A local port forwarded to host:port through a gateway."""
+    gateway: str
+    host: str
+    port: int
+    local_port: int
+    refs: int = 0
+    released_at: float = 0.0
+
+    @property
+    def local_address(self) -> str:
+        """The address the viewer should connect to."""
+        return f"localhost:{self.local_port}"
+
+
+class _Master:
+    """An SSH ControlMaster process for one gateway."""
+
+    def __init__(self, gateway: str, control_path: Path):
+        """Initialize; the process is started by TunnelManager."""
+        self.gateway = gateway
+        self.control_path = control_path
+        self.process: Optional[subprocess.Popen] = None
+        self.lock = threading.Lock()
+        self.released_at = time.time()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the master process is running."""
+        return self.process is not None and self.process.poll() is None
+
+
+class TunnelManager:
+    """Shares SSH master connections and port forwards between viewers.
+
+    The first launch through a gateway starts a multiplexed SSH master
+    (ControlMaster) for it; every tunnel after that is added to the
+    running master with `ssh -O forward`, which skips the SSH handshake
+    and authentication. Tunnels are reference-counted per (gateway, host,
+    port), so viewers to the same server share one forwarded port. A
+    tunnel unused for `idle_timeout` seconds is cancelled, and so is a
+    master with no tunnels left.
+
+    Masters run with BatchMode, so the gateway must accept key-based
+    (or agent) authentication.
+    """
+
+    def __init__(self, control_dir: Path, idle_timeout: float = 300.0,
+                 ssh_command: str = "ssh", connect_timeout: float = 15.0):
+        """Initialize the manager; nothing runs until the first acquire()."""
+        self.control_dir = Path(control_dir)
+        self.idle_timeout = idle_timeout
+        self.ssh_command = ssh_command
+        self.connect_timeout = connect_timeout
+
+        self._lock = threading.Lock()
+        self._masters: Dict[str, _Master] = {}
+        self._tunnels: Dict[Tuple[str, str, int], Tunnel] = {}
+        self._exit_hook_registered = False
+
+    def acquire(self, gateway: str, host: str, port: int) -> Tunnel:
+        """Get a tunnel to host:port through gateway, adding a reference.
+
+        Starts the gateway's master connection if needed. Raises
+        TunnelError if SSH fails.
+        """
+        key = (gateway, host, port)
+        while True:
+            master = self._master_for(gateway)
+            # One setup per gateway at a time; other gateways aren't held up
+            with master.lock:
+                if self._masters.get(gateway) is master:
+                    return self._acquire_on(master, key)
+            # close_idle() retired this master meanwhile; start a new one
+
+    def _master_for(self, gateway: str) -> _Master:
+        """Get (or register) the master record for a gateway."""
+        with self._lock:
+            master = self._masters.get(gateway)
+            if master is None:
+                digest = hashlib.sha1(gateway.encode()).hexdigest()[:12]
+                name = f"{digest}-{os.getpid()}.sock"
+                control_path = self.control_dir / name
+                # A long home directory can push it past the socket limit
+                if len(os.fsencode(control_path)) > MAX_CONTROL_PATH:
+                    control_path = short_control_dir() / name
+                master = _Master(gateway, control_path)
+                self._masters[gateway] = master
+            return master
+
+    def _acquire_on(self, master: _Master,
+                    key: Tuple[str, str, int]) -> Tunnel:
+        """Reference or create a tunnel; called with master.lock held."""
+        gateway, host, port = key
+        if not master.alive:
+            self._drop_tunnels(gateway)
+            self._start_master(master)
+
+        with self._lock:
+            tunnel = self._tunnels.get(key)
+            if tunnel is not None:
+                tunnel.refs += 1
+                return tunnel
+
+        local_port = self._forward(master, host, port)
+        tunnel = Tunnel(gateway, host, port, local_port, refs=1)
+        with self._lock:
+            self._tunnels[key] = tunnel
+        return tunnel
+
+    def release(self, tunnel: Tunnel) -> None:
+        """Drop a reference; idle tunnels are closed after idle_timeout."""
+        with self._lock:
+            tunnel.refs = max(0, tunnel.refs - 1)
+            if tunnel.refs:
+                return
+            now = time.time()
+            tunnel.released_at = now
+            master = self._masters.get(tunnel.gateway)
+            if master is not None:
+                master.released_at = now
+
+        timer = threading.Timer(self.idle_timeout, self.close_idle)
+        timer.daemon = True
+        timer.start()
+
+    def tunnels(self) -> List[Tunnel]:
+        """Open tunnels."""
+        with self._lock:
+            return list(self._tunnels.values())
+
+    def close_idle(self) -> None:
+        """Cancel tunnels and masters unused for idle_timeout seconds."""
+        cutoff = time.time() - self.idle_timeout
+        with self._lock:
+            idle_tunnels = [
+                tunnel for tunnel in self._tunnels.values()
+                if tunnel.refs == 0 and tunnel.released_at <= cutoff
+            ]
+            for tunnel in idle_tunnels:
+                del self._tunnels[(tunnel.gateway, tunnel.host, tunnel.port)]
+            busy = {tunnel.gateway for tunnel in self._tunnels.values()}
+            idle_masters = [
+                master for gateway, master in self._masters.items()
+                if gateway not in busy and master.released_at <= cutoff
+            ]
+            for master in idle_masters:
+                del self._masters[master.gateway]
+
+        for tunnel in idle_tunnels:
+            master = self._masters.get(tunnel.gateway)
+            if master is not None and master.alive:
+                self._control(master, "cancel", self._forward_spec(
+                    tunnel.local_port, tunnel.host, tunnel.port
+                ))
+        for master in idle_masters:
+            with master.lock:
+                self._stop_master(master)
+
+    def close_all(self) -> None:
+        """Shut down every master connection and its tunnels."""
+        with self._lock:
+            masters = list(self._masters.values())
+            self._masters.clear()
+            self._tunnels.clear()
+        for master in masters:
+            self._stop_master(master)
+
+    def _ssh_args(self, master: _Master) -> List[str]:
+        """ssh arguments selecting the master's socket and destination."""
+        destination, port = parse_gateway(master.gateway)
+        args = ["-S", str(master.control_path)]
+        if port is not None:
+            args.extend(["-p", str(port)])
+        return args + [destination]
+
+    def _start_master(self, master: _Master) -> None:
+        """Start the master and wait until its control socket answers."""
+        directory = master.control_path.parent
+        directory.mkdir(parents=True, exist_ok=True, mode=0o700)
+        info = directory.stat()
+        # The fallback directory lives in a shared place like /tmp
+        if info.st_uid != os.getuid() or info.st_mode & 0o077:
+            raise TunnelError(f"{directory} is not private to this user")
+        if master.control_path.exists():
+            master.control_path.unlink()
+        log_path = master.control_path.with_suffix(".log")
+
+        with tracing.span("tunnel.master", gateway=master.gateway):
+            with open(log_path, 'wb') as log:
+                master.process = subprocess.Popen(
+                    [self.ssh_command, "-M", "-N",
+                     "-o", "ControlPersist=no",
+                     "-o", "BatchMode=yes",
+                     "-o", "ExitOnForwardFailure=yes",
+                     "-o", "ServerAliveInterval=30",
+                     "-o", f"ConnectTimeout={int(self.connect_timeout)}",
+                     *self._ssh_args(master)],
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.DEVNULL,
+                    stderr=log
+                )
+            if not self._exit_hook_registered:
+                atexit.register(self.close_all)
+                self._exit_hook_registered = True
+
+            deadline = time.monotonic() + self.connect_timeout
+            while time.monotonic() < deadline:
+                if master.process.poll() is not None:
+                    break
+                if (master.control_path.exists() and
+                        self._control(master, "check") is None):
+                    return
+                time.sleep(0.05)
+
+        self._stop_master(master)
+        try:
+            reason = log_path.read_text(errors='replace').strip()
+        except OSError:
+            reason = ""
+        reason = reason.splitlines()[-1] if reason else "timed out"
+        raise TunnelError(f"SSH to {master.gateway} failed: {reason}")
+
+    def _stop_master(self, master: _Master) -> None:
+        """Ask the master to exit, killing it if it doesn't."""
+        process = master.process
+        if process is None or process.poll() is not None:
+            return
+        self._control(master, "exit")
+        try:
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def _forward(self, master: _Master, host: str, port: int) -> int:
+        """Add a local forward to host:port to the master; returns the port."""
+        with tracing.span("tunnel.forward", gateway=master.gateway,
+                          target=f"{host}:{port}"):
+            error = None
+            # Another process can grab the free port before ssh binds it
+            for _ in range(3):
+                local_port = free_local_port()
+                error = self._control(
+                    master, "forward",
+                    self._forward_spec(local_port, host, port)
+                )
+                if error is None:
+                    return local_port
+        raise TunnelError(
+            f"Forwarding {host}:{port} through {master.gateway} failed: "
+            f"{error}"
+        )
+
+    def _forward_spec(self, local_port: int, host: str,
+                      port: int) -> List[str]:
+        """-L arguments for a loopback forward to host:port."""
+        if ":" in host:
+            host = f"[{host}]"
+        return ["-L", f"127.0.0.1:{local_port}:{host}:{port}"]
+
+    def _control(self, master: _Master, command: str,
+                 extra: Optional[List[str]] = None) -> Optional[str]:
+        """Send a control command to the master; returns an error or None."""
+        try:
+            result = subprocess.run(
+                [self.ssh_command, "-O", command, *(extra or []),
+                 *self._ssh_args(master)],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                text=True,
+                timeout=self.connect_timeout
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return str(e)
+        if result.returncode != 0:
+            return result.stderr.strip() or f"exit code {result.returncode}"
+        return None
+
+    def _drop_tunnels(self, gateway: str) -> None:
+        """Forget tunnels of a master that died; their ports are gone."""
+        with self._lock:
+            for key in [k for k in self._tunnels if k[0] == gateway]:
+                del self._tunnels[key]
@@ -1,18 +1,99 @@
-import subprocess
+import json
 import os
-from typing import Optional
+import re
+import shutil
+import subprocess
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 from turbovncui.models.connection import Connection
+from turbovncui.models.profile import PerformanceSettings
+from turbovncui.utils import tracing
+from turbovncui.utils.database import atomic_write_json
+from turbovncui.utils.launch_stats import LaunchStats
+from turbovncui.utils.link_quality import LinkTuner
+from turbovncui.utils.profiles import ProfileStore
+from turbovncui.utils.resource_monitor import (
+    ResourceMonitor, ResourcePolicy, SessionLimitError
+)
+from turbovncui.utils.session_supervisor import (
+    SessionSupervisor, ViewerSession
+)
+from turbovncui.utils.tunnels import Tunnel, TunnelManager, parse_gateway
+
+
+# Options as listed in `vncviewer --help`, e.g. "  -Quality <value>"
+HELP_OPTION_RE = re.compile(r"^\s*(-[A-Za-z][\w-]*)", re.MULTILINE)
+# Port of a gateway's SSH server when the gateway doesn't name one
+SSH_PORT = 22
+
+
+def default_cache_dir() -> str:
+    """Get the directory for caches and logs (~/.cache/turbovncui)."""
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    # Per the XDG spec, empty and relative values are ignored
+    if not cache_home or not os.path.isabs(cache_home):
+        cache_home = os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "turbovncui")
+
+
+@dataclass
+class ProbeResult:
+    """What we found out about the viewer binary."""
+    available: bool
+    version: Optional[str] = None
+    options: List[str] = field(default_factory=list)
+
+
+@dataclass
+class PreparedLaunch:
+    """A viewer launch whose tunnel and command line are ready."""
+    connection: Connection
+    command: List[str]
+    requested_at: float
+    tunnel: Optional[Tunnel] = None
+    # When the tunnel was up, for the launch's "tunnel" milestone
+    tunnel_ready: Optional[float] = None
 
 
 class VNCLaucher:
     """Handles launching TurboVNC connections."""
     
-    def __init__(self, turbovnc_path: Optional[str] = None):
+    def __init__(self, turbovnc_path: Optional[str] = None,
+                 cache_dir: Optional[str] = None,
+                 supervisor: Optional[SessionSupervisor] = None,
+                 profile_store: Optional[ProfileStore] = None):
         """Initialize with optional custom TurboVNC path."""
         if turbovnc_path:
             self.turbovnc_path = turbovnc_path
         else:
             self.turbovnc_path = self._find_turbovnc_binary()
+        
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+        self.probe_cache_file = Path(cache_dir) / "probe.json"
+        
+        if supervisor is None:
+            supervisor = SessionSupervisor(Path(cache_dir) / "sessions")
+        self.supervisor = supervisor
+        self.launch_stats = LaunchStats(cache_dir)
+        supervisor.add_listener(self._on_session_event)
+        self.tunnels = TunnelManager(Path(cache_dir) / "ssh")
+        self._tunnel_lock = threading.Lock()
+        self._session_tunnels: Dict[int, Tunnel] = {}
+        
+        if profile_store is None:
+            profile_store = ProfileStore()
+        self.profile_store = profile_store
+        self.link_tuner = LinkTuner(cache_dir, profile_store.config_dir)
+        policy_file = profile_store.config_dir / "resource_limits.json"
+        self.resource_monitor = ResourceMonitor(
+            supervisor, ResourcePolicy.load(policy_file)
+        )
+        self._probe_lock = threading.Lock()
+        self._probe_result: Optional[ProbeResult] = None
     
     def _find_turbovnc_binary(self) -> str:
         """Find the TurboVNC binary, checking common locations first."""
@@ -24,57 +105,285 @@ class VNCLaucher:
         # Fall back to system PATH
         return "vncviewer"
     
-    def launch_connection(self, connection: Connection) -> bool:
-        """Launch TurboVNC with the specified connection."""
-        try:
-            # Build the command
-            cmd = [self.turbovnc_path]
-            
-            # Add username parameter if specified
-            if connection.username:
-                cmd.extend(["-User", connection.username])
-            
-            # Add the connection string
+    def build_command(self, connection: Connection,
+                      geometry: Optional[str] = None,
+                      tunnel: Optional[Tunnel] = None) -> List[str]:
+        """Build the viewer command line for a connection.
+        
+        With the "auto" preset this measures the link to the server first
+        (or reuses a recent measurement); see link_endpoint(). If the link
+        can't be measured, the connection's own settings are used when
+        they aren't "auto" too, and the viewer's defaults otherwise.
+        geometry ("WxH+X+Y") places the viewer window, as far as the viewer
+        supports it. With a tunnel the viewer connects to its local port; a
+        gateway connection without one falls back to the viewer's own
+        per-launch SSH tunnel (-via).
+        """
+        cmd = [self.turbovnc_path]
+        
+        # Add username parameter if specified
+        if connection.username:
+            cmd.extend(["-User", connection.username])
+        
+        # Add encoding/compression settings from the profile or connection
+        settings = self.profile_store.settings_for(connection)
+        if settings and settings.preset == "auto":
+            settings = self.link_tuner.settings_for(
+                *self.link_endpoint(connection)
+            )
+            own = connection.performance
+            if settings is None and own is not None and own.preset != "auto":
+                settings = own.resolved()
+        if settings:
+            cmd.extend(self.performance_args(settings))
+        
+        if geometry:
+            cmd.extend(self.geometry_args(geometry))
+        
+        # Add the connection string
+        if tunnel is not None:
+            cmd.append(tunnel.local_address)
+        else:
+            if connection.gateway:
+                cmd.extend(["-via", connection.gateway])
             cmd.append(connection.get_connection_string())
-            
-            # Launch the process
-            subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+        return cmd
+    
+    def link_endpoint(self, connection: Connection) -> Tuple[str, int]:
+        """Where to measure a connection's link for the "auto" preset.
+        
+        A tunnel's local port answers in no time whatever the link, so
+        gateway connections are measured at the gateway's SSH server. That
+        is usually the slow hop; the server tends to be on the gateway's LAN.
+        """
+        if not connection.gateway:
+            return connection.host, connection.port
+        destination, port = parse_gateway(connection.gateway)
+        host = destination.rpartition("@")[2].strip("[]")
+        return host, port if port is not None else SSH_PORT
+    
+    def performance_args(self, settings: PerformanceSettings) -> List[str]:
+        """Translate performance settings into viewer options."""
+        args = []
+        if settings.encoding:
+            args.extend(["-Encoding", settings.encoding])
+        if settings.jpeg_quality is not None:
+            args.extend(["-JPEG", "-Quality", str(settings.jpeg_quality)])
+        if settings.jpeg_subsampling:
+            args.extend(["-Subsampling", settings.jpeg_subsampling])
+        if settings.compress_level is not None:
+            args.extend(["-CompressLevel", str(settings.compress_level)])
+        return args
+    
+    def geometry_args(self, geometry: str) -> List[str]:
+        """Translate a "WxH+X+Y" window geometry into viewer options.
+        
+        Older X11 viewers take the whole geometry; newer ones only let us
+        set the window size. Viewers that support neither get nothing.
+        """
+        options = self.get_supported_options()
+        if "-geometry" in options:
+            return ["-geometry", geometry]
+        if "-WindowSize" in options:
+            size = geometry.split("+", 1)[0]
+            return ["-WindowSize", size]
+        return []
+    
+    def prepare_launch(self, connection: Connection,
+                       geometry: Optional[str] = None,
+                       requested_at: Optional[float] = None) -> PreparedLaunch:
+        """Get everything ready to start a viewer, raising OSError on failure.
+        
+        This is the part of a launch that can block for seconds: starting
+        the gateway's SSH master and measuring the link. The GUI runs it
+        on a worker thread. Hand the result to spawn(), or to discard()
+        if the launch is dropped.
+        """
+        if requested_at is None:
+            requested_at = time.time()
+        # Gateway connections reuse a shared SSH master and port forward
+        tunnel = None
+        if connection.gateway:
+            tunnel = self.tunnels.acquire(
+                connection.gateway, connection.host, connection.port
             )
-            
-            # Don't wait for the process to complete
-            # TurboVNC viewer will run independently
-            return True
+        prepared = PreparedLaunch(
+            connection, [], requested_at, tunnel, time.time()
+        )
+        try:
+            with tracing.span("launcher.build_command"):
+                prepared.command = self.build_command(
+                    connection, geometry, tunnel
+                )
+        except BaseException:
+            self.discard(prepared)
+            raise
+        return prepared
+    
+    def spawn(self, prepared: PreparedLaunch) -> ViewerSession:
+        """Start a prepared viewer under the supervisor."""
+        try:
+            # Launch the process; the supervisor drains its output
+            with tracing.span("launcher.spawn",
+                              binary=prepared.command[0]) as span:
+                process = subprocess.Popen(
+                    prepared.command,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT
+                )
+                span.set("pid", process.pid)
+        except BaseException:
+            self.discard(prepared)
+            raise
+        
+        # Don't wait for the process to complete
+        # TurboVNC viewer will run independently
+        session = self.supervisor.add(
+            process, prepared.connection.name, prepared.requested_at
+        )
+        self.resource_monitor.start()
+        if prepared.tunnel is not None:
+            session.milestones["tunnel"] = (
+                prepared.tunnel_ready - prepared.requested_at
+            )
+            self._attach_tunnel(session, prepared.tunnel)
+            prepared.tunnel = None
+        return session
+    
+    def discard(self, prepared: PreparedLaunch) -> None:
+        """Release what a prepared launch holds without starting it."""
+        if prepared.tunnel is not None:
+            self.tunnels.release(prepared.tunnel)
+            prepared.tunnel = None
+    
+    def start_session(self, connection: Connection,
+                      geometry: Optional[str] = None) -> ViewerSession:
+        """Launch TurboVNC under the supervisor, raising OSError on failure."""
+        requested_at = time.time()
+        with tracing.span("launcher.launch", connection=connection.name), \
+                self.resource_monitor.launch_slot():
+            return self.spawn(
+                self.prepare_launch(connection, geometry, requested_at)
+            )
+    
+    def _attach_tunnel(self, session: ViewerSession, tunnel: Tunnel) -> None:
+        """Hold the tunnel until the session's viewer exits."""
+        with self._tunnel_lock:
+            if session.exit_code is None:
+                self._session_tunnels[session.session_id] = tunnel
+                return
+        # The viewer already exited (and its exit event already went by)
+        self.tunnels.release(tunnel)
+    
+    def launch_session(self,
+                       connection: Connection) -> Optional[ViewerSession]:
+        """Launch TurboVNC and hand the process to the session supervisor."""
+        return self._report_failure(self.start_session, connection)
+    
+    def launch_prepared(self, prepared: PreparedLaunch
+                        ) -> Optional[ViewerSession]:
+        """Start a prepared launch, printing why if it fails."""
+        def start():
+            with self.resource_monitor.launch_slot():
+                return self.spawn(prepared)
+        
+        session = self._report_failure(start)
+        if session is None:
+            self.discard(prepared)
+        return session
+    
+    def _report_failure(self, launch, *args) -> Optional[ViewerSession]:
+        """Run a launch, printing the error and returning None if it fails."""
+        try:
+            return launch(*args)
             
         except FileNotFoundError:
             print(f"Error: TurboVNC viewer not found at "
                   f"'{self.turbovnc_path}'")
             print("Please ensure TurboVNC is installed and in your PATH")
-            return False
+            return None
+        except SessionLimitError as e:
+            print(f"Error: {e}")
+            return None
         except Exception as e:
             print(f"Error launching TurboVNC: {e}")
-            return False
+            return None
     
-    def test_connection(self, connection: Connection) -> bool:
-        """Test if TurboVNC can be launched (doesn't actually connect)."""
+    def launch_detached(self, connection: Connection) -> Optional[int]:
+        """Launch TurboVNC so it outlives this process; returns its pid.
+        
+        Used by the command-line interface, which exits right away: the
+        viewer writes straight to a log file instead of a supervised pipe.
+        """
         try:
-            # Just check if the command exists and produces output
-            result = subprocess.run(
-                [self.turbovnc_path, "--help"],
-                capture_output=True,
-                text=True,
-                timeout=5
+            with tracing.span("launcher.build_command"):
+                cmd = self.build_command(connection)
+            
+            log_dir = self.supervisor.log_dir
+            log_dir.mkdir(parents=True, exist_ok=True)
+            safe_name = re.sub(r"[^\w.-]", "_", connection.name)
+            with open(log_dir / f"{safe_name}-detached.log", 'ab') as log:
+                with tracing.span("launcher.spawn", binary=cmd[0],
+                                  detached=True):
+                    process = subprocess.Popen(
+                        cmd,
+                        stdin=subprocess.DEVNULL,
+                        stdout=log,
+                        stderr=subprocess.STDOUT,
+                        start_new_session=True
+                    )
+            return process.pid
+            
+        except FileNotFoundError:
+            print(f"Error: TurboVNC viewer not found at "
+                  f"'{self.turbovnc_path}'")
+            print("Please ensure TurboVNC is installed and in your PATH")
+            return None
+        except Exception as e:
+            print(f"Error launching TurboVNC: {e}")
+            return None
+    
+    def launch_connection(self, connection: Connection) -> bool:
+        """Launch TurboVNC with the specified connection."""
+        return self.launch_session(connection) is not None
+    
+    def _on_session_event(self, event: str, session: ViewerSession) -> None:
+        """Record launch outcomes and release tunnels of exited viewers."""
+        if event == "connected":
+            phases = {
+                name: round(seconds * 1000, 1)
+                for name, seconds in session.milestones.items()
+            }
+            self.launch_stats.record_success(
+                session.connection_name, session.launch_latency * 1000, phases
             )
-            # TurboVNC returns 1 but still works, so check for output instead
-            return len(result.stdout) > 0 or len(result.stderr) > 0
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            return False
+        elif event == "failed":
+            self.launch_stats.record_failure(
+                session.connection_name, session.failure
+            )
+        elif event == "exited":
+            with self._tunnel_lock:
+                tunnel = self._session_tunnels.pop(session.session_id, None)
+            if tunnel is not None:
+                self.tunnels.release(tunnel)
     
-    def is_turbovnc_available(self) -> bool:
-        """Check if TurboVNC is available and executable."""
+    def _binary_key(self) -> Optional[str]:
+        """Identify the viewer binary by resolved path, inode and mtime."""
+        path = shutil.which(self.turbovnc_path)
+        if path is None:
+            return None
+        
+        path = os.path.realpath(path)
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return f"{path}:{st.st_ino}:{st.st_mtime_ns}"
+    
+    @tracing.traced("launcher.probe")
+    def _run_probe(self) -> ProbeResult:
+        """Run the viewer to find out if it works and what it supports."""
         try:
             # Just check if the command exists and produces output
             result = subprocess.run(
@@ -83,13 +392,17 @@ class VNCLaucher:
                 text=True,
                 timeout=5
             )
-            # TurboVNC returns 1 but still works, so check for output instead
-            return len(result.stdout) > 0 or len(result.stderr) > 0
         except (FileNotFoundError, subprocess.TimeoutExpired):
-            return False
-    
-    def get_turbovnc_version(self) -> Optional[str]:
-        """Get TurboVNC version if available."""
+            return ProbeResult(available=False)
+        
+        # TurboVNC returns 1 but still works, so check for output instead
+        help_text = result.stdout + result.stderr
+        if not help_text:
+            return ProbeResult(available=False)
+        
+        options = sorted(set(HELP_OPTION_RE.findall(help_text)))
+        
+        version = None
         try:
             result = subprocess.run(
                 [self.turbovnc_path, "--version"],
@@ -98,10 +411,74 @@ class VNCLaucher:
                 timeout=5
             )
             if result.returncode == 0:
-                return result.stdout.strip()
-            return None
+                version = result.stdout.strip()
         except (FileNotFoundError, subprocess.TimeoutExpired):
-            return None
+            pass
+        
+        return ProbeResult(available=True, version=version, options=options)
+    
+    def _load_probe_cache(self) -> dict:
+        """Load cached probe results, keyed by binary."""
+        try:
+            with open(self.probe_cache_file, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+    
+    def probe(self, refresh: bool = False) -> ProbeResult:
+        """Probe the viewer binary, using the on-disk cache when possible.
+        
+        The cache is keyed by binary path, inode and mtime, so it is only
+        invalidated when the viewer is reinstalled or replaced.
+        """
+        with self._probe_lock:
+            if self._probe_result is not None and not refresh:
+                return self._probe_result
+            
+            key = self._binary_key()
+            if key is None:
+                # Not on disk at all, no point spawning anything
+                self._probe_result = ProbeResult(available=False)
+                return self._probe_result
+            
+            cache = self._load_probe_cache()
+            if key in cache and not refresh:
+                try:
+                    self._probe_result = ProbeResult(**cache[key])
+                    return self._probe_result
+                except TypeError:
+                    pass
+            
+            self._probe_result = self._run_probe()
+            if self._probe_result.available:
+                # Only keep the entry for the binary we have now
+                try:
+                    self.probe_cache_file.parent.mkdir(
+                        parents=True, exist_ok=True
+                    )
+                    atomic_write_json(
+                        self.probe_cache_file,
+                        {key: asdict(self._probe_result)}
+                    )
+                except OSError as e:
+                    print(f"Warning: could not write probe cache: {e}")
+            return self._probe_result
+    
+    def test_connection(self, connection: Connection) -> bool:
+        """Test if TurboVNC can be launched (doesn't actually connect)."""
+        return self.probe().available
+    
+    def is_turbovnc_available(self) -> bool:
+        """Check if TurboVNC is available and executable."""
+        return self.probe().available
+    
+    def get_turbovnc_version(self) -> Optional[str]:
+        """Get TurboVNC version if available."""
+        return self.probe().version
+    
+    def get_supported_options(self) -> List[str]:
+        """Get the options listed in the viewer's help output."""
+        return self.probe().options
     
     def get_detected_path(self) -> str:
         """Get the detected TurboVNC binary path."""
@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# Run against the source tree without installing it
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+# Qt tests never open a window
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
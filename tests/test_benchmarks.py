@@ -0,0 +1,30 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from run_benchmarks import compare  # noqa: E402
+
+
+def results(**cases):
+    return {"results": {
+        name: {"seconds": 0.001, "peak_bytes": kib * 1024}
+        for name, kib in cases.items()
+    }}
+
+
+def test_small_memory_differences_are_noise():
+    baseline = results(expand_group=1, search=16, empty=0)
+    current = results(expand_group=11, search=20, empty=40)
+
+    assert compare(current, baseline, 1.25, 1.15) == []
+
+
+def test_memory_growth_past_the_floor_regresses():
+    baseline = results(load=1000, empty=0)
+    current = results(load=1200, empty=100)
+
+    assert compare(current, baseline, 1.25, 1.15) == [
+        "load: peak 1000 KiB -> 1200 KiB",
+        "empty: peak 0 KiB -> 100 KiB",
+    ]
@@ -0,0 +1,194 @@
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = str(Path(__file__).resolve().parent.parent / "src")
+
+
+def test_cli_does_not_import_qt():
+    env = dict(os.environ, PYTHONPATH=SRC)
+    subprocess.run(
+        [sys.executable, "-c",
+         "import turbovncui.cli, sys; "
+         "assert not any(m.startswith('PyQt5') for m in sys.modules)"],
+        env=env, check=True
+    )
+
+
+def test_cli_commands_do_not_import_qt(tmp_path):
+    env = dict(os.environ, PYTHONPATH=SRC, HOME=str(tmp_path))
+    env.pop("XDG_CACHE_HOME", None)
+    subprocess.run(
+        [sys.executable, "-c",
+         "import sys, turbovncui.cli as cli\n"
+         "for argv in (['add', 'a', 'a.example.com'], ['list'],\n"
+         "             ['list', '--json']):\n"
+         "    try:\n"
+         "        cli.main(argv)\n"
+         "    except SystemExit as e:\n"
+         "        assert not e.code, argv\n"
+         "assert not any(m.startswith('PyQt5') for m in sys.modules)"],
+        env=env, check=True, capture_output=True
+    )
+
+
+# Each subcommand may import this much beyond a bare interpreter, in
+# microseconds; `list` took about 70 ms when this was written
+IMPORT_BUDGET_US = 100_000
+
+VIEWER = """\
+import sys
+from pathlib import Path
+if sys.argv[1:] == ["--help"]:
+    print("  -User <name>  user name\\n  -Quality <q>  JPEG quality")
+elif sys.argv[1:] == ["--version"]:
+    print("TurboVNC Viewer 9.9")
+else:
+    with open(Path(__file__).with_name("calls"), "a") as f:
+        print(*sys.argv[1:], file=f)
+"""
+
+
+def cli(tmp_path, *argv, viewer=None):
+    """Run turbovncui-cli with its own HOME and config dir."""
+    env = dict(os.environ, PYTHONPATH=SRC, HOME=str(tmp_path))
+    env.pop("XDG_CACHE_HOME", None)
+    env.pop("TURBOVNCUI_STORAGE", None)
+    options = ["--config-dir", str(tmp_path / "config")]
+    if viewer is not None:
+        options += ["--viewer", str(viewer)]
+    return subprocess.run(
+        [sys.executable, "-m", "turbovncui.cli", *options, *argv],
+        env=env, capture_output=True, text=True
+    )
+
+
+def fake_viewer(tmp_path):
+    """A vncviewer stand-in that logs how it was launched."""
+    path = tmp_path / "vncviewer"
+    path.write_text(f"#!{sys.executable}\n{VIEWER}")
+    path.chmod(0o755)
+    return path
+
+
+def import_time_us(tmp_path, code):
+    """Total time spent importing modules while running code."""
+    env = dict(os.environ, PYTHONPATH=SRC, HOME=str(tmp_path))
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        env=env, capture_output=True, text=True, check=True
+    ).stderr
+    # Top-level imports only; their cumulative time covers the nested ones
+    return sum(
+        int(match.group(1)) for match in re.finditer(
+            r"^import time:\s+\d+ \|\s+(\d+) \| \S", stderr, re.MULTILINE
+        )
+    )
+
+
+def test_list_stays_within_import_budget(tmp_path):
+    cli(tmp_path, "add", "a", "a.example.com")
+    code = ("import sys; sys.argv[1:] = ['--config-dir', %r, 'list']; "
+            "from turbovncui.cli import main; main()"
+            % str(tmp_path / "config"))
+    # Best of three, against the interpreter's own startup imports
+    bare = min(import_time_us(tmp_path, "pass") for _ in range(3))
+    used = min(import_time_us(tmp_path, code) for _ in range(3))
+    assert used - bare < IMPORT_BUDGET_US
+
+
+def test_add_list_and_remove(tmp_path):
+    assert cli(tmp_path, "add", "a", "a.example.com", "--port", "5901",
+               "--group", "lab").returncode == 0
+    assert cli(tmp_path, "add", "b", "b.example.com").returncode == 0
+
+    duplicate = cli(tmp_path, "add", "a", "other.example.com")
+    assert duplicate.returncode == 1
+    assert "already exists" in duplicate.stderr
+    assert cli(tmp_path, "add", "c", "c.example.com",
+               "--port", "0").returncode == 1
+
+    assert cli(tmp_path, "list").stdout.splitlines() == [
+        "a (a.example.com:5901)", "b (b.example.com:5900)"
+    ]
+    assert cli(tmp_path, "list", "--names", "--group", "lab").stdout == "a\n"
+    listed = json.loads(cli(tmp_path, "list", "--json").stdout)
+    assert [(c["name"], c["port"]) for c in listed] == [("a", 5901),
+                                                        ("b", 5900)]
+
+    assert cli(tmp_path, "remove", "a").returncode == 0
+    assert cli(tmp_path, "remove", "a").returncode == 1
+    assert cli(tmp_path, "list", "--names").stdout == "b\n"
+
+
+def test_connect_launches_the_viewer(tmp_path):
+    viewer = fake_viewer(tmp_path)
+    calls = tmp_path / "calls"
+    cli(tmp_path, "add", "alpha", "alpha.example.com", "--username", "me")
+    cli(tmp_path, "add", "beta", "beta.example.com")
+
+    assert cli(tmp_path, "connect", "alpha", viewer=viewer).returncode == 0
+    partial = cli(tmp_path, "connect", "bet", viewer=viewer)
+    assert partial.returncode == 0
+    assert "Connecting to beta" in partial.stderr
+
+    deadline = time.monotonic() + 10
+    while len(calls.read_text().splitlines() if calls.exists() else []) < 2:
+        assert time.monotonic() < deadline, "viewer never ran"
+        time.sleep(0.05)
+    launched = calls.read_text().splitlines()
+    assert any("-User me" in line and "alpha.example.com:5900" in line
+               for line in launched)
+    assert any("beta.example.com:5900" in line for line in launched)
+
+    missing = cli(tmp_path, "connect", "nothing", viewer=viewer)
+    assert missing.returncode == 1
+    assert "no connection matches 'nothing'" in missing.stderr
+
+
+def test_connect_without_history_fails(tmp_path):
+    result = cli(tmp_path, "connect", viewer=fake_viewer(tmp_path))
+    assert result.returncode == 1
+    assert "no connection has been used yet" in result.stderr
+
+
+def test_probe_reports_the_viewer(tmp_path):
+    viewer = fake_viewer(tmp_path)
+    result = cli(tmp_path, "probe", "--json", "--refresh", viewer=viewer)
+    assert result.returncode == 0
+    assert json.loads(result.stdout) == {
+        "path": str(viewer), "available": True,
+        "version": "TurboVNC Viewer 9.9", "options": ["-Quality", "-User"],
+    }
+    assert "(available)" in cli(tmp_path, "probe", viewer=viewer).stdout
+
+    missing = cli(tmp_path, "probe", viewer=tmp_path / "no-such-viewer")
+    assert missing.returncode == 1
+    assert "(not found)" in missing.stdout
+
+
+def test_import_and_discover(tmp_path):
+    (tmp_path / "hosts.csv").write_text("name,host,port\nx,x.example,5902\n")
+    dry_run = cli(tmp_path, "import", str(tmp_path / "hosts.csv"),
+                  "--dry-run")
+    assert dry_run.returncode == 0
+    assert cli(tmp_path, "list", "--names").stdout == ""
+    assert cli(tmp_path, "import",
+               str(tmp_path / "hosts.csv")).returncode == 0
+    assert cli(tmp_path, "list").stdout == "x (x.example:5902)\n"
+    assert cli(tmp_path, "import",
+               str(tmp_path / "missing.csv")).returncode == 1
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    scan = cli(tmp_path, "discover", "127.0.0.1", "--ports", str(port),
+               "--json", "--timeout", "1")
+    assert scan.returncode == 0
+    assert json.loads(scan.stdout) == []
+    assert cli(tmp_path, "discover", "not-a-range").returncode == 1
@@ -0,0 +1,65 @@
+import multiprocessing
+import pytest
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import open_database
+
+WORKERS = 4
+ROUNDS = 25
+
+
+def hammer(backend, config_dir, worker):
+    """Add, edit and delete this worker's connections, racing the others.
+
+    Returns how many of the contested "shared-N" names this worker won.
+    """
+    db = open_database(config_dir, backend)
+    won = 0
+    for i in range(ROUNDS):
+        name = f"w{worker}-{i}"
+        assert db.add_connection(Connection(name, "new.example"))
+        won += db.add_connection(Connection(f"shared-{i}", f"w{worker}"))
+        if i % 3 == 0:
+            assert db.delete_connection(name)
+        elif i % 3 == 1:
+            assert db.update_connection(
+                name, Connection(f"{name}-renamed", f"{name}.example")
+            )
+        else:
+            assert db.update_connection(
+                name, Connection(name, f"{name}.example", group="edited")
+            )
+    db.close()
+    return won
+
+
+def expected_names():
+    names = {f"shared-{i}" for i in range(ROUNDS)}
+    for worker in range(WORKERS):
+        for i in range(ROUNDS):
+            if i % 3 == 1:
+                names.add(f"w{worker}-{i}-renamed")
+            elif i % 3 == 2:
+                names.add(f"w{worker}-{i}")
+    return names
+
+
+@pytest.mark.parametrize("backend", ["json", "journal", "sqlite"])
+def test_concurrent_writers_lose_nothing(tmp_path, backend):
+    config_dir = str(tmp_path)
+    with multiprocessing.Pool(WORKERS) as pool:
+        won = pool.starmap(
+            hammer, [(backend, config_dir, w) for w in range(WORKERS)]
+        )
+
+    # Every contested name went to exactly one worker
+    assert sum(won) == ROUNDS
+    connections = open_database(config_dir, backend).load_connections()
+    assert sorted(c.name for c in connections) == sorted(expected_names())
+    for connection in connections:
+        if not connection.name.startswith("shared-"):
+            assert connection.host == (
+                connection.name.replace("-renamed", "") + ".example"
+            )
+            assert connection.group == (
+                None if connection.name.endswith("-renamed") else "edited"
+            )
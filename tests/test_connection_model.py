@@ -0,0 +1,63 @@
+from PyQt5.QtCore import QCoreApplication, QModelIndex, QPersistentModelIndex
+from PyQt5.QtTest import QAbstractItemModelTester
+from turbovncui.gui.connection_model import ConnectionTreeModel
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import open_database
+
+app = QCoreApplication.instance() or QCoreApplication([])
+
+
+def make_model(tmp_path):
+    db = open_database(str(tmp_path))
+    for name, group in [("a", None), ("b", "lab"), ("c", "lab"),
+                        ("d", "lab/rack1"), ("e", "prod")]:
+        db.add_connection(Connection(name, f"{name}.example", group=group))
+    model = ConnectionTreeModel(db)
+    QAbstractItemModelTester(
+        model, QAbstractItemModelTester.FailureReportingMode.Fatal
+    )
+    model.reload()
+    for path in ("", "lab"):
+        model.fetchMore(model.index_for_group(path))
+    resets = []
+    model.modelReset.connect(lambda: resets.append(True))
+    return db, model, resets
+
+
+def rows(model, path):
+    parent = model.index_for_group(path)
+    indexes = [model.index(row, 0, parent)
+               for row in range(model.rowCount(parent))]
+    return [index.data(model.NameRole) or index.data() for index in indexes]
+
+
+def test_reload_keeps_persistent_indexes(tmp_path):
+    db, model, resets = make_model(tmp_path)
+    kept = QPersistentModelIndex(model.index_for_name("c"))
+    group = QPersistentModelIndex(model.index_for_group("prod"))
+
+    db.delete_connection("b")
+    db.add_connection(Connection("f", "f.example", group="lab"))
+    db.add_connection(Connection("g", "g.example", group="new"))
+    db.update_connection("e", Connection("e", "e2.example", group="prod"))
+    model.reload([db.get_connection_by_name("a")])
+
+    assert resets == []
+    assert kept.isValid() and kept.data(model.NameRole) == "c"
+    assert group.isValid() and group.data(model.GroupRole) == "prod"
+    assert rows(model, "") == ["a", "lab (3)", "new (1)", "prod (1)"]
+    assert rows(model, "lab") == ["rack1 (1)", "c", "f"]
+
+
+def test_reload_removes_emptied_groups(tmp_path):
+    db, model, resets = make_model(tmp_path)
+    lab = QPersistentModelIndex(model.index_for_group("lab"))
+
+    db.delete_connection("d")
+    db.delete_connection("e")
+    model.reload()
+
+    assert resets == []
+    assert model.group_paths() == ["lab"]
+    assert lab.isValid() and model.rowCount(QModelIndex(lab)) == 2
+    assert model.index_for_name("d").isValid() is False
@@ -0,0 +1,51 @@
+import json
+import shutil
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import ConnectionDatabase
+from turbovncui.utils.journal import JournaledConnectionDatabase
+
+
+def test_non_list_file_is_treated_as_corrupt(tmp_path):
+    (tmp_path / "connections.json").write_text("null")
+    db = ConnectionDatabase(str(tmp_path))
+
+    assert db.load_connections() == []
+    assert (tmp_path / "connections.json.corrupt").read_text() == "null"
+
+
+def test_failed_backup_does_not_break_loading(tmp_path, monkeypatch):
+    (tmp_path / "connections.json").write_text("{not json")
+
+    def fail(*args):
+        raise PermissionError("read-only")
+
+    monkeypatch.setattr(shutil, "copyfile", fail)
+    assert ConnectionDatabase(str(tmp_path)).load_connections() == []
+
+
+def test_journal_skips_records_without_payload(tmp_path):
+    db = JournaledConnectionDatabase(str(tmp_path))
+    db.add_connection(Connection("a", "a.example.com"))
+    with open(tmp_path / "connections.journal", "a") as f:
+        f.write(json.dumps({"op": "add", "name": "b", "payload": None}))
+        f.write("\n5\n")
+    db.add_connection(Connection("c", "c.example.com"))
+
+    reopened = JournaledConnectionDatabase(str(tmp_path))
+    assert [c.name for c in reopened.load_connections()] == ["a", "c"]
+
+
+def test_invalid_records_are_backed_up_before_a_save(tmp_path):
+    original = json.dumps([
+        {"name": "a", "host": "a.example"},
+        {"name": "broken"},
+    ])
+    (tmp_path / "connections.json").write_text(original)
+    db = ConnectionDatabase(str(tmp_path))
+
+    assert [c.name for c in db.load_connections()] == ["a"]
+    db.add_connection(Connection("b", "b.example"))
+
+    assert (tmp_path / "connections.json.corrupt").read_text() == original
+    saved = json.loads((tmp_path / "connections.json").read_text())
+    assert [item["name"] for item in saved] == ["a", "b"]
@@ -0,0 +1,94 @@
+import ipaddress
+import socket
+import threading
+from turbovncui.utils.discovery import (
+    SubnetScanner, host_count, network_hosts, parse_networks
+)
+
+
+class FakeRFBServer:
+    """A local listener that greets every client with reply."""
+
+    def __init__(self, reply: bytes = b"RFB 003.008\n"):
+        self.reply = reply
+        self.sock = socket.socket()
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                return
+            with client:
+                client.sendall(self.reply)
+
+    def close(self):
+        self.sock.close()
+
+
+def closed_port() -> int:
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def scan(text, ports, **options):
+    found = []
+    stats = SubnetScanner(timeout=2, **options).scan(
+        parse_networks(text), ports, found.append
+    )
+    return stats, found
+
+
+def test_single_address_and_point_to_point_hosts():
+    for text, expected in [("10.0.0.5/32", ["10.0.0.5"]),
+                           ("10.0.0.4/31", ["10.0.0.4", "10.0.0.5"]),
+                           ("::1/128", ["::1"]),
+                           ("fe80::/127", ["fe80::", "fe80::1"]),
+                           ("10.0.0.0/30", ["10.0.0.1", "10.0.0.2"])]:
+        network = ipaddress.ip_network(text)
+        hosts = [str(host) for host in network_hosts(network)]
+        assert hosts == expected, text
+        assert host_count(network) == len(expected), text
+
+
+def test_scan_of_one_address_finds_the_server():
+    server = FakeRFBServer()
+    try:
+        stats, found = scan("127.0.0.1", [server.port])
+    finally:
+        server.close()
+
+    assert [(s.host, s.port, s.server_version) for s in found] == [
+        ("127.0.0.1", server.port, "3.8")
+    ]
+    assert (stats.probes, stats.live_hosts, stats.found) == (1, 1, 1)
+
+
+def test_refused_first_port_still_counts_as_live():
+    server = FakeRFBServer()
+    try:
+        stats, found = scan("127.0.0.1/32", [closed_port(), server.port])
+    finally:
+        server.close()
+
+    assert [s.port for s in found] == [server.port]
+    assert stats.probes == 2
+
+
+def test_non_vnc_listener_is_not_reported():
+    server = FakeRFBServer(b"SSH-2.0-OpenSSH\r\n")
+    try:
+        stats, found = scan("127.0.0.1", [server.port],
+                            skip_dead_hosts=False)
+    finally:
+        server.close()
+
+    assert found == []
+    assert (stats.live_hosts, stats.found) == (1, 0)
@@ -0,0 +1,80 @@
+import asyncio
+import socket
+from turbovncui.models.connection import Connection
+from turbovncui.utils.health import REFUSED, HealthMonitor, check_rfb
+
+
+async def serve(reply: bytes, delay: float = 0.0, stats=None):
+    """Start a local server that sends reply to every client."""
+    async def handle(reader, writer):
+        if stats is not None:
+            stats["open"] += 1
+            stats["peak"] = max(stats["peak"], stats["open"])
+        await asyncio.sleep(delay)
+        writer.write(reply)
+        await writer.drain()
+        if stats is not None:
+            stats["open"] -= 1
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def closed_port() -> int:
+    """A local port nothing listens on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_rfb_banner_is_reachable():
+    async def run():
+        server, port = await serve(b"RFB 003.008\n")
+        async with server:
+            return await check_rfb("127.0.0.1", port, timeout=2)
+
+    result = asyncio.run(run())
+    assert result.reachable
+    assert result.server_version == "3.8"
+    assert result.error is None
+    assert result.connect_ms is not None
+
+
+def test_garbage_is_not_a_vnc_server():
+    async def run():
+        server, port = await serve(b"SSH-2.0-Open\n")
+        async with server:
+            return await check_rfb("127.0.0.1", port, timeout=2)
+
+    result = asyncio.run(run())
+    assert not result.reachable
+    assert result.server_version is None
+    assert result.error == "not a VNC server"
+
+
+def test_closed_port_is_refused():
+    result = asyncio.run(check_rfb("127.0.0.1", closed_port(), timeout=2))
+    assert not result.reachable
+    assert result.error == REFUSED
+
+
+def test_checks_are_bounded_by_concurrency():
+    stats = {"open": 0, "peak": 0}
+
+    async def run():
+        servers = [await serve(b"RFB 003.008\n", 0.05, stats)
+                   for _ in range(12)]
+        connections = [Connection(f"server{i}", "127.0.0.1", port)
+                       for i, (_, port) in enumerate(servers)]
+        results = await HealthMonitor(concurrency=3).check_all_async(
+            connections
+        )
+        for server, _ in servers:
+            server.close()
+        return results
+
+    results = asyncio.run(run())
+    assert len(results) == 12
+    assert all(result.reachable for result in results.values())
+    assert 1 <= stats["peak"] <= 3
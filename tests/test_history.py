@@ -0,0 +1,16 @@
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import open_database
+from turbovncui.utils.history import resolve_connection
+
+
+def test_resolve_matches_name_or_host_but_not_username(tmp_path):
+    for backend in ("json", "sqlite"):
+        db = open_database(str(tmp_path / backend), backend)
+        db.add_connection(Connection("build", "ci.example", username="bob"))
+        db.add_connection(Connection("web", "bobcat.example"))
+
+        assert resolve_connection(db, "bob").name == "web", backend
+        assert resolve_connection(db, "CI").name == "build", backend
+        assert resolve_connection(db, "build").name == "build", backend
+        db.delete_connection("web")
+        assert resolve_connection(db, "bob") is None, backend
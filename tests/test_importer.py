@@ -0,0 +1,56 @@
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import open_database
+from turbovncui.utils.importer import import_records
+
+
+BACKENDS = ("json", "journal", "sqlite")
+
+
+def records_then(action, records):
+    """Yield records, running action once they have all been read."""
+    yield from records
+    action()
+
+
+def test_import_rechecks_names_another_instance_added(tmp_path):
+    for backend in BACKENDS:
+        config_dir = str(tmp_path / backend)
+        ours = open_database(config_dir, backend)
+        theirs = open_database(config_dir, backend)
+        ours.load_connections()
+
+        records = records_then(
+            lambda: theirs.add_connection(Connection("web", "theirs.example")),
+            [{"name": "web", "host": "ours.example"},
+             {"name": "db", "host": "db.example"}]
+        )
+        report = import_records(ours, records)
+
+        assert (report.added, report.conflicts) == (1, ["web"]), backend
+        reopened = open_database(config_dir, backend)
+        assert reopened.get_connection_by_name("web").host == "theirs.example"
+        assert [c.name for c in reopened.load_connections()] == ["web", "db"]
+
+
+def test_import_skips_servers_another_instance_added(tmp_path):
+    for backend in BACKENDS:
+        config_dir = str(tmp_path / backend)
+        ours = open_database(config_dir, backend)
+        theirs = open_database(config_dir, backend)
+
+        records = records_then(
+            lambda: theirs.add_connection(Connection("other", "db.example")),
+            [{"name": "db", "host": "db.example"}]
+        )
+        report = import_records(ours, records)
+
+        assert (report.added, report.skipped) == (0, 1), backend
+        assert [c.name for c in ours.load_connections()] == ["other"]
+
+
+def test_dry_run_writes_nothing(tmp_path):
+    db = open_database(str(tmp_path))
+    report = import_records(db, [{"host": "a.example"}], dry_run=True)
+
+    assert report.added == 1
+    assert db.load_connections() == []
@@ -0,0 +1,46 @@
+import json
+from turbovncui.utils import link_quality
+from turbovncui.utils.link_quality import (
+    DEFAULT_RULES, LinkMeasurement, LinkTuner
+)
+
+
+def test_failed_measurements_are_cached(tmp_path, monkeypatch):
+    calls = []
+
+    def unreachable(host, port):
+        calls.append((host, port))
+        return None
+
+    monkeypatch.setattr(link_quality, "measure_link", unreachable)
+    tuner = LinkTuner(str(tmp_path), str(tmp_path))
+
+    assert tuner.settings_for("unreachable.example", 5900) is None
+    assert tuner.settings_for("unreachable.example", 5900) is None
+    assert calls == [("unreachable.example", 5900)]
+
+    tuner.ttl = 0
+    tuner.settings_for("unreachable.example", 5900)
+    assert len(calls) == 2
+
+
+def test_bad_rules_are_skipped(tmp_path, capsys):
+    (tmp_path / "link_rules.json").write_text(json.dumps([
+        "not a rule",
+        {"max_rtt_ms": "fast", "settings": {"jpeg_quality": 90}},
+        {"max_rtt_ms": 5, "settings": {"jpeg_quality": 500}},
+        {"max_rtt_ms": 5, "settings": {"quality": 90}},
+        {"max_rtt_ms": 5, "settings": {"jpeg_quality": 90}},
+        {"settings": {"jpeg_quality": 40}},
+    ]))
+    tuner = LinkTuner(str(tmp_path), str(tmp_path))
+
+    assert len(tuner.rules()) == 2
+    assert capsys.readouterr().out.count("Warning: skipping rule") == 4
+    slow = LinkMeasurement("h", 5900, 50.0, 0.0, None, 0.0)
+    assert tuner.settings_for_measurement(slow).jpeg_quality == 40
+
+
+def test_unusable_rules_file_keeps_defaults(tmp_path):
+    (tmp_path / "link_rules.json").write_text('{"max_rtt_ms": 5}')
+    assert LinkTuner(str(tmp_path), str(tmp_path)).rules() == DEFAULT_RULES
@@ -0,0 +1,181 @@
+import os
+import shutil
+import types
+import pytest
+from turbovncui.utils import resource_monitor
+from turbovncui.utils.resource_monitor import (
+    CLOCK_TICKS, PAGE_SIZE, ResourceMonitor, ResourcePolicy, SessionLimitError
+)
+from turbovncui.utils.session_supervisor import ViewerSession
+
+
+class FakeSupervisor:
+    """Hands out a fixed list of sessions."""
+
+    def __init__(self, *sessions):
+        self.list = list(sessions)
+
+    def sessions(self):
+        return list(self.list)
+
+    def running_sessions(self):
+        return [s for s in self.list if s.running]
+
+
+class FakeProc:
+    """A /proc tree with just the files the monitor reads."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def write(self, pid, ticks, rss_pages=256, threads=1, io=None,
+              children=()):
+        fields = ["S"] + ["0"] * 49
+        fields[11], fields[12] = str(ticks - ticks // 2), str(ticks // 2)
+        fields[17], fields[21] = str(threads), str(rss_pages)
+        directory = self.root / str(pid)
+        (directory / "task" / str(pid)).mkdir(parents=True, exist_ok=True)
+        # Spaces and parentheses in the command name must not shift fields
+        (directory / "stat").write_text(
+            f"{pid} (java (a b)) " + " ".join(fields)
+        )
+        (directory / "task" / str(pid) / "children").write_text(
+            " ".join(str(child) for child in children)
+        )
+        if io is not None:
+            (directory / "io").write_text(f"rchar: {io}\nwchar: 0\n")
+
+    def remove(self, pid):
+        shutil.rmtree(self.root / str(pid))
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    monkeypatch.setattr(resource_monitor, "PROC", tmp_path)
+    return FakeProc(tmp_path)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(resource_monitor, "time",
+                        types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+def session(session_id=1, pid=100, name="a"):
+    return ViewerSession(session_id, name, pid, 0.0, None)
+
+
+def test_launch_slots_count_towards_max_sessions():
+    supervisor = FakeSupervisor(session())
+    monitor = ResourceMonitor(supervisor, ResourcePolicy(max_sessions=2))
+
+    with monitor.launch_slot():
+        with pytest.raises(SessionLimitError):
+            with monitor.launch_slot():
+                pass
+    with monitor.launch_slot():
+        pass
+
+    supervisor.list[0].exit_code = 0
+    with monitor.launch_slot(), monitor.launch_slot():
+        pass
+
+
+def test_cpu_io_and_memory_sum_over_the_process_tree(proc, clock):
+    proc.write(100, ticks=50, rss_pages=100, threads=20, io=1000,
+               children=[101])
+    proc.write(101, ticks=10, rss_pages=50, threads=2, io=500)
+    monitor = ResourceMonitor(FakeSupervisor(session()))
+
+    monitor.sample()
+    first = monitor.usage(1)
+    assert (first.samples, first.cpu_percent) == (1, 0.0)
+    assert first.io_bytes_per_second is None
+    assert (first.processes, first.threads) == (2, 22)
+    assert first.rss_bytes == 150 * PAGE_SIZE
+
+    # One CPU-second and 4 KiB of I/O over two seconds
+    clock.now += 2
+    proc.write(101, ticks=10 + CLOCK_TICKS, rss_pages=50, threads=2,
+               io=500 + 4096)
+    monitor.sample()
+    second = monitor.usage(1)
+    assert second.cpu_percent == pytest.approx(50.0)
+    assert second.io_bytes_per_second == pytest.approx(2048.0)
+
+    # A child exiting lowers the totals; that is no activity, not negative
+    proc.remove(101)
+    proc.write(100, ticks=50, rss_pages=100, threads=20, io=1000)
+    clock.now += 2
+    monitor.sample()
+    third = monitor.usage(1)
+    assert (third.cpu_percent, third.io_bytes_per_second) == (0.0, 0.0)
+    assert third.processes == 1
+
+
+def test_quiet_viewer_becomes_idle_until_it_is_busy(proc, clock):
+    proc.write(100, ticks=0, io=0)
+    policy = ResourcePolicy(idle_after_minutes=1)
+    monitor = ResourceMonitor(FakeSupervisor(session()), policy)
+
+    for _ in range(4):
+        monitor.sample()
+        clock.now += 30
+    usage = monitor.usage(1)
+    assert usage.idle and usage.quiet_since == 1030.0
+    assert usage.summary().endswith(", idle 1m")
+
+    # Just over the I/O threshold counts as activity
+    proc.write(100, ticks=0, io=int(30 * 1024) + 30)
+    monitor.sample()
+    usage = monitor.usage(1)
+    assert not usage.idle and usage.quiet_since is None
+
+
+def test_kill_policy_stops_the_tree_once(proc, clock, monkeypatch):
+    killed = []
+    monkeypatch.setattr(os, "kill", lambda pid, sig: killed.append(pid))
+    proc.write(100, ticks=0, rss_pages=1, children=[101])
+    proc.write(101, ticks=0, rss_pages=2 * 1024 * 1024 // PAGE_SIZE)
+
+    warn = ResourceMonitor(FakeSupervisor(session()),
+                           ResourcePolicy(memory_limit_mb=1))
+    warn.sample()
+    assert warn.usage(1).over_memory_limit and killed == []
+
+    kill = ResourceMonitor(
+        FakeSupervisor(session()),
+        ResourcePolicy(memory_limit_mb=1, memory_action="kill")
+    )
+    kill.sample()
+    kill.sample()
+    assert kill.usage(1).killed
+    # Children first, and only once
+    assert killed == [101, 100]
+
+
+def test_finished_and_forgotten_sessions_are_not_sampled(proc, clock):
+    proc.write(100, ticks=0)
+    proc.write(200, ticks=0)
+    supervisor = FakeSupervisor(session(1, 100), session(2, 200, "b"))
+    monitor = ResourceMonitor(supervisor)
+    monitor.sample()
+    assert set(monitor.all_usage()) == {1, 2}
+
+    supervisor.list[1].exit_code = 0
+    monitor.sample()
+    assert monitor.usage(2).samples == 1
+    del supervisor.list[1]
+    monitor.sample()
+    assert set(monitor.all_usage()) == {1}
+
+
+def test_policy_file_falls_back_to_warn(tmp_path, capsys):
+    path = tmp_path / "resource_limits.json"
+    path.write_text('{"max_sessions": 3, "memory_action": "explode", '
+                    '"unknown": 1}')
+    policy = ResourcePolicy.load(path)
+    assert (policy.max_sessions, policy.memory_action) == (3, "warn")
+    assert "unknown memory_action" in capsys.readouterr().out
@@ -0,0 +1,192 @@
+import asyncio
+import os
+import struct
+import zlib
+import pytest
+from turbovncui.utils.rfb_client import (
+    ENCODING_RAW, ENCODING_ZRLE, SECURITY_NONE, SECURITY_VNC_AUTH, RFBError,
+    grab_framebuffer
+)
+from turbovncui.utils.vncauth import vnc_auth_response
+
+# CPIXELs are blue, green, red; framebuffer pixels add a padding byte
+RED, GREEN, BLUE, WHITE = b"\0\0\xff", b"\0\xff\0", b"\xff\0\0", b"\xff" * 3
+
+
+def rectangle(x, y, width, height, encoding, data):
+    return struct.pack(">HHHHi", x, y, width, height, encoding) + data
+
+
+def update(*rectangles):
+    return struct.pack(">BxH", 0, len(rectangles)) + b"".join(rectangles)
+
+
+class ZRLE:
+    """Compresses ZRLE rectangles with one zlib stream, like a server."""
+
+    def __init__(self):
+        self.deflater = zlib.compressobj()
+
+    def rectangle(self, x, y, width, height, tiles):
+        data = (self.deflater.compress(tiles) +
+                self.deflater.flush(zlib.Z_SYNC_FLUSH))
+        return rectangle(x, y, width, height, ENCODING_ZRLE,
+                         struct.pack(">I", len(data)) + data)
+
+
+async def serve(width, height, messages=b"", version=b"RFB 003.008\n",
+                security=SECURITY_NONE, password=None, name=b"desktop"):
+    """Start a fake VNC server that sends messages after the handshake."""
+    async def handle(reader, writer):
+        try:
+            writer.write(version)
+            minor = int((await reader.readexactly(12))[8:11])
+            if minor == 3:
+                writer.write(struct.pack(">I", security))
+            else:
+                writer.write(bytes([1, security]))
+                assert (await reader.readexactly(1))[0] == security
+
+            result = 0
+            if security == SECURITY_VNC_AUTH:
+                challenge = os.urandom(16)
+                writer.write(challenge)
+                response = await reader.readexactly(16)
+                result = int(response != vnc_auth_response(password,
+                                                           challenge))
+            if minor == 8 or security == SECURITY_VNC_AUTH:
+                writer.write(struct.pack(">I", result))
+            if result:
+                if minor == 8:
+                    reason = b"bad password"
+                    writer.write(struct.pack(">I", len(reason)) + reason)
+                return
+
+            await reader.readexactly(1)
+            writer.write(struct.pack(">HH16xI", width, height, len(name)) +
+                         name)
+            # SetPixelFormat, SetEncodings and FramebufferUpdateRequest
+            await reader.readexactly(20 + 12 + 10)
+            writer.write(messages)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, server.sockets[0].getsockname()[1]
+
+
+def grab(width, height, messages=b"", client_password=None, **options):
+    async def run():
+        server, port = await serve(width, height, messages, **options)
+        async with server:
+            return await grab_framebuffer("127.0.0.1", port,
+                                          client_password, timeout=5)
+
+    return asyncio.run(run())
+
+
+def pixels(*cpixels):
+    return bytearray(b"".join(cpixel + b"\0" for cpixel in cpixels))
+
+
+@pytest.mark.parametrize("version", [b"RFB 003.003\n", b"RFB 003.008\n"])
+def test_handshake_without_password(version):
+    raw = rectangle(0, 0, 2, 1, ENCODING_RAW, pixels(RED, GREEN))
+    framebuffer = grab(2, 1, update(raw), version=version)
+
+    assert (framebuffer.width, framebuffer.height) == (2, 1)
+    assert framebuffer.name == "desktop"
+    assert framebuffer.pixels == pixels(RED, GREEN)
+
+
+@pytest.mark.parametrize("version", [b"RFB 003.003\n", b"RFB 003.008\n"])
+def test_handshake_with_vnc_password(version):
+    raw = rectangle(0, 0, 1, 1, ENCODING_RAW, pixels(BLUE))
+    framebuffer = grab(1, 1, update(raw), b"secret", version=version,
+                       security=SECURITY_VNC_AUTH, password=b"secret")
+    assert framebuffer.pixels == pixels(BLUE)
+
+    with pytest.raises(RFBError, match="needs a password"):
+        grab(1, 1, version=version, security=SECURITY_VNC_AUTH,
+             password=b"secret")
+
+
+@pytest.mark.parametrize("version, reason", [
+    (b"RFB 003.003\n", "authentication failed"),
+    (b"RFB 003.008\n", "bad password"),
+])
+def test_wrong_password_reports_the_reason(version, reason):
+    with pytest.raises(RFBError, match=reason):
+        grab(1, 1, client_password=b"wrong", version=version,
+             security=SECURITY_VNC_AUTH, password=b"secret")
+
+
+def test_raw_and_zrle_rectangles_fill_the_framebuffer():
+    zrle = ZRLE()
+    messages = update(
+        # Raw tile
+        zrle.rectangle(0, 0, 2, 2, b"\0" + RED + GREEN + BLUE + WHITE),
+        # Solid tile
+        zrle.rectangle(2, 0, 2, 2, b"\1" + GREEN),
+        # Two-colour palette, one bit per pixel, rows padded to a byte
+        zrle.rectangle(4, 0, 3, 2,
+                       b"\2" + RED + BLUE + bytes([0b01000000, 0b11000000])),
+        rectangle(7, 0, 1, 2, ENCODING_RAW, pixels(WHITE, RED)),
+        # Plain RLE: red x3, then blue x5
+        zrle.rectangle(0, 2, 4, 2, b"\x80" + RED + b"\2" + BLUE + b"\4"),
+        # Palette RLE: green, then white x6, then green
+        zrle.rectangle(4, 2, 4, 2,
+                       b"\x82" + GREEN + WHITE + b"\0" + b"\x81\5" + b"\0"),
+    )
+    framebuffer = grab(8, 4, messages)
+
+    assert framebuffer.pixels == pixels(
+        RED, GREEN, GREEN, GREEN, RED, BLUE, RED, WHITE,
+        BLUE, WHITE, GREEN, GREEN, BLUE, BLUE, RED, RED,
+        RED, RED, RED, BLUE, GREEN, WHITE, WHITE, WHITE,
+        BLUE, BLUE, BLUE, BLUE, WHITE, WHITE, WHITE, GREEN,
+    )
+
+
+def test_zrle_splits_rectangles_into_64_pixel_tiles():
+    # Five colours take four bits per pixel; indexes 0..4, then 0s
+    palette = b"\5" + RED + GREEN + BLUE + WHITE + b"\x10\x20\x30"
+    first = palette + bytes([0x01, 0x23, 0x40] + [0x00] * 29)
+    second = b"\1" + BLUE
+    framebuffer = grab(70, 1, update(
+        ZRLE().rectangle(0, 0, 70, 1, first + second)
+    ))
+
+    colours = [RED, GREEN, BLUE, WHITE, b"\x10\x20\x30"]
+    expected = pixels(*colours, *[RED] * 59, *[BLUE] * 6)
+    assert framebuffer.pixels == expected
+
+
+def test_messages_before_the_update_are_skipped():
+    raw = rectangle(0, 0, 1, 1, ENCODING_RAW, pixels(GREEN))
+    messages = (b"\2" + b"\3\0\0\0" + struct.pack(">I", 4) + b"clip" +
+                update(raw))
+    assert grab(1, 1, messages).pixels == pixels(GREEN)
+
+
+@pytest.mark.parametrize("width, height, messages, error", [
+    (8000, 8000, b"", "framebuffer too large"),
+    (2, 2, update(rectangle(1, 0, 2, 2, ENCODING_RAW, pixels(RED) * 4)),
+     "rectangle outside the framebuffer"),
+    (2, 1, update(ZRLE().rectangle(0, 0, 2, 1, b"\0" + RED)),
+     "truncated ZRLE data"),
+    (2, 1, update(ZRLE().rectangle(0, 0, 2, 1, b"\x80" + RED + b"\4")),
+     "ZRLE run overflows its tile"),
+    (2, 1, update(rectangle(0, 0, 2, 1, ENCODING_ZRLE,
+                            struct.pack(">I", 4) + b"oops")),
+     "corrupt framebuffer update"),
+    (2, 1, update(rectangle(0, 0, 2, 1, ENCODING_RAW, pixels(RED))),
+     "connection closed"),
+    (1, 1, b"\x7f", "unexpected message type 127"),
+])
+def test_bad_updates_raise_rfb_error(width, height, messages, error):
+    with pytest.raises(RFBError, match=error):
+        grab(width, height, messages)
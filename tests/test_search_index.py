@@ -0,0 +1,53 @@
+from turbovncui.models.connection import Connection
+from turbovncui.utils import search_index
+from turbovncui.utils.search_index import SearchIndex
+
+
+def inventory(count=50):
+    return [Connection(f"node{i:03d}", f"node{i}.example.com", username="ops")
+            for i in range(count)]
+
+
+def reloaded(connections):
+    """Fresh copies, as a reload from disk makes them."""
+    return [Connection.from_dict(c.to_dict()) for c in connections]
+
+
+def test_unchanged_reload_touches_nothing():
+    connections = inventory()
+    index = SearchIndex()
+    assert index.sync(connections) == len(connections)
+
+    copies = reloaded(connections)
+    assert index.sync(copies) == 0
+    # Results hand out the new objects
+    assert index.search("node007")[0] is copies[7]
+
+
+def test_one_edit_reindexes_one_entry():
+    connections = inventory()
+    index = SearchIndex()
+    index.sync(connections)
+
+    copies = reloaded(connections)
+    copies[3] = Connection("node003", "moved.example.org", username="ops")
+    assert index.sync(copies) == 1
+    assert [c.name for c in index.search("moved")] == ["node003"]
+    assert index.search("node003")[0].host == "moved.example.org"
+
+
+def test_removal_and_compaction(monkeypatch):
+    monkeypatch.setattr(search_index, "MIN_TOMBSTONES", 5)
+    connections = inventory(40)
+    index = SearchIndex()
+    index.sync(connections)
+
+    assert index.sync(connections[:10]) == 30
+    assert len(index) == 10
+    # Tombstones outnumbered the live entries partway, so those went
+    assert len(index._texts) < 40
+    assert index._removed <= len(index)
+    assert [c.name for c in index.search("node00")] == [
+        f"node00{i}" for i in range(10)
+    ]
+    assert "node039" not in [c.name for c in index.search("node039")]
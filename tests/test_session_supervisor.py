@@ -0,0 +1,33 @@
+import subprocess
+import sys
+import time
+from turbovncui.utils.session_supervisor import SessionSupervisor
+
+
+def spawn(code):
+    return subprocess.Popen([sys.executable, "-c", code],
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_forget_finished_drops_only_exited_sessions(tmp_path):
+    supervisor = SessionSupervisor(tmp_path, poll_interval=0.05)
+    done = supervisor.add(spawn("print('Connection refused')"), "done")
+    live = supervisor.add(spawn("import time; time.sleep(30)"), "live")
+    try:
+        wait_for(lambda: not done.running)
+        assert done.failure == "connection refused"
+
+        supervisor.forget_finished([done.session_id, live.session_id])
+        assert supervisor.sessions() == [live]
+    finally:
+        supervisor._processes[live.session_id].kill()
+    wait_for(lambda: not live.running)
+    supervisor.forget_finished()
+    assert supervisor.sessions() == []
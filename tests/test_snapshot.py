@@ -0,0 +1,55 @@
+import json
+import pytest
+from turbovncui.models.connection import Connection
+from turbovncui.models.profile import PerformanceSettings
+from turbovncui.utils.database import ConnectionDatabase
+from turbovncui.utils.snapshot import read_snapshot, write_snapshot
+
+SIGNATURE = (1, 2, 3)
+
+
+def test_round_trip_keeps_every_field(tmp_path):
+    connections = [
+        Connection("a", "shared.example", 5901, "me", ":1", None,
+                   PerformanceSettings(preset="custom", jpeg_quality=80),
+                   "me@bastion", "lab/rack1"),
+        Connection("b", "shared.example", username="me"),
+        Connection("été \U0001f600", "hôte", 65535,
+                   group="lab/rack1"),
+    ]
+    path = tmp_path / "connections.snapshot"
+    write_snapshot(path, connections, SIGNATURE)
+
+    assert read_snapshot(path, SIGNATURE) == connections
+
+
+def test_snapshot_of_another_file_version_is_ignored(tmp_path):
+    path = tmp_path / "connections.snapshot"
+    write_snapshot(path, [Connection("a", "a.example")], SIGNATURE)
+
+    for signature in [(9, 2, 3), (1, 2, 4), (1, 1, 3)]:
+        assert read_snapshot(path, signature) is None, signature
+    # A connections.json newer than the snapshot itself
+    assert read_snapshot(path, (1, 2 ** 62, 3)) is None
+    assert read_snapshot(tmp_path / "missing", SIGNATURE) is None
+
+
+def test_non_string_field_is_rejected_without_writing(tmp_path):
+    path = tmp_path / "connections.snapshot"
+    with pytest.raises(TypeError):
+        write_snapshot(path, [Connection("a", "a.example", display=1)],
+                       SIGNATURE)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_database_loads_without_snapshot_for_bad_field(tmp_path, capsys):
+    data = [{"name": "a", "host": "a.example", "display": 1},
+            {"name": "b", "host": "b.example"}]
+    (tmp_path / "connections.json").write_text(json.dumps(data))
+
+    for _ in range(2):
+        db = ConnectionDatabase(str(tmp_path))
+        connections = db.load_connections()
+        assert [c.display for c in connections] == [1, None]
+    assert "not caching connections" in capsys.readouterr().out
+    assert not (tmp_path / "connections.snapshot").exists()
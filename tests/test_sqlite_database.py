@@ -0,0 +1,33 @@
+from turbovncui.models.connection import Connection
+from turbovncui.utils.database import open_database
+
+
+def names(db):
+    return [conn.name for conn in db.load_connections()]
+
+
+def test_rename_of_missing_connection_keeps_others(tmp_path):
+    db = open_database(str(tmp_path), "sqlite")
+    db.add_connection(Connection("a", "a.example.com"))
+    db.add_connection(Connection("b", "b.example.com"))
+
+    assert not db.update_connection("missing", Connection("b", "x"))
+    assert names(db) == ["a", "b"]
+    assert db.get_connection_by_name("b").host == "b.example.com"
+
+
+def test_rename_keeps_position(tmp_path):
+    db = open_database(str(tmp_path), "sqlite")
+    for name in ("a", "b", "c"):
+        db.add_connection(Connection(name, f"{name}.example.com"))
+
+    assert db.update_connection("b", Connection("d", "d.example.com"))
+    assert names(db) == ["a", "d", "c"]
+
+
+def test_add_does_not_replace(tmp_path):
+    for backend in ("json", "journal", "sqlite"):
+        db = open_database(str(tmp_path / backend), backend)
+        assert db.add_connection(Connection("a", "old.example.com"))
+        assert not db.add_connection(Connection("a", "new.example.com"))
+        assert db.get_connection_by_name("a").host == "old.example.com"
@@ -0,0 +1,26 @@
+from turbovncui.utils.thumbnails import ThumbnailCache, encode_png
+
+PNG = encode_png(1, 1, b"\0\0\0")
+
+
+def test_cache_is_indexed_only_when_asked(tmp_path):
+    ThumbnailCache(str(tmp_path)).put("a.example", 5900, PNG)
+    cache = ThumbnailCache(str(tmp_path))
+    assert not cache.loaded
+
+    cache.load()
+    assert cache.loaded
+    assert cache.stored_at("a.example", 5900) is not None
+    assert cache.total_bytes() == len(PNG)
+
+
+def test_failed_save_warns_and_keeps_index(tmp_path, capsys):
+    (tmp_path / "thumbnails").write_text("not a directory")
+    cache = ThumbnailCache(str(tmp_path))
+
+    cache.put("a.example", 5900, PNG)
+
+    assert capsys.readouterr().out.startswith(
+        "Warning: could not save thumbnail:"
+    )
+    assert cache.stored_at("a.example", 5900) is None
@@ -0,0 +1,162 @@
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+import pytest
+from turbovncui.utils.tunnels import (
+    MAX_CONTROL_PATH, TunnelError, TunnelManager
+)
+
+
+def test_long_control_dir_falls_back_to_short_path(tmp_path, monkeypatch):
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    control_dir = tmp_path / ("very-long-home-directory-name" * 4) / "ssh"
+    manager = TunnelManager(control_dir)
+
+    master = manager._master_for("someone@" + "bastion" * 20 + ".example")
+    assert len(os.fsencode(master.control_path)) <= MAX_CONTROL_PATH
+    assert master.control_path.parent == (
+        Path(tempfile.gettempdir()) / f"turbovncui-ssh-{os.getuid()}"
+    )
+
+
+def test_short_control_dir_is_kept(tmp_path):
+    manager = TunnelManager(tmp_path / "ssh")
+    master = manager._master_for("bastion")
+    assert master.control_path.parent == tmp_path / "ssh"
+
+
+STUB_SSH = """\
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+args = sys.argv[1:]
+control = Path(args[args.index("-S") + 1])
+destination = args[-1]
+calls = Path(__file__).with_name("calls")
+
+
+def log(line):
+    with open(calls, "a") as f:
+        print(line, file=f)
+
+
+if "-M" in args:
+    if destination == "unreachable":
+        sys.exit("ssh: connect to host unreachable: Connection refused")
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    log(f"master {destination}")
+    control.write_text(str(os.getpid()))
+    try:
+        while True:
+            time.sleep(1)
+    finally:
+        control.unlink()
+
+command = args[args.index("-O") + 1]
+try:
+    pid = int(control.read_text())
+    os.kill(pid, 0)
+except (OSError, ValueError):
+    sys.exit("Control socket connect: No such file or directory")
+if command == "exit":
+    os.kill(pid, signal.SIGTERM)
+if command != "check":
+    log(" ".join([command, *args[args.index("-O") + 2:args.index("-S")]]))
+"""
+
+
+def stub_manager(tmp_path, idle_timeout=300.0):
+    """A TunnelManager whose ssh is a stub that logs its calls."""
+    ssh = tmp_path / "ssh"
+    ssh.write_text(f"#!{sys.executable}\n{STUB_SSH}")
+    ssh.chmod(0o755)
+    return TunnelManager(tmp_path / "control", idle_timeout, str(ssh),
+                         connect_timeout=10)
+
+
+def calls(tmp_path):
+    path = tmp_path / "calls"
+    return path.read_text().splitlines() if path.exists() else []
+
+
+def wait_for(condition, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_tunnels_to_one_server_are_shared(tmp_path):
+    manager = stub_manager(tmp_path)
+    try:
+        first = manager.acquire("me@bastion:2222", "10.0.0.5", 5901)
+        second = manager.acquire("me@bastion:2222", "10.0.0.5", 5901)
+        other = manager.acquire("me@bastion:2222", "10.0.0.6", 5901)
+
+        assert first is second and first.refs == 2
+        assert other.local_port != first.local_port
+        assert calls(tmp_path) == [
+            "master me@bastion",
+            f"forward -L 127.0.0.1:{first.local_port}:10.0.0.5:5901",
+            f"forward -L 127.0.0.1:{other.local_port}:10.0.0.6:5901",
+        ]
+
+        manager.release(first)
+        assert first.refs == 1 and first in manager.tunnels()
+        manager.release(first)
+        manager.release(first)
+        assert first.refs == 0
+    finally:
+        manager.close_all()
+    assert calls(tmp_path)[-1] == "exit"
+
+
+def test_idle_tunnels_and_master_are_closed(tmp_path):
+    manager = stub_manager(tmp_path, idle_timeout=0.2)
+    try:
+        kept = manager.acquire("bastion", "10.0.0.5", 5901)
+        idle = manager.acquire("bastion", "10.0.0.6", 5901)
+        master = manager._masters["bastion"]
+
+        manager.release(idle)
+        cancel = f"cancel -L 127.0.0.1:{idle.local_port}:10.0.0.6:5901"
+        wait_for(lambda: cancel in calls(tmp_path))
+        assert manager.tunnels() == [kept]
+        assert master.alive
+
+        # The last tunnel goes with its master, which needs no cancel
+        manager.release(kept)
+        wait_for(lambda: not master.alive)
+        assert manager.tunnels() == [] and manager._masters == {}
+        assert calls(tmp_path)[-2:] == [cancel, "exit"]
+    finally:
+        manager.close_all()
+
+
+def test_dead_master_is_restarted_with_fresh_tunnels(tmp_path):
+    manager = stub_manager(tmp_path)
+    try:
+        old = manager.acquire("bastion", "10.0.0.5", 5901)
+        master = manager._masters["bastion"]
+        master.process.kill()
+        master.process.wait()
+
+        new = manager.acquire("bastion", "10.0.0.5", 5901)
+        assert new is not old and new.refs == 1
+        assert master.alive
+        assert [line.split()[0] for line in calls(tmp_path)] == [
+            "master", "forward", "master", "forward"
+        ]
+    finally:
+        manager.close_all()
+
+
+def test_failed_master_reports_ssh_error(tmp_path):
+    manager = stub_manager(tmp_path)
+    with pytest.raises(TunnelError, match="Connection refused"):
+        manager.acquire("unreachable", "10.0.0.5", 5901)
+    assert manager.tunnels() == []
@@ -0,0 +1,28 @@
+import os
+from turbovncui.utils.vnc_launcher import default_cache_dir
+
+
+def test_cache_dir_ignores_empty_or_relative_xdg(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    expected = os.path.join(str(tmp_path), ".cache", "turbovncui")
+    for value in ("", "relative/cache"):
+        monkeypatch.setenv("XDG_CACHE_HOME", value)
+        assert default_cache_dir() == expected
+
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "xdg"))
+    assert default_cache_dir() == str(tmp_path / "xdg" / "turbovncui")
+
+
+def test_gateway_links_are_measured_at_the_gateway(monkeypatch, tmp_path):
+    from turbovncui.models.connection import Connection
+    from turbovncui.utils.vnc_launcher import VNCLaucher
+
+    monkeypatch.setenv("HOME", str(tmp_path))
+    launcher = VNCLaucher("vncviewer", cache_dir=str(tmp_path / "cache"))
+
+    direct = Connection("direct", "vnc.example.com", 5901)
+    assert launcher.link_endpoint(direct) == ("vnc.example.com", 5901)
+    bastion = Connection("via", "10.0.0.5", gateway="me@bastion.example")
+    assert launcher.link_endpoint(bastion) == ("bastion.example", 22)
+    other_port = Connection("via2", "10.0.0.5", gateway="bastion:2222")
+    assert launcher.link_endpoint(other_port) == ("bastion", 2222)